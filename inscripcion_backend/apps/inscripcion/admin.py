@@ -1,7 +1,8 @@
 from django.contrib import admin
 from .models import (
     Carrera, PlanEstudios, Materia, MateriaCarreraSemestre,
-    Estudiante, EstudianteCarrera, PeriodoAcademico, Inscripcion, InscripcionMateria, Bloqueo
+    Estudiante, EstudianteCarrera, PeriodoAcademico, Inscripcion, InscripcionMateria, Bloqueo,
+    ListaEspera, OfertaMateria
 )
 
 
@@ -63,6 +64,15 @@ class EstudianteCarreraAdmin(admin.ModelAdmin):
     search_fields = ['estudiante__registro', 'estudiante__nombre', 'carrera__nombre']
 
 
+@admin.register(OfertaMateria)
+class OfertaMateriaAdmin(admin.ModelAdmin):
+    list_display = ['materia_carrera', 'periodo', 'grupo', 'docente', 'horario', 'turno', 'cupo_actual', 'cupo_maximo']
+    list_filter = ['periodo', 'turno', 'materia_carrera__carrera']
+    search_fields = ['docente', 'materia_carrera__materia__nombre', 'materia_carrera__materia__codigo']
+    list_select_related = ['materia_carrera__materia', 'periodo']
+    ordering = ['materia_carrera__materia__codigo', 'grupo']
+
+
 @admin.register(PeriodoAcademico)
 class PeriodoAcademicoAdmin(admin.ModelAdmin):
     list_display = ['codigo', 'nombre', 'tipo', 'fecha_inicio', 'fecha_fin', 'activo', 'inscripciones_habilitadas']
@@ -127,3 +137,11 @@ class BloqueoAdmin(admin.ModelAdmin):
         """Muestra una versión corta del motivo"""
         return obj.motivo[:50] + '...' if len(obj.motivo) > 50 else obj.motivo
 
+
+@admin.register(ListaEspera)
+class ListaEsperaAdmin(admin.ModelAdmin):
+    list_display = ['oferta', 'estudiante_carrera', 'estado', 'creado_en', 'promovida_en']
+    list_filter = ['estado']
+    search_fields = ['estudiante_carrera__estudiante__registro', 'oferta__materia_carrera__materia__codigo']
+    list_select_related = ['oferta__materia_carrera__materia', 'oferta__periodo', 'estudiante_carrera__estudiante', 'estudiante_carrera__carrera']
+    readonly_fields = ['creado_en', 'promovida_en']
@@ -2,9 +2,12 @@
 Mutations GraphQL para el modulo de inscripción
 """
 import graphene
+from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
 
+from ..services import SolicitudInscripcionService, AdmisionService
+
 
 class MatSelecInput(graphene.InputObjectType):
     nroSerie = graphene.String(required=True)
@@ -26,6 +29,7 @@ class ConfirmarInscripcion(graphene.Mutation):
     """
     Confirma la inscripción de un estudiante guardando los grupos seleccionados.
     Recibe una lista de IDs de OfertaMateria y los vincula a la Inscripcion del estudiante.
+    Los reintentos con la misma selección devuelven la tarea ya encolada.
     """
 
     class Arguments:
@@ -33,16 +37,66 @@ class ConfirmarInscripcion(graphene.Mutation):
         codigo_carrera = graphene.String(required=True)
         oferta_ids = graphene.List(graphene.Int, required=True)
         proceso = graphene.String()
+        clave_idempotencia = graphene.String()
+        ficha_admision = graphene.String()
 
     ok = graphene.Boolean()
     mensaje = graphene.String()
+    task_id = graphene.String()
 
     @staticmethod
-    def mutate(root, info, registro, codigo_carrera, oferta_ids, proceso="Inscripción"):
-        return ConfirmarInscripcion(
-            ok=False, 
-            mensaje="Inscripción deshabilitada por seguridad (Modo Lectura activo para Informix)."
+    def mutate(root, info, registro, codigo_carrera, oferta_ids, proceso="Inscripción", clave_idempotencia=None,
+               ficha_admision=None):
+        if settings.INSCRIPCION_MODO_LECTURA:
+            return ConfirmarInscripcion(
+                ok=False, 
+                mensaje="Inscripción deshabilitada por seguridad (Modo Lectura activo para Informix)."
+            )
+
+        clave_idempotencia = clave_idempotencia or SolicitudInscripcionService.clave_idempotencia(
+            registro, codigo_carrera, oferta_ids, proceso
         )
+        if AdmisionService.habilitada() and not AdmisionService.usar(
+            ficha_admision, registro, codigo_carrera, clave_idempotencia
+        ):
+            return ConfirmarInscripcion(
+                ok=False,
+                mensaje="Tu ficha de admisión no es válida, expiró o ya se usó. Vuelve a ingresar por la sala de espera."
+            )
+
+        envio = SolicitudInscripcionService.enviar(
+            registro, codigo_carrera, oferta_ids, proceso, clave=clave_idempotencia, ficha=ficha_admision
+        )
+        resultado = envio['resultado']
+        if resultado:
+            return ConfirmarInscripcion(
+                ok=resultado.get('ok'), mensaje=resultado.get('mensaje'), task_id=envio['task_id']
+            )
+
+        mensaje = "Tu solicitud ya está en proceso." if envio['duplicada'] else "Solicitud de inscripción recibida."
+        return ConfirmarInscripcion(ok=True, mensaje=mensaje, task_id=envio['task_id'])
+
+
+class SolicitarAdmision(graphene.Mutation):
+    """
+    Sala de espera: entrega una ficha de admisión firmada si el turno del
+    estudiante ya comenzó y hay capacidad; si no, su posición y cuántos
+    segundos esperar antes de reintentar.
+    """
+
+    class Arguments:
+        registro = graphene.String(required=True)
+        codigo_carrera = graphene.String(required=True)
+
+    admitido = graphene.Boolean()
+    ficha = graphene.String()
+    posicion = graphene.Int()
+    reintentar_en = graphene.Int()
+    mensaje = graphene.String()
+
+    @staticmethod
+    def mutate(root, info, registro, codigo_carrera):
+        return SolicitarAdmision(**AdmisionService.solicitar(registro, codigo_carrera))
 
 
 class MarcarMaterias(graphene.Mutation):
@@ -61,6 +115,9 @@ class Mutation(graphene.ObjectType):
     confirmar_inscripcion = ConfirmarInscripcion.Field(
         description="Confirma la inscripción guardando los grupos seleccionados en la base de datos."
     )
+    solicitar_admision = SolicitarAdmision.Field(
+        description="Sala de espera: solicita una ficha de admisión para inscribirse."
+    )
     marcar_materias = MarcarMaterias.Field(
         description="Guarda temporalmente las materias seleccionadas antes de confirmar."
     )
@@ -7,15 +7,141 @@ from .types import (
     OfertaMateriaType, BuscarEstudianteType, NombreEstudianteType,
     BloqueoExternoType, BoletaInscripcionExternaType, MateriaOfertaType,
     MofertaGrupoType, MofertaType, MateriaInscritaType, TransaccionType,
-    ModalidadMateriaSeleccionadaType, MensajeErrorInscripcionType
+    ModalidadMateriaSeleccionadaType, MensajeErrorInscripcionType, EstadoInscripcionType,
+    ValidacionHorarioType, HorarioSugeridoType, MateriaConnection, EstudianteCarreraConnection,
+    BloqueoConnection, OfertaMateriaConnection
 )
 from ..services import (
     EstudianteService, InscripcionService, PeriodoAcademicoService,
-    CarreraService, BloqueoService, PanelService, ExternalApiService
+    CarreraService, BloqueoService, PanelService, ExternalApiService,
+    EstadoSolicitudService, ConflictoHorarioService, GeneradorHorarioService
 )
-from django.core.cache import cache
+from core.utils.cache import obtener_o_calcular
+from core.utils.paginacion import MAXIMO_LISTA, paginar
 from ..models import Carrera, Materia, Bloqueo
 
+
+# Documentos de Informix por campo de Query con la función que arma sus
+# variables a partir de los argumentos del campo. AnticipoInformixMiddleware
+# los registra al comenzar cada operación para que todos viajen en un solo
+# documento (ExternalApiService.lote).
+def _mismos_argumentos(**argumentos):
+    return argumentos
+
+
+def _registro_entero(registro, **_):
+    return {"registro": int(registro)}
+
+
+CONSULTA_BLOQUEO = """
+query($registro: Int!) {
+  bloqueo(registro: $registro) {
+    cobBloq desBloq porroga desbTemp
+  }
+}
+"""
+
+CONSULTAS_INFORMIX = {
+    'gestionHabilitada': ("""
+    query($registro: Int!, $proceso: String!) {
+      gestionHabilitada(registro: $registro, proceso: $proceso) {
+        estudiante { nombre nroCi lugCi }
+        parametros { carrera plan nombreCarrera lugar nroSerie matIns matPendi }
+      }
+    }
+    """, _mismos_argumentos),
+    'listarCarreras': ("""
+    query($registro: Int!, $sem: String!, $ano: Int!) {
+      listarCarreras(registro: $registro, sem: $sem, ano: $ano) {
+        carrera plan nombreCarrera lugar descripcionLugar nroSerie
+      }
+    }
+    """, _mismos_argumentos),
+    'listarCarreras2': ("""
+    query($registro: Int!) {
+      listarCarreras2(registro: $registro) {
+        carrera plan nombreCarrera lugar descripcionLugar
+      }
+    }
+    """, _mismos_argumentos),
+    'modalidadCarrera': ("""
+    query($registro: Int!, $carr: Int!, $plan: String!, $lugar: Int!, $sem: String!, $ano: Int!) {
+      modalidadCarrera(registro: $registro, carr: $carr, plan: $plan, lugar: $lugar, sem: $sem, ano: $ano) {
+        codTit codMod descr matVen nroMat
+      }
+    }
+    """, _mismos_argumentos),
+    'costoInscripcion': ("""
+    query($nroSerie: Int!) {
+      costoInscripcion(nroSerie: $nroSerie) {
+        insMontoPag insEstado rezMontoPag rezEstado adiMonto retMonto nota
+      }
+    }
+    """, _mismos_argumentos),
+    'matIns': ("""
+    query($nroSerie: Int!) {
+      matIns(nroSerie: $nroSerie) {
+        diaIns horaIns
+      }
+    }
+    """, _mismos_argumentos),
+    'materiasCupoMin': ("""
+    query($registro: Int!, $sem: String!, $ano: Int!, $carr: Int!, $plan: String!) {
+      materiasCupoMin(registro: $registro, sem: $sem, ano: $ano, carr: $carr, plan: $plan) {
+        sw sigla grupo nombre lugar cupoMin inscritos
+      }
+    }
+    """, _mismos_argumentos),
+    'buscarEstudiante': ("""
+    query($registro: Int!) {
+      buscarEstudiante(registro: $registro) {
+        nombreCompleto codigoCarrera planCarrera
+      }
+    }
+    """, _mismos_argumentos),
+    'nombreEstudiante': ("""
+    query($registro: Int!) {
+      nombreEstudiante(registro: $registro) {
+        type nombre
+      }
+    }
+    """, _mismos_argumentos),
+    'allMoferta': ("""
+    query($registro: Int!, $carr: Int!, $plan: String!, $lugar: Int!, $sem: String!, $ano: Int!) {
+      allMoferta(registro: $registro, carr: $carr, plan: $plan, lugar: $lugar, sem: $sem, ano: $ano) {
+        codMat grupo docente cupo swHab horarios modalidad
+      }
+    }
+    """, _mismos_argumentos),
+    'materiaOferta': ("""
+    query($registro: Int!, $carr: Int!, $plan: String!, $lugar: Int!, $sem: String!, $ano: Int!, $nroSerie: Int!, $proceso: String!) {
+      materiaOferta(registro: $registro, carr: $carr, plan: $plan, lugar: $lugar, sem: $sem, ano: $ano, nroSerie: $nroSerie, proceso: $proceso) {
+        sigla nsa nombreMateria codMat ok
+      }
+    }
+    """, _mismos_argumentos),
+    'mofertaGrupo': ("""
+    query($carr: Int!, $plan: String!, $lugar: Int!, $sigla: String!, $sem: String!, $ano: Int!) {
+      mofertaGrupo(carr: $carr, plan: $plan, lugar: $lugar, sigla: $sigla, sem: $sem, ano: $ano) {
+        grupo docente cupo swHab horarios
+      }
+    }
+    """, _mismos_argumentos),
+    'bloqueo': (CONSULTA_BLOQUEO, _registro_entero),
+    'bloqueoEstudiante': (CONSULTA_BLOQUEO, _registro_entero),
+    'estadoBloqueoEstudiante': (CONSULTA_BLOQUEO, _registro_entero),
+    'motivoBloqueoEstudiante': (CONSULTA_BLOQUEO, _registro_entero),
+}
+
+
+def consulta_informix(campo, **argumentos):
+    """
+    (documento, variables) de la consulta a Informix del campo.
+    """
+    documento, variables = CONSULTAS_INFORMIX[campo]
+    return documento, variables(**argumentos)
+
+
 class Query(graphene.ObjectType):
     panel_estudiante = graphene.Field(
         PanelEstudianteType,
@@ -60,7 +186,49 @@ class Query(graphene.ObjectType):
         grupo=graphene.String(),
         registro=graphene.String(),
         proceso=graphene.String(),
-        description="Ofertas de materias"
+        dia=graphene.String(),
+        description=f"Ofertas de materias (hasta {MAXIMO_LISTA})",
+        deprecation_reason="Usar ofertasMateriaPagina"
+    )
+
+    estado_inscripcion = graphene.Field(
+        EstadoInscripcionType,
+        task_id=graphene.String(required=True),
+        description="Estado de una solicitud de inscripción encolada"
+    )
+
+    validar_horario = graphene.Field(
+        ValidacionHorarioType,
+        registro=graphene.String(required=True),
+        codigo_carrera=graphene.String(required=True),
+        oferta_ids=graphene.List(graphene.Int, required=True),
+        description="Choques de horario y materias repetidas en una selección de grupos"
+    )
+
+    generar_horarios = graphene.List(
+        HorarioSugeridoType,
+        registro=graphene.String(required=True),
+        codigo_carrera=graphene.String(required=True),
+        turno=graphene.String(),
+        codigos_materia=graphene.List(graphene.String),
+        limite=graphene.Int(default_value=5),
+        solo_con_cupo=graphene.Boolean(default_value=True),
+        description="Mejores combinaciones de grupos sin choques para las materias habilitadas"
+    )
+
+    buscar_materias = graphene.List(
+        MateriaType,
+        texto=graphene.String(required=True),
+        limite=graphene.Int(default_value=20),
+        description="Materias cuyo código o nombre contiene cada palabra del texto"
+    )
+
+    buscar_ofertas = graphene.List(
+        OfertaMateriaType,
+        texto=graphene.String(required=True),
+        codigo_periodo=graphene.String(),
+        limite=graphene.Int(default_value=50),
+        description="Ofertas del periodo por docente o nombre de materia, las más parecidas primero"
     )
     
     
@@ -105,12 +273,48 @@ class Query(graphene.ObjectType):
     todas_carreras = graphene.List(CarreraType, activa=graphene.Boolean(), registro=graphene.String())
     semestres_por_carrera = graphene.List(graphene.Int, codigo_carrera=graphene.String(required=True))
     todos_periodos = graphene.List(PeriodoAcademicoType, activo=graphene.Boolean())
-    todas_materias = graphene.List(MateriaType)
-    todos_bloqueos = graphene.List(BloqueoType, registro=graphene.String())
+    # Listas sin paginar: devuelven a lo sumo MAXIMO_LISTA filas
+    todas_materias = graphene.List(MateriaType, deprecation_reason="Usar todasMateriasPagina")
+    todos_bloqueos = graphene.List(
+        BloqueoType, registro=graphene.String(), deprecation_reason="Usar todosBloqueosPagina"
+    )
     mis_registros = graphene.List(EstudianteType, registro=graphene.String(required=True))
-    mis_carreras = graphene.List(EstudianteCarreraType, registro=graphene.String(required=True))
+    mis_carreras = graphene.List(
+        EstudianteCarreraType, registro=graphene.String(required=True), deprecation_reason="Usar misCarrerasPagina"
+    )
     fechas_inscripcion = graphene.List(FechasInscripcionType, registro=graphene.String(required=True))
 
+    # Versiones paginadas por cursor (first/after, last/before) de las listas anteriores
+    todas_materias_pagina = graphene.Field(
+        MateriaConnection,
+        first=graphene.Int(), after=graphene.String(), last=graphene.Int(), before=graphene.String()
+    )
+    todos_bloqueos_pagina = graphene.Field(
+        BloqueoConnection,
+        registro=graphene.String(),
+        first=graphene.Int(), after=graphene.String(), last=graphene.Int(), before=graphene.String()
+    )
+    mis_carreras_pagina = graphene.Field(
+        EstudianteCarreraConnection,
+        registro=graphene.String(required=True),
+        first=graphene.Int(), after=graphene.String(), last=graphene.Int(), before=graphene.String()
+    )
+    ofertas_materia_pagina = graphene.Field(
+        OfertaMateriaConnection,
+        codigo_materia=graphene.String(),
+        codigo_carrera=graphene.String(),
+        codigo_periodo=graphene.String(),
+        turno=graphene.String(),
+        tiene_cupo=graphene.Boolean(),
+        docente=graphene.String(),
+        grupo=graphene.String(),
+        registro=graphene.String(),
+        proceso=graphene.String(),
+        dia=graphene.String(),
+        first=graphene.Int(), after=graphene.String(), last=graphene.Int(), before=graphene.String(),
+        description="Ofertas de materias paginadas por ID"
+    )
+
     def resolve_panel_estudiante(self, info, registro, codigo_carrera=None):
         return PanelService.get_panel_estudiante(registro, codigo_carrera)
     
@@ -123,16 +327,9 @@ class Query(graphene.ObjectType):
     def resolve_bloqueo_estudiante(self, info, registro):
         # 1. Obtener bloqueos locales
         bloqueos_locales = BloqueoService.get_bloqueos_estudiante(registro, solo_activos=True)
-        
+
         # 2. Obtener bloqueos de Informix
-        query = """
-        query($registro: Int!) {
-          bloqueo(registro: $registro) {
-            cobBloq desBloq porroga desbTemp
-          }
-        }
-        """
-        variables = {"registro": int(registro)}
+        query, variables = consulta_informix('bloqueoEstudiante', registro=registro)
         data = ExternalApiService.query(query, variables)
         bloqueos_ext = data.get("bloqueo", []) if data else []
         
@@ -166,7 +363,26 @@ class Query(graphene.ObjectType):
         return PanelService.get_info_boleta(registro)
 
     def resolve_ofertas_materia(self, info, **kwargs):
-        return InscripcionService.get_ofertas_filtered(**kwargs)
+        return InscripcionService.get_ofertas_filtered(**kwargs)[:MAXIMO_LISTA]
+
+    def resolve_estado_inscripcion(self, info, task_id):
+        estado = EstadoSolicitudService.obtener(task_id)
+        if not estado:
+            return None
+        return {'task_id': task_id, **estado}
+
+    def resolve_validar_horario(self, info, registro, codigo_carrera, oferta_ids):
+        return ConflictoHorarioService.validar_seleccion(registro, codigo_carrera, oferta_ids)
+
+    def resolve_generar_horarios(self, info, registro, codigo_carrera, limite=5, **kwargs):
+        return GeneradorHorarioService.generar(registro, codigo_carrera, limite=max(1, min(limite, 20)), **kwargs)
+
+    def resolve_buscar_materias(self, info, texto, limite=20):
+        return InscripcionService.buscar_materias(texto, limite=max(1, min(limite, 50)))
+
+    def resolve_buscar_ofertas(self, info, texto, codigo_periodo=None, limite=50):
+        ofertas = InscripcionService.buscar_ofertas(texto, codigo_periodo, limite=max(1, min(limite, 100)))
+        return InscripcionService.con_cupos_en_vivo(ofertas)
 
     def resolve_estudiante_por_registro(self, info, registro):
         return EstudianteService.get_by_registro(registro)
@@ -180,14 +396,14 @@ class Query(graphene.ObjectType):
 
     def resolve_estado_bloqueo_estudiante(self, info, registro, codigo_periodo=None):
         # Consulta directa
-        query = "query($r: Int!) { bloqueo(registro: $r) { cobBloq } }"
-        data = ExternalApiService.query(query, {"r": int(registro)})
+        query, variables = consulta_informix('estadoBloqueoEstudiante', registro=registro)
+        data = ExternalApiService.query(query, variables)
         bloqueos = data.get("bloqueo", []) if data else []
         return len(bloqueos) > 0
 
     def resolve_motivo_bloqueo_estudiante(self, info, registro, codigo_periodo=None):
-        query = "query($r: Int!) { bloqueo(registro: $r) { cobBloq desBloq } }"
-        data = ExternalApiService.query(query, {"r": int(registro)})
+        query, variables = consulta_informix('motivoBloqueoEstudiante', registro=registro)
+        data = ExternalApiService.query(query, variables)
         bloqueos = data.get("bloqueo", []) if data else []
         if bloqueos:
             b = bloqueos[0]
@@ -223,16 +439,38 @@ class Query(graphene.ObjectType):
         return PeriodoAcademicoService.get_todos_periodos(activo)
 
     def resolve_todas_materias(self, info):
-        return cache.get_or_set(
+        return obtener_o_calcular(
             'todas_materias_plano',
-            lambda: list(Materia.objects.all()),
+            lambda: list(Materia.objects.all()[:MAXIMO_LISTA]),
             timeout=3600
         )
     
     def resolve_todos_bloqueos(self, info, registro=None):
         if registro:
-            return BloqueoService.get_bloqueos_estudiante(registro, solo_activos=False)
-        return Bloqueo.objects.all()
+            return BloqueoService.get_bloqueos_estudiante(registro, solo_activos=False)[:MAXIMO_LISTA]
+        return Bloqueo.objects.select_related('estudiante_carrera__estudiante')[:MAXIMO_LISTA]
+
+    def resolve_todas_materias_pagina(self, info, **pagina):
+        # codigo es único, el índice sirve para el orden y para el cursor
+        return paginar(Materia.objects.all(), ('codigo',), **pagina)
+
+    def resolve_todos_bloqueos_pagina(self, info, registro=None, **pagina):
+        queryset = Bloqueo.objects.select_related('estudiante_carrera__estudiante')
+        if registro:
+            queryset = queryset.filter(estudiante_carrera__estudiante__registro=registro)
+        return paginar(queryset, ('id',), **pagina)
+
+    def resolve_mis_carreras_pagina(self, info, registro, **pagina):
+        return paginar(EstudianteService.get_carreras_estudiante(registro), ('id',), **pagina)
+
+    def resolve_ofertas_materia_pagina(self, info, first=None, after=None, last=None, before=None, **kwargs):
+        # Filtros y cursor van en el WHERE; solo la página se lee y recibe los cupos al momento
+        pagina = paginar(
+            InscripcionService.get_ofertas_queryset(**kwargs), ('id',),
+            first=first, after=after, last=last, before=before
+        )
+        InscripcionService.con_cupos_en_vivo([edge['node'] for edge in pagina['edges']])
+        return pagina
 
     def resolve_mis_registros(self, info, registro):
         estudiante = EstudianteService.get_by_registro(registro)
@@ -241,7 +479,7 @@ class Query(graphene.ObjectType):
         return []
 
     def resolve_mis_carreras(self, info, registro):
-        return EstudianteService.get_carreras_estudiante(registro)
+        return EstudianteService.get_carreras_estudiante(registro)[:MAXIMO_LISTA]
 
     def resolve_fechas_inscripcion(self, info, registro):
         inscripcion = InscripcionService.get_inscripcion_actual(registro)
@@ -454,123 +692,52 @@ class Query(graphene.ObjectType):
         }
 
     def resolve_gestion_habilitada(self, info, registro, proceso):
-        query = """
-        query($registro: Int!, $proceso: String!) {
-          gestionHabilitada(registro: $registro, proceso: $proceso) {
-            estudiante { nombre nroCi lugCi }
-            parametros { carrera plan nombreCarrera lugar nroSerie matIns matPendi }
-          }
-        }
-        """
-        variables = {"registro": registro, "proceso": proceso}
+        query, variables = consulta_informix('gestionHabilitada', registro=registro, proceso=proceso)
         data = ExternalApiService.query(query, variables)
         return data.get("gestionHabilitada") if data else None
 
     def resolve_listar_carreras(self, info, registro, sem, ano):
-        query = """
-        query($registro: Int!, $sem: String!, $ano: Int!) {
-          listarCarreras(registro: $registro, sem: $sem, ano: $ano) {
-            carrera plan nombreCarrera lugar descripcionLugar nroSerie
-          }
-        }
-        """
-        variables = {"registro": registro, "sem": sem, "ano": ano}
+        query, variables = consulta_informix('listarCarreras', registro=registro, sem=sem, ano=ano)
         data = ExternalApiService.query(query, variables)
         return data.get("listarCarreras") if data else []
         
     def resolve_listar_carreras2(self, info, registro):
-        query = """
-        query($registro: Int!) {
-          listarCarreras2(registro: $registro) {
-            carrera plan nombreCarrera lugar descripcionLugar
-          }
-        }
-        """
-        variables = {"registro": registro}
+        query, variables = consulta_informix('listarCarreras2', registro=registro)
         data = ExternalApiService.query(query, variables)
         return data.get("listarCarreras2") if data else []
 
     def resolve_modalidad_carrera(self, info, registro, carr, plan, lugar, sem, ano):
-        query = """
-        query($registro: Int!, $carr: Int!, $plan: String!, $lugar: Int!, $sem: String!, $ano: Int!) {
-          modalidadCarrera(registro: $registro, carr: $carr, plan: $plan, lugar: $lugar, sem: $sem, ano: $ano) {
-            codTit codMod descr matVen nroMat
-          }
-        }
-        """
-        variables = {"registro": registro, "carr": carr, "plan": plan, "lugar": lugar, "sem": sem, "ano": ano}
+        query, variables = consulta_informix('modalidadCarrera', registro=registro, carr=carr, plan=plan, lugar=lugar, sem=sem, ano=ano)
         data = ExternalApiService.query(query, variables)
         return data.get("modalidadCarrera") if data else None
 
     def resolve_costo_inscripcion(self, info, nroSerie):
-        query = """
-        query($nroSerie: Int!) {
-          costoInscripcion(nroSerie: $nroSerie) {
-            insMontoPag insEstado rezMontoPag rezEstado adiMonto retMonto nota
-          }
-        }
-        """
-        variables = {"nroSerie": nroSerie}
+        query, variables = consulta_informix('costoInscripcion', nroSerie=nroSerie)
         data = ExternalApiService.query(query, variables)
         return data.get("costoInscripcion") if data else None
 
     def resolve_mat_ins(self, info, nroSerie):
-        query = """
-        query($nroSerie: Int!) {
-          matIns(nroSerie: $nroSerie) {
-            diaIns horaIns
-          }
-        }
-        """
-        variables = {"nroSerie": nroSerie}
+        query, variables = consulta_informix('matIns', nroSerie=nroSerie)
         data = ExternalApiService.query(query, variables)
         return data.get("matIns") if data else None
 
     def resolve_materias_cupo_min(self, info, registro, sem, ano, carr, plan):
-        query = """
-        query($registro: Int!, $sem: String!, $ano: Int!, $carr: Int!, $plan: String!) {
-          materiasCupoMin(registro: $registro, sem: $sem, ano: $ano, carr: $carr, plan: $plan) {
-            sw sigla grupo nombre lugar cupoMin inscritos
-          }
-        }
-        """
-        variables = {"registro": registro, "sem": sem, "ano": ano, "carr": carr, "plan": plan}
+        query, variables = consulta_informix('materiasCupoMin', registro=registro, sem=sem, ano=ano, carr=carr, plan=plan)
         data = ExternalApiService.query(query, variables)
         return data.get("materiasCupoMin") if data else []
 
     def resolve_buscar_estudiante(self, info, registro):
-        query = """
-        query($registro: Int!) {
-          buscarEstudiante(registro: $registro) {
-            nombreCompleto codigoCarrera planCarrera
-          }
-        }
-        """
-        variables = {"registro": registro}
+        query, variables = consulta_informix('buscarEstudiante', registro=registro)
         data = ExternalApiService.query(query, variables)
         return data.get("buscarEstudiante") if data else None
 
     def resolve_nombre_estudiante(self, info, registro):
-        query = """
-        query($registro: Int!) {
-          nombreEstudiante(registro: $registro) {
-            type nombre
-          }
-        }
-        """
-        variables = {"registro": registro}
+        query, variables = consulta_informix('nombreEstudiante', registro=registro)
         data = ExternalApiService.query(query, variables)
         return data.get("nombreEstudiante") if data else None
 
     def resolve_all_moferta(self, info, registro, carr, plan, lugar, sem, ano):
-        query = """
-        query($registro: Int!, $carr: Int!, $plan: String!, $lugar: Int!, $sem: String!, $ano: Int!) {
-          allMoferta(registro: $registro, carr: $carr, plan: $plan, lugar: $lugar, sem: $sem, ano: $ano) {
-            codMat grupo docente cupo swHab horarios modalidad
-          }
-        }
-        """
-        variables = {"registro": registro, "carr": carr, "plan": plan, "lugar": lugar, "sem": sem, "ano": ano}
+        query, variables = consulta_informix('allMoferta', registro=registro, carr=carr, plan=plan, lugar=lugar, sem=sem, ano=ano)
         try:
             data = ExternalApiService.query(query, variables)
             result = data.get("allMoferta") if data else None
@@ -592,14 +759,7 @@ class Query(graphene.ObjectType):
         ]
 
     def resolve_materia_oferta(self, info, registro, carr, plan, lugar, sem, ano, nroSerie, proceso):
-        query = """
-        query($registro: Int!, $carr: Int!, $plan: String!, $lugar: Int!, $sem: String!, $ano: Int!, $nroSerie: Int!, $proceso: String!) {
-          materiaOferta(registro: $registro, carr: $carr, plan: $plan, lugar: $lugar, sem: $sem, ano: $ano, nroSerie: $nroSerie, proceso: $proceso) {
-            sigla nsa nombreMateria codMat ok
-          }
-        }
-        """
-        variables = {"registro": registro, "carr": carr, "plan": plan, "lugar": lugar, "sem": sem, "ano": ano, "nroSerie": nroSerie, "proceso": proceso}
+        query, variables = consulta_informix('materiaOferta', registro=registro, carr=carr, plan=plan, lugar=lugar, sem=sem, ano=ano, nroSerie=nroSerie, proceso=proceso)
         try:
             data = ExternalApiService.query(query, variables)
             result = data.get("materiaOferta") if data else None
@@ -620,14 +780,7 @@ class Query(graphene.ObjectType):
         ]
 
     def resolve_moferta_grupo(self, info, carr, plan, lugar, sigla, sem, ano):
-        query = """
-        query($carr: Int!, $plan: String!, $lugar: Int!, $sigla: String!, $sem: String!, $ano: Int!) {
-          mofertaGrupo(carr: $carr, plan: $plan, lugar: $lugar, sigla: $sigla, sem: $sem, ano: $ano) {
-            grupo docente cupo swHab horarios
-          }
-        }
-        """
-        variables = {"carr": carr, "plan": plan, "lugar": lugar, "sigla": sigla, "sem": sem, "ano": ano}
+        query, variables = consulta_informix('mofertaGrupo', carr=carr, plan=plan, lugar=lugar, sigla=sigla, sem=sem, ano=ano)
         try:
             data = ExternalApiService.query(query, variables)
             result = data.get("mofertaGrupo") if data else None
@@ -654,8 +807,8 @@ class Query(graphene.ObjectType):
         } for b in locales]
 
         # 2. Externos
-        query = "query($r: Int!) { bloqueo(registro: $r) { cobBloq desBloq porroga desbTemp } }"
-        data = ExternalApiService.query(query, {"r": int(registro)})
+        query, variables = consulta_informix('bloqueo', registro=registro)
+        data = ExternalApiService.query(query, variables)
         externos = data.get("bloqueo", []) if data else []
         
         return resp_locales + externos
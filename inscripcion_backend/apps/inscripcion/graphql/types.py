@@ -5,6 +5,8 @@ from ..models import (
     Estudiante, EstudianteCarrera, PeriodoAcademico, Inscripcion, 
     InscripcionMateria, Bloqueo, OfertaMateria
 )
+from ..services.cupo_redis_service import CupoRedisService
+from ..services.cupo_service import CupoService
 
 class CarreraType(DjangoObjectType):
     class Meta:
@@ -87,12 +89,64 @@ class OfertaMateriaType(DjangoObjectType):
         return self.materia_carrera.carrera.nombre
         
     def resolve_cupos_disponibles(self, info):
+        # Las ofertas del catálogo ya traen los cupos al momento; las demás
+        # se leen de la base, que va atrasada si los contadores viven en Redis
+        if not getattr(self, 'cupos_en_vivo', False) and CupoRedisService.habilitado():
+            maximo, actual = CupoService.disponibles([self.id]).get(self.id, (self.cupo_maximo, self.cupo_actual))
+            return maximo - actual
         return self.cupo_maximo - self.cupo_actual
 
     def resolve_semestre(self, info):
         return self.materia_carrera.semestre
 
 
+class MateriaConnection(graphene.relay.Connection):
+    class Meta:
+        node = MateriaType
+
+
+class EstudianteCarreraConnection(graphene.relay.Connection):
+    class Meta:
+        node = EstudianteCarreraType
+
+
+class BloqueoConnection(graphene.relay.Connection):
+    class Meta:
+        node = BloqueoType
+
+
+class OfertaMateriaConnection(graphene.relay.Connection):
+    class Meta:
+        node = OfertaMateriaType
+
+
+class EstadoInscripcionType(graphene.ObjectType):
+    task_id = graphene.String()
+    estado = graphene.String()
+    ok = graphene.Boolean()
+    mensaje = graphene.String()
+    inscripcion_id = graphene.Int()
+
+
+class ConflictoHorarioType(graphene.ObjectType):
+    oferta_id = graphene.Int()
+    oferta_conflicto_id = graphene.Int()
+    descripcion = graphene.String()
+
+
+class ValidacionHorarioType(graphene.ObjectType):
+    valido = graphene.Boolean()
+    mensaje = graphene.String()
+    conflictos = graphene.List(ConflictoHorarioType)
+
+
+class HorarioSugeridoType(graphene.ObjectType):
+    puntaje = graphene.Float()
+    total_materias = graphene.Int()
+    oferta_ids = graphene.List(graphene.Int)
+    grupos = graphene.List(graphene.String)
+    materias_sin_grupo = graphene.List(graphene.String)
+
 
 class EstudianteInfoType(graphene.ObjectType):
     registro = graphene.String()
@@ -0,0 +1,13 @@
+"""
+Imprime las colas de inscripción para el parámetro -Q de los workers.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.inscripcion.routers import colas_inscripcion
+
+
+class Command(BaseCommand):
+    help = "Lista separada por comas de las colas inscripcion.0 ... inscripcion.N-1 (INSCRIPCION_PARTICIONES)."
+
+    def handle(self, *args, **options):
+        self.stdout.write(','.join(colas_inscripcion()))
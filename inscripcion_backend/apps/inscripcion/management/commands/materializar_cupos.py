@@ -0,0 +1,32 @@
+"""
+Activa o desactiva el modo tokens en ofertas con alta demanda.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inscripcion.models import OfertaMateria
+from apps.inscripcion.services.cupo_token_service import CupoTokenService
+
+
+class Command(BaseCommand):
+    help = "Materializa el cupo de las ofertas indicadas como tokens (SKIP LOCKED)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('oferta_ids', nargs='+', type=int, help="IDs de OfertaMateria")
+        parser.add_argument(
+            '--desactivar', action='store_true',
+            help="Vuelve las ofertas al contador cupo_actual y elimina sus tokens"
+        )
+
+    def handle(self, *args, oferta_ids, desactivar, **options):
+        ofertas = list(OfertaMateria.objects.filter(id__in=oferta_ids))
+        faltantes = set(oferta_ids) - {o.id for o in ofertas}
+        if faltantes:
+            raise CommandError(f"Ofertas no encontradas: {sorted(faltantes)}")
+
+        for oferta in ofertas:
+            if desactivar:
+                CupoTokenService.desmaterializar(oferta)
+                self.stdout.write(f"{oferta}: modo tokens desactivado")
+            else:
+                total = CupoTokenService.materializar(oferta)
+                self.stdout.write(self.style.SUCCESS(f"{oferta}: {total} tokens"))
@@ -0,0 +1,54 @@
+"""
+Reconstruye turno y bloques de horario de las ofertas existentes.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.inscripcion.models import OfertaMateria, HorarioOferta
+from apps.inscripcion.services.catalogo_service import CatalogoService
+from core.utils.horario import parsear_horario, turno_de
+
+
+class Command(BaseCommand):
+    help = "Interpreta OfertaMateria.horario y rellena turno y HorarioOferta (backfill)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--periodo', help="Código de periodo; por defecto todos")
+        parser.add_argument('--lote', type=int, default=1000, help="Ofertas por transacción")
+
+    def handle(self, *args, periodo=None, lote=1000, **options):
+        queryset = OfertaMateria.objects.order_by('id').only('id', 'horario', 'turno', 'periodo_id')
+        if periodo:
+            queryset = queryset.filter(periodo__codigo=periodo)
+
+        total = sin_horario = 0
+        ultimo_id = 0
+        periodos = set()
+        while True:
+            ofertas = list(queryset.filter(id__gt=ultimo_id)[:lote])
+            if not ofertas:
+                break
+            ultimo_id = ofertas[-1].id
+
+            bloques = []
+            for oferta in ofertas:
+                periodos.add(oferta.periodo_id)
+                parsed = parsear_horario(oferta.horario)
+                oferta.turno = turno_de(parsed)
+                sin_horario += not parsed
+                bloques.extend(
+                    HorarioOferta(oferta_id=oferta.id, dia=dia, inicio_min=inicio, fin_min=fin)
+                    for dia, inicio, fin in parsed
+                )
+
+            with transaction.atomic():
+                OfertaMateria.objects.bulk_update(ofertas, ['turno'])
+                HorarioOferta.objects.filter(oferta_id__in=[o.id for o in ofertas]).delete()
+                HorarioOferta.objects.bulk_create(bloques)
+            total += len(ofertas)
+
+        for periodo_id in periodos:
+            CatalogoService.invalidar(periodo_id)
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} ofertas sincronizadas ({sin_horario} sin horario reconocible)."
+        ))
@@ -0,0 +1,256 @@
+"""
+Revisa con EXPLAIN que las consultas que emiten los servicios y tareas
+usen los índices previstos.
+"""
+import json
+import re
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.inscripcion.models import (
+    Bloqueo, EstudianteCarrera, ListaEspera, OfertaMateria, PeriodoAcademico
+)
+
+# Por debajo de este tamaño recorrer la tabla no es un problema
+FILAS_MINIMAS = 100
+
+
+def _datos() -> dict:
+    """
+    Valores reales de la base para ejecutar los escenarios: un estudiante
+    sin bloqueos en el periodo activo, dos ofertas de su carrera con cupo y
+    una entrada de lista de espera. Faltan las claves que no se encontraron.
+    """
+    datos = {}
+    periodo = PeriodoAcademico.objects.filter(activo=True).first()
+    if periodo:
+        datos['periodo_id'] = periodo.id
+
+    ec = (
+        EstudianteCarrera.objects.filter(activa=True)
+        .exclude(id__in=Bloqueo.objects.filter(activo=True).values('estudiante_carrera_id'))
+        .select_related('estudiante', 'carrera').first()
+    )
+    if ec:
+        datos.update(
+            registro=ec.estudiante.registro, documento=ec.estudiante.documento_identidad,
+            codigo_carrera=ec.carrera.codigo,
+        )
+        if periodo:
+            # Una oferta por materia para no pedir dos grupos de la misma
+            por_materia = {}
+            for oferta_id, materia_carrera_id, maximo, actual in OfertaMateria.objects.filter(
+                periodo=periodo, materia_carrera__carrera_id=ec.carrera_id, cupo_por_tokens=False
+            ).values_list('id', 'materia_carrera_id', 'cupo_maximo', 'cupo_actual'):
+                if actual < maximo:
+                    por_materia.setdefault(materia_carrera_id, oferta_id)
+            if len(por_materia) >= 2:
+                datos['oferta_ids'] = sorted(por_materia.values())[:2]
+
+    entrada = ListaEspera.objects.filter(estado='ESPERANDO').first()
+    if entrada:
+        datos['entrada'] = entrada
+    return datos
+
+
+def _escenarios(datos: dict, escrituras: bool = False) -> list:
+    """
+    (nombre, claves de datos requeridas, función, índices esperados). Las
+    funciones llaman al código de los servicios y tareas tal como corre en
+    producción. Los escenarios de escritura modifican datos y solo deben
+    ejecutarse dentro de una transacción que se revierte.
+    """
+    from apps.inscripcion import tasks
+    from apps.inscripcion.services import (
+        BloqueoService, EstudianteService, InscripcionService, PeriodoAcademicoService
+    )
+    from apps.inscripcion.services.catalogo_service import CatalogoService
+    from apps.inscripcion.services.lista_espera_service import ListaEsperaService
+
+    d = datos.get
+    escenarios = [
+        ('bloqueos activos', ['registro'],
+         lambda: BloqueoService.tiene_bloqueos_activos(d('registro')), ['bloqueo_activo_idx']),
+        ('carreras del estudiante', ['registro'],
+         lambda: list(EstudianteService.get_carreras_estudiante(d('registro'))), ['estcarrera_activa_idx']),
+        ('registros por documento', ['documento'],
+         lambda: list(EstudianteService.get_all_by_documento(d('documento'))), ['estudiante_documento_idx']),
+        ('materias habilitadas', ['registro'],
+         lambda: InscripcionService.get_materias_habilitadas(d('registro')), ['mcs_habilitada_idx']),
+        ('periodo habilitado', [],
+         PeriodoAcademicoService.get_periodo_habilitado_inscripcion, ['periodo_habilitado_idx']),
+        ('inscripción actual', ['registro'],
+         lambda: InscripcionService.get_inscripcion_actual(d('registro')), ['periodo_activo_idx']),
+        ('catálogo del periodo', ['periodo_id'],
+         lambda: CatalogoService._filas(d('periodo_id')), ['oferta_periodo_materia_idx']),
+        ('posición en lista de espera', ['entrada'],
+         lambda: ListaEsperaService.posicion(d('entrada')), []),
+    ]
+    if escrituras:
+        escenarios += [
+            ('inscripción', ['registro', 'codigo_carrera', 'oferta_ids'],
+             lambda: tasks._aplicar_inscripcion(d('registro'), d('codigo_carrera'), d('oferta_ids'), 'Inscripción'),
+             ['bloqueo_activo_idx', 'oferta_por_tokens_idx']),
+            ('promoción de lista de espera', ['entrada'],
+             lambda: ListaEsperaService.promover(Counter({d('entrada').oferta_id: 1})),
+             ['listaespera_cola_idx', 'bloqueo_activo_idx']),
+            ('reservas vencidas', [],
+             tasks.barrer_reservas_expiradas, ['inscripcion_reserva_pend_idx', 'materiainscrita_reserva_idx']),
+        ]
+    return escenarios
+
+
+def _preparar_planificador() -> None:
+    """
+    Con tablas pequeñas PostgreSQL prefiere Seq Scan aunque exista un
+    índice; así solo aparece si no hay índice utilizable. Debe llamarse
+    dentro de una transacción.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+
+def _sentencias(funcion) -> list:
+    """
+    SELECT que emite `funcion`, con sus parámetros ya interpolados.
+    """
+    with CaptureQueriesContext(connection) as capturadas:
+        funcion()
+    return [
+        q['sql'] for q in capturadas.captured_queries
+        if q['sql'].lstrip().upper().startswith('SELECT') and ' FROM ' in q['sql'].upper()
+    ]
+
+
+def _plan(sql: str) -> str:
+    prefijo = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    with connection.cursor() as cursor:
+        cursor.execute(prefijo + sql)
+        return '\n'.join(str(fila[-1]) for fila in cursor.fetchall())
+
+
+def _indices_parciales() -> set:
+    """
+    Índices con WHERE: recorrerlos completos solo lee las filas del predicado.
+    """
+    if connection.vendor == 'postgresql':
+        consulta = "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND indexdef LIKE '% WHERE %'"
+    else:
+        consulta = "SELECT name FROM sqlite_master WHERE type = 'index' AND sql LIKE '% WHERE %'"
+    with connection.cursor() as cursor:
+        cursor.execute(consulta)
+        return {fila[0] for fila in cursor.fetchall()}
+
+
+def _recorridos_completos(sql: str, parciales: set) -> list:
+    """
+    Tablas que la consulta lee completas. Con enable_seqscan=off PostgreSQL
+    recorre un índice entero antes que la tabla, así que un Index Scan sin
+    condición sobre un índice no parcial también cuenta; en SQLite lo mismo
+    con "SCAN tabla USING INDEX".
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        def recorrer(nodo):
+            tipo = nodo['Node Type']
+            if tipo == 'Seq Scan':
+                yield nodo['Relation Name']
+            elif (tipo in ('Index Scan', 'Index Only Scan', 'Bitmap Index Scan')
+                  and 'Index Cond' not in nodo and nodo['Index Name'] not in parciales):
+                yield nodo.get('Relation Name', nodo['Index Name'])
+            for hijo in nodo.get('Plans', ()):
+                yield from recorrer(hijo)
+
+        return list(recorrer(plan[0]['Plan']))
+
+    # SQLite: "SEARCH ..." usa el índice para filtrar; "SCAN" lee todo salvo
+    # que recorra un índice parcial
+    return [
+        m.group(1) for m in re.finditer(r'SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?', _plan(sql))
+        if m.group(1) != 'CONSTANT' and m.group(2) not in parciales
+    ]
+
+
+def _filas_tabla(tabla: str):
+    """
+    Filas de la tabla, o None si el nombre es un alias del plan.
+    """
+    if tabla not in connection.introspection.table_names():
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(tabla)}')
+        return cursor.fetchone()[0]
+
+
+def revisar(funcion, indices: list, filas_minimas: int = FILAS_MINIMAS) -> tuple:
+    """
+    Ejecuta `funcion` y revisa el plan de cada SELECT que emitió. Devuelve
+    (planes, tablas recorridas completas, índices esperados sin usar). Las
+    tablas con menos de `filas_minimas` filas (carreras, periodos) pueden
+    recorrerse: el planificador las prefiere como lado externo de un join.
+    """
+    sentencias = _sentencias(funcion)
+    parciales = _indices_parciales()
+    planes = [(sql, _plan(sql)) for sql in sentencias]
+    recorridas = sorted({
+        t for sql in sentencias for t in _recorridos_completos(sql, parciales)
+        if (_filas_tabla(t) or filas_minimas) >= filas_minimas
+    })
+    sin_usar = [i for i in indices if not any(i in plan for _, plan in planes)]
+    return planes, recorridas, sin_usar
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta las consultas de los servicios y tareas, revisa su plan con EXPLAIN y falla si alguna "
+        "recorre una tabla completa o no usa el índice previsto."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--planes', action='store_true', help="Muestra el plan de cada consulta")
+        parser.add_argument(
+            '--filas-minimas', type=int, default=FILAS_MINIMAS,
+            help="No reporta recorridos de tablas con menos filas (por defecto %(default)s)"
+        )
+        parser.add_argument(
+            '--escrituras', action='store_true',
+            help="Incluye los escenarios que modifican datos (inscripción, lista de espera, barrido); "
+                 "se revierten al terminar"
+        )
+
+    def handle(self, *args, planes=False, escrituras=False, filas_minimas=FILAS_MINIMAS, **options):
+        fallas = []
+        with transaction.atomic():
+            _preparar_planificador()
+            datos = _datos()
+            for nombre, requeridos, funcion, indices in _escenarios(datos, escrituras):
+                faltantes = [r for r in requeridos if r not in datos]
+                if faltantes:
+                    self.stdout.write(self.style.WARNING(f"{nombre}: omitido, sin datos ({', '.join(faltantes)})"))
+                    continue
+
+                resultado, recorridas, sin_usar = revisar(funcion, indices, filas_minimas)
+                if planes:
+                    for sql, plan in resultado:
+                        self.stdout.write(f"-- {nombre}\n{sql}\n{plan}\n")
+                problemas = [f"recorre {', '.join(recorridas)}"] if recorridas else []
+                if sin_usar:
+                    problemas.append(f"no usa {', '.join(sin_usar)}")
+                if problemas:
+                    fallas.append(f"{nombre}: {'; '.join(problemas)}")
+                    self.stdout.write(self.style.ERROR(f"{nombre}: {'; '.join(problemas)}"))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"{nombre}: usa índices"))
+            transaction.set_rollback(True)
+
+        if fallas:
+            raise CommandError(f"{len(fallas)} escenarios sin índice: " + '; '.join(fallas))
@@ -0,0 +1,65 @@
+"""
+Agrupa las consultas a Informix de cada petición GraphQL en un solo envío.
+"""
+import logging
+
+from django.conf import settings
+from graphql import OperationType
+from graphql.execution.values import get_argument_values
+from graphql.language import FieldNode
+
+from .services import ExternalApiService
+
+logger = logging.getLogger(__name__)
+
+
+class LoteInformixMiddleware:
+    """
+    Abre el lote de consultas a Informix (ExternalApiService.lote) durante
+    cada petición.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.EXTERNAL_API_LOTE:
+            return self.get_response(request)
+        with ExternalApiService.lote():
+            return self.get_response(request)
+
+
+class AnticipoInformixMiddleware:
+    """
+    Middleware de graphene: al resolver el primer campo raíz de una consulta
+    registra las consultas a Informix de todos los campos raíz, así la
+    primera que se necesita las envía juntas.
+    """
+
+    def resolve(self, next, root, info, **args):
+        if root is None and info.path.prev is None and info.operation.operation == OperationType.QUERY:
+            operaciones = getattr(info.context, '_informix_anticipadas', None)
+            if operaciones is None:
+                operaciones = set()
+                setattr(info.context, '_informix_anticipadas', operaciones)
+            if id(info.operation) not in operaciones:
+                operaciones.add(id(info.operation))
+                self.anticipar(info)
+        return next(root, info, **args)
+
+    @staticmethod
+    def anticipar(info) -> None:
+        from .graphql.queries import consulta_informix, CONSULTAS_INFORMIX
+
+        for nodo in info.operation.selection_set.selections:
+            # @include/@skip y fragmentos se resuelven normalmente, sin anticipar
+            if not isinstance(nodo, FieldNode) or nodo.directives or nodo.name.value not in CONSULTAS_INFORMIX:
+                continue
+            try:
+                argumentos = get_argument_values(info.parent_type.fields[nodo.name.value], nodo, info.variable_values)
+                query, variables = consulta_informix(nodo.name.value, **argumentos)
+            except Exception as e:
+                # El resolver reporta el error al ejecutarse
+                logger.debug(f"No se anticipa {nodo.name.value}: {e}")
+                continue
+            ExternalApiService.anticipar(query, variables)
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.9 on 2026-10-18 13:06
+
+from django.db import migrations, models
+
+
+def ajustar_cupos_excedidos(apps, schema_editor):
+    OfertaMateria = apps.get_model('inscripcion', 'OfertaMateria')
+    OfertaMateria.objects.filter(cupo_actual__gt=models.F('cupo_maximo')).update(
+        cupo_actual=models.F('cupo_maximo')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inscripcion', '0006_matselec'),
+    ]
+
+    operations = [
+        migrations.RunPython(ajustar_cupos_excedidos, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ofertamateria',
+            constraint=models.CheckConstraint(check=models.Q(('cupo_actual__lte', models.F('cupo_maximo'))), name='oferta_cupo_actual_lte_maximo'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.9 on 2026-10-18 13:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inscripcion', '0007_ofertamateria_cupo_check'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ofertamateria',
+            name='cupo_por_tokens',
+            field=models.BooleanField(default=False, verbose_name='Cupo por Tokens'),
+        ),
+        migrations.CreateModel(
+            name='CupoToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.IntegerField(verbose_name='Número de Cupo')),
+                ('ocupado', models.BooleanField(default=False, verbose_name='Ocupado')),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+                ('oferta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to='inscripcion.ofertamateria')),
+            ],
+            options={
+                'verbose_name': 'Token de Cupo',
+                'verbose_name_plural': 'Tokens de Cupo',
+                'indexes': [models.Index(condition=models.Q(('ocupado', False)), fields=['oferta'], name='cupotoken_libre_idx')],
+                'unique_together': {('oferta', 'numero')},
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.9 on 2026-10-18 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inscripcion', '0008_cupotoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inscripcion',
+            name='reserva_expira_en',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Reserva Expira En'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(condition=models.Q(('estado', 'PENDIENTE_PAGO')), fields=['reserva_expira_en'], name='inscripcion_reserva_pend_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.9 on 2026-10-18 13:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inscripcion', '0009_inscripcion_reserva_expira_en'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListaEspera',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('ESPERANDO', 'Esperando'), ('PROMOVIDA', 'Promovida'), ('CANCELADA', 'Cancelada')], default='ESPERANDO', max_length=20)),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+                ('promovida_en', models.DateTimeField(blank=True, null=True, verbose_name='Promovida En')),
+                ('estudiante_carrera', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='listas_espera', to='inscripcion.estudiantecarrera')),
+                ('oferta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lista_espera', to='inscripcion.ofertamateria')),
+            ],
+            options={
+                'verbose_name': 'Lista de Espera',
+                'verbose_name_plural': 'Listas de Espera',
+                'ordering': ['oferta', 'id'],
+                'indexes': [models.Index(condition=models.Q(('estado', 'ESPERANDO')), fields=['oferta', 'id'], name='listaespera_cola_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='listaespera',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado', 'ESPERANDO')), fields=('oferta', 'estudiante_carrera'), name='listaespera_unica_esperando'),
+        ),
+    ]
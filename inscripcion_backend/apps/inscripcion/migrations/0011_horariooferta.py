@@ -0,0 +1,35 @@
+# Generated by Django 4.2.9 on 2026-10-18 13:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inscripcion', '0010_listaespera'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ofertamateria',
+            name='turno',
+            field=models.CharField(blank=True, choices=[('MANANA', 'Mañana'), ('TARDE', 'Tarde'), ('NOCHE', 'Noche')], db_index=True, max_length=10, null=True, verbose_name='Turno'),
+        ),
+        migrations.CreateModel(
+            name='HorarioOferta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.PositiveSmallIntegerField(choices=[(1, 'Lunes'), (2, 'Martes'), (3, 'Miércoles'), (4, 'Jueves'), (5, 'Viernes'), (6, 'Sábado'), (7, 'Domingo')], verbose_name='Día')),
+                ('inicio_min', models.PositiveSmallIntegerField(verbose_name='Inicio (minutos)')),
+                ('fin_min', models.PositiveSmallIntegerField(verbose_name='Fin (minutos)')),
+                ('oferta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bloques', to='inscripcion.ofertamateria')),
+            ],
+            options={
+                'verbose_name': 'Horario de Oferta',
+                'verbose_name_plural': 'Horarios de Ofertas',
+                'ordering': ['oferta', 'dia', 'inicio_min'],
+                'indexes': [models.Index(fields=['dia', 'inicio_min'], name='horariooferta_dia_inicio_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+# Misma expresión que genera icontains en PostgreSQL: UPPER(columna::text).
+# Incluye todas las columnas de search_fields del admin de cada tabla: un OR
+# con una sola columna sin índice vuelve a recorrer la tabla entera.
+INDICES = [
+    ('inscripcion_ofertamateria', 'docente'),
+    ('inscripcion_materia', 'codigo'),
+    ('inscripcion_materia', 'nombre'),
+    ('inscripcion_estudiante', 'registro'),
+    ('inscripcion_estudiante', 'nombre'),
+    ('inscripcion_estudiante', 'apellido_paterno'),
+    ('inscripcion_estudiante', 'apellido_materno'),
+    ('inscripcion_estudiante', 'email'),
+]
+
+
+def crear_indices(apps, schema_editor):
+    # Solo PostgreSQL: en SQLite la búsqueda sigue con LIKE sin índice
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for tabla, columna in INDICES:
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {tabla}_{columna}_trgm '
+            f'ON {tabla} USING gin ((UPPER({columna}::text)) gin_trgm_ops)'
+        )
+
+
+def eliminar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for tabla, columna in INDICES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {tabla}_{columna}_trgm')
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY no puede ir dentro de una transacción
+    atomic = False
+
+    dependencies = [
+        ('inscripcion', '0011_horariooferta'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, eliminar_indices),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.9 on 2026-10-18 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inscripcion', '0012_indices_trigramas'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bloqueo',
+            index=models.Index(condition=models.Q(('activo', True), ('resuelto', False)), fields=['estudiante_carrera'], name='bloqueo_activo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='estudiante',
+            index=models.Index(fields=['documento_identidad'], name='estudiante_documento_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='estudiantecarrera',
+            index=models.Index(condition=models.Q(('activa', True)), fields=['estudiante'], name='estcarrera_activa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(fields=['periodo_academico', 'estado'], name='inscripcion_periodo_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='materiacarrerasemestre',
+            index=models.Index(condition=models.Q(('habilitada', True)), fields=['carrera', 'plan_estudios', 'semestre'], name='mcs_habilitada_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ofertamateria',
+            index=models.Index(fields=['periodo', 'materia_carrera'], name='oferta_periodo_materia_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='periodoacademico',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['-fecha_inicio'], name='periodo_activo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='periodoacademico',
+            index=models.Index(condition=models.Q(('activo', True), ('inscripciones_habilitadas', True)), fields=['-fecha_inicio'], name='periodo_habilitado_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.9 on 2026-10-18 13:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inscripcion', '0013_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inscripcionmateria',
+            name='reserva_expira_en',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Reserva Expira En'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcionmateria',
+            index=models.Index(condition=models.Q(('reserva_expira_en__isnull', False)), fields=['reserva_expira_en'], name='materiainscrita_reserva_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.9 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inscripcion', '0014_inscripcionmateria_reserva_expira_en'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='bloqueo',
+            name='bloqueo_activo_idx',
+        ),
+        migrations.AddIndex(
+            model_name='bloqueo',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['estudiante_carrera'], name='bloqueo_activo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ofertamateria',
+            index=models.Index(condition=models.Q(('cupo_por_tokens', True)), fields=['id'], name='oferta_por_tokens_idx'),
+        ),
+    ]
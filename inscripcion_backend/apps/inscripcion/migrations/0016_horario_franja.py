@@ -0,0 +1,17 @@
+# Generated by Django 4.2.9 on 2026-10-18 14:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inscripcion', '0015_indices_consultas_reales'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='horariooferta',
+            index=models.Index(fields=['inicio_min', 'fin_min'], name='horariooferta_franja_idx'),
+        ),
+    ]
@@ -18,7 +18,7 @@ from .periodo import PeriodoAcademico
 from .bloqueo import Bloqueo
 
 # Inscripciones y Oferta de Materias
-from .inscripcion import OfertaMateria, Inscripcion, InscripcionMateria
+from .inscripcion import OfertaMateria, HorarioOferta, CupoToken, ListaEspera, Inscripcion, InscripcionMateria
 
 # Boletas y Pagos
 from .boleta import ConceptoPago, Boleta, DetalleBoleta
@@ -42,6 +42,9 @@ __all__ = [
     'Bloqueo',
     # Inscripcion
     'OfertaMateria',
+    'HorarioOferta',
+    'CupoToken',
+    'ListaEspera',
     'Inscripcion',
     'InscripcionMateria',
     # Boleta
@@ -26,6 +26,15 @@ class Bloqueo(models.Model):
         verbose_name = "Bloqueo"
         verbose_name_plural = "Bloqueos"
         ordering = ['-fecha_bloqueo']
+        indexes = [
+            # Mismo predicado que las consultas de tareas y lista de espera
+            # (activo=True); también sirve a las que agregan resuelto=False
+            models.Index(
+                fields=['estudiante_carrera'],
+                condition=models.Q(activo=True),
+                name='bloqueo_activo_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Bloqueo {self.tipo} - {self.estudiante_carrera.estudiante.registro} ({self.estudiante_carrera.carrera.codigo})"
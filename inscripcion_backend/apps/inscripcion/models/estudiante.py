@@ -22,6 +22,9 @@ class Estudiante(models.Model):
         verbose_name = "Estudiante"
         verbose_name_plural = "Estudiantes"
         ordering = ['apellido_paterno', 'apellido_materno', 'nombre']
+        indexes = [
+            models.Index(fields=['documento_identidad'], name='estudiante_documento_idx'),
+        ]
 
     def __str__(self):
         return f"{self.registro} - {self.nombre} {self.apellido_paterno}"
@@ -55,6 +58,9 @@ class EstudianteCarrera(models.Model):
     class Meta:
         verbose_name = "Carrera de Estudiante"
         verbose_name_plural = "Carreras de Estudiante"
+        indexes = [
+            models.Index(fields=['estudiante'], condition=models.Q(activa=True), name='estcarrera_activa_idx'),
+        ]
 
     def __str__(self):
         return f"{self.estudiante.registro} - {self.carrera.nombre}"
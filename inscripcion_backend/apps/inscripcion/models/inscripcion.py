@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import models, transaction
 
+from core.utils.horario import parsear_horario, turno_de
 from .materia import Materia, MateriaCarreraSemestre
 from .periodo import PeriodoAcademico
 from .estudiante import EstudianteCarrera
@@ -7,23 +8,166 @@ from .estudiante import EstudianteCarrera
 
 class OfertaMateria(models.Model):
     """Ofertas de Materias"""
+    TURNO_CHOICES = [
+        ('MANANA', 'Mañana'),
+        ('TARDE', 'Tarde'),
+        ('NOCHE', 'Noche'),
+    ]
+
     materia_carrera = models.ForeignKey(MateriaCarreraSemestre, on_delete=models.CASCADE, related_name='ofertas')
     periodo = models.ForeignKey(PeriodoAcademico, on_delete=models.CASCADE, related_name='ofertas')
     grupo = models.CharField(max_length=5, verbose_name="Grupo")
     docente = models.CharField(max_length=100, verbose_name="Docente", default="Por designar")
     horario = models.CharField(max_length=100, verbose_name="Horario", default="HORARIO A CONFIRMAR")
+    # Derivado de horario al guardar; ver sincronizar_horarios para datos previos
+    turno = models.CharField(max_length=10, choices=TURNO_CHOICES, null=True, blank=True, db_index=True, verbose_name="Turno")
     cupo_maximo = models.IntegerField(default=40, verbose_name="Cupo Máximo")
     cupo_actual = models.IntegerField(default=0, verbose_name="Cupo Actual")
+    cupo_por_tokens = models.BooleanField(default=False, verbose_name="Cupo por Tokens")
 
     class Meta:
         verbose_name = "Oferta de Materia"
         verbose_name_plural = "Ofertas de Materias"
         unique_together = ['materia_carrera', 'periodo', 'grupo']
         ordering = ['materia_carrera__materia__codigo', 'grupo']
+        indexes = [
+            models.Index(fields=['periodo', 'materia_carrera'], name='oferta_periodo_materia_idx'),
+            # Pocas ofertas en modo tokens; CupoTokenService.ofertas_por_tokens las lista en cada reserva
+            models.Index(fields=['id'], condition=models.Q(cupo_por_tokens=True), name='oferta_por_tokens_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(cupo_actual__lte=models.F('cupo_maximo')),
+                name='oferta_cupo_actual_lte_maximo',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.materia_carrera.materia.codigo} - Gr. {self.grupo} ({self.periodo.codigo})"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        cambia_horario = update_fields is None or 'horario' in update_fields
+        if cambia_horario:
+            bloques = parsear_horario(self.horario)
+            self.turno = turno_de(bloques)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'turno'}
+        super().save(*args, **kwargs)
+        if cambia_horario:
+            self.bloques.all().delete()
+            HorarioOferta.objects.bulk_create([
+                HorarioOferta(oferta=self, dia=dia, inicio_min=inicio, fin_min=fin)
+                for dia, inicio, fin in bloques
+            ])
+        # Los cupos se leen al momento, no forman parte del catálogo
+        if update_fields is None or set(update_fields) - {'cupo_actual', 'cupo_maximo'}:
+            self._invalidar_catalogo()
+        if update_fields is None or 'cupo_maximo' in update_fields:
+            self._actualizar_maximo_redis()
+
+    def delete(self, *args, **kwargs):
+        resultado = super().delete(*args, **kwargs)
+        self._invalidar_catalogo()
+        return resultado
+
+    def _invalidar_catalogo(self):
+        from ..services.catalogo_service import CatalogoService
+
+        periodo_id = self.periodo_id
+        transaction.on_commit(lambda: CatalogoService.invalidar(periodo_id))
+
+    def _actualizar_maximo_redis(self):
+        from ..services.cupo_redis_service import CupoRedisService
+
+        if CupoRedisService.habilitado():
+            oferta_id, maximo = self.id, self.cupo_maximo
+            transaction.on_commit(lambda: CupoRedisService.actualizar_maximo(oferta_id, maximo))
+
+
+class HorarioOferta(models.Model):
+    """Bloques de horario de una oferta"""
+    DIA_CHOICES = [
+        (1, 'Lunes'),
+        (2, 'Martes'),
+        (3, 'Miércoles'),
+        (4, 'Jueves'),
+        (5, 'Viernes'),
+        (6, 'Sábado'),
+        (7, 'Domingo'),
+    ]
+
+    oferta = models.ForeignKey(OfertaMateria, on_delete=models.CASCADE, related_name='bloques')
+    dia = models.PositiveSmallIntegerField(choices=DIA_CHOICES, verbose_name="Día")
+    inicio_min = models.PositiveSmallIntegerField(verbose_name="Inicio (minutos)")
+    fin_min = models.PositiveSmallIntegerField(verbose_name="Fin (minutos)")
+
+    class Meta:
+        verbose_name = "Horario de Oferta"
+        verbose_name_plural = "Horarios de Ofertas"
+        ordering = ['oferta', 'dia', 'inicio_min']
+        indexes = [
+            models.Index(fields=['dia', 'inicio_min'], name='horariooferta_dia_inicio_idx'),
+            # Filtro por turno: bloques que se cruzan con la franja
+            models.Index(fields=['inicio_min', 'fin_min'], name='horariooferta_franja_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_dia_display()} {self.inicio_min // 60:02d}:{self.inicio_min % 60:02d}-{self.fin_min // 60:02d}:{self.fin_min % 60:02d}"
+
+
+class CupoToken(models.Model):
+    """Cupos materializados de ofertas con alta demanda"""
+    oferta = models.ForeignKey(OfertaMateria, on_delete=models.CASCADE, related_name='tokens')
+    numero = models.IntegerField(verbose_name="Número de Cupo")
+    ocupado = models.BooleanField(default=False, verbose_name="Ocupado")
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Token de Cupo"
+        verbose_name_plural = "Tokens de Cupo"
+        unique_together = ['oferta', 'numero']
+        indexes = [
+            models.Index(fields=['oferta'], condition=models.Q(ocupado=False), name='cupotoken_libre_idx'),
+        ]
+
+    def __str__(self):
+        return f"Cupo {self.numero} de oferta {self.oferta_id} ({'ocupado' if self.ocupado else 'libre'})"
+
+
+class ListaEspera(models.Model):
+    """Lista de espera de ofertas sin cupo"""
+    ESTADO_CHOICES = [
+        ('ESPERANDO', 'Esperando'),
+        ('PROMOVIDA', 'Promovida'),
+        ('CANCELADA', 'Cancelada'),
+    ]
+
+    oferta = models.ForeignKey(OfertaMateria, on_delete=models.CASCADE, related_name='lista_espera')
+    estudiante_carrera = models.ForeignKey(EstudianteCarrera, on_delete=models.CASCADE, related_name='listas_espera')
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='ESPERANDO')
+    creado_en = models.DateTimeField(auto_now_add=True)
+    promovida_en = models.DateTimeField(null=True, blank=True, verbose_name="Promovida En")
+
+    class Meta:
+        verbose_name = "Lista de Espera"
+        verbose_name_plural = "Listas de Espera"
+        # El orden de llegada es el id: la posición no depende del reloj
+        ordering = ['oferta', 'id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['oferta', 'estudiante_carrera'],
+                condition=models.Q(estado='ESPERANDO'),
+                name='listaespera_unica_esperando',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['oferta', 'id'], condition=models.Q(estado='ESPERANDO'), name='listaespera_cola_idx'),
+        ]
+
+    def __str__(self):
+        return f"Espera {self.estudiante_carrera_id} en oferta {self.oferta_id} ({self.estado})"
+
 
 class Inscripcion(models.Model):
     """Inscripciones"""
@@ -38,6 +182,7 @@ class Inscripcion(models.Model):
     periodo_academico = models.ForeignKey(PeriodoAcademico, on_delete=models.CASCADE, related_name='inscripciones')
     fecha_inscripcion_asignada = models.DateField(verbose_name="Fecha de Inscripción Asignada")
     fecha_inscripcion_realizada = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Inscripción Realizada")
+    reserva_expira_en = models.DateTimeField(null=True, blank=True, verbose_name="Reserva Expira En")
     estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='PENDIENTE')
     bloqueado = models.BooleanField(default=False, verbose_name="Estado de Bloqueo")
     motivo_bloqueo = models.TextField(blank=True, verbose_name="Motivo del Bloqueo")
@@ -49,6 +194,14 @@ class Inscripcion(models.Model):
         verbose_name_plural = "Inscripciones"
         unique_together = ['estudiante_carrera', 'periodo_academico']
         ordering = ['-fecha_inscripcion_asignada']
+        indexes = [
+            models.Index(fields=['periodo_academico', 'estado'], name='inscripcion_periodo_estado_idx'),
+            models.Index(
+                fields=['reserva_expira_en'],
+                condition=models.Q(estado='PENDIENTE_PAGO'),
+                name='inscripcion_reserva_pend_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Inscripción {self.estudiante_carrera.estudiante.registro} - {self.estudiante_carrera.carrera.codigo} - {self.periodo_academico.codigo}"
@@ -61,11 +214,20 @@ class InscripcionMateria(models.Model):
     # Campo legacy mantenido por compatibilidad con datos existentes. No usar en código nuevo.
     materia = models.ForeignKey(Materia, on_delete=models.CASCADE, related_name='inscripciones_directas', null=True, blank=True)
     grupo = models.CharField(max_length=5, verbose_name="Grupo", default="A", blank=True)
+    # Solo para materias promovidas desde la lista de espera a una inscripción ya pagada
+    reserva_expira_en = models.DateTimeField(null=True, blank=True, verbose_name="Reserva Expira En")
 
     class Meta:
         verbose_name = "Materia Inscrita"
         verbose_name_plural = "Materias Inscritas"
         unique_together = ['inscripcion', 'oferta']
+        indexes = [
+            models.Index(
+                fields=['reserva_expira_en'],
+                condition=models.Q(reserva_expira_en__isnull=False),
+                name='materiainscrita_reserva_idx',
+            ),
+        ]
 
     def __str__(self):
         if self.oferta:
@@ -41,6 +41,13 @@ class MateriaCarreraSemestre(models.Model):
         verbose_name_plural = "Materias por Carrera y Semestre"
         unique_together = ['carrera', 'plan_estudios', 'materia', 'semestre']
         ordering = ['semestre', 'materia__codigo']
+        indexes = [
+            models.Index(
+                fields=['carrera', 'plan_estudios', 'semestre'],
+                condition=models.Q(habilitada=True),
+                name='mcs_habilitada_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.materia.codigo} - Sem {self.semestre} ({self.carrera.codigo})"
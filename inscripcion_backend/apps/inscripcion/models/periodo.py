@@ -22,6 +22,14 @@ class PeriodoAcademico(models.Model):
         verbose_name = "Periodo Académico"
         verbose_name_plural = "Periodos Académicos"
         ordering = ['-fecha_inicio']
+        indexes = [
+            models.Index(fields=['-fecha_inicio'], condition=models.Q(activo=True), name='periodo_activo_idx'),
+            models.Index(
+                fields=['-fecha_inicio'],
+                condition=models.Q(activo=True, inscripciones_habilitadas=True),
+                name='periodo_habilitado_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.codigo} - {self.nombre}"
@@ -0,0 +1,64 @@
+"""
+Enrutamiento de tareas de Celery por partición de carrera.
+"""
+import zlib
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+TAREA_INSCRIPCION = 'apps.inscripcion.tasks.procesar_inscripcion_asincrona'
+TAREA_LOTE = 'apps.inscripcion.tasks.procesar_lote_inscripciones'
+
+
+def particion_carrera(codigo_carrera) -> int:
+    """
+    Partición estable (crc32) de una carrera.
+    """
+    return zlib.crc32(str(codigo_carrera).encode('utf-8')) % settings.INSCRIPCION_PARTICIONES
+
+
+def cola_inscripcion(codigo_carrera) -> str:
+    """
+    Cola de inscripción de una carrera.
+    """
+    return f'inscripcion.{particion_carrera(codigo_carrera)}'
+
+
+def colas_inscripcion() -> list:
+    """
+    Todas las colas de inscripción, para lanzar workers.
+    """
+    return [f'inscripcion.{n}' for n in range(settings.INSCRIPCION_PARTICIONES)]
+
+
+def verificar_colas_worker(colas) -> None:
+    """
+    Falla al iniciar un worker que consume colas de particiones que no
+    existen: su -Q no coincide con INSCRIPCION_PARTICIONES.
+    """
+    validas = set(colas_inscripcion())
+    sobrantes = sorted(c for c in colas if c.startswith('inscripcion.') and c not in validas)
+    if sobrantes:
+        raise ImproperlyConfigured(
+            f"El worker consume {', '.join(sobrantes)} pero INSCRIPCION_PARTICIONES="
+            f"{settings.INSCRIPCION_PARTICIONES}; genera -Q con 'python manage.py colas_inscripcion'."
+        )
+
+
+def enrutar_tareas(name, args, kwargs, options, task=None, **kw):
+    """
+    Router de Celery: las inscripciones van a la cola de su carrera y el
+    resto de tareas a la cola por defecto.
+    """
+    if name == TAREA_LOTE:
+        particion = (kwargs or {}).get('particion', args[0] if args else None)
+        return None if particion is None else {'queue': f'inscripcion.{particion}'}
+
+    if name != TAREA_INSCRIPCION:
+        return None
+
+    codigo_carrera = (kwargs or {}).get('codigo_carrera')
+    if codigo_carrera is None and args and len(args) > 1:
+        codigo_carrera = args[1]
+    if codigo_carrera is None:
+        return None
+    return {'queue': cola_inscripcion(codigo_carrera)}
@@ -8,6 +8,12 @@ from .periodo_service import PeriodoAcademicoService
 from .bloqueo_service import BloqueoService
 from .panel_service import PanelService
 from .external_api_service import ExternalApiService
+from .cupo_service import CupoService
+from .solicitud_service import SolicitudInscripcionService
+from .estado_solicitud_service import EstadoSolicitudService
+from .admision_service import AdmisionService
+from .conflicto_horario_service import ConflictoHorarioService
+from .generador_horario_service import GeneradorHorarioService
 
 __all__ = [
     'EstudianteService',
@@ -17,4 +23,10 @@ __all__ = [
     'BloqueoService',
     'PanelService',
     'ExternalApiService',
+    'CupoService',
+    'SolicitudInscripcionService',
+    'EstadoSolicitudService',
+    'AdmisionService',
+    'ConflictoHorarioService',
+    'GeneradorHorarioService',
 ]
@@ -0,0 +1,230 @@
+"""
+Sala de espera: admisión por turno asignado antes de inscribir.
+"""
+import logging
+import math
+import re
+import time
+import uuid
+from datetime import date, datetime, time as dtime
+from typing import Any, Dict, Optional, Tuple
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils import timezone
+from ..models import Inscripcion
+from .external_api_service import ExternalApiService
+
+logger = logging.getLogger(__name__)
+
+# "08:00", "8:30:00", "14h15"
+_HORA = re.compile(r'(\d{1,2})\s*[:h.]\s*(\d{2})')
+_FORMATOS_DIA = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y')
+
+
+class AdmisionService:
+    """Fichas de admisión firmadas y ritmo de ingreso por turno."""
+
+    SALT = 'inscripcion.admision'
+    PREFIJO_TURNO = 'admision:turno:'
+    PREFIJO_FILA = 'admision:fila:'
+    PREFIJO_FICHA = 'admision:ficha:'
+    TURNO_GENERAL = 'general'
+
+    @staticmethod
+    def habilitada() -> bool:
+        """
+        Sala de espera activa.
+        """
+        return getattr(settings, 'ADMISION_HABILITADA', False)
+
+    @staticmethod
+    def _horario_asignado(registro: str, codigo_carrera: str, codigo_periodo: str) -> Optional[Tuple[str, str]]:
+        """
+        (diaIns, horaIns) de Informix para la carrera del estudiante en el
+        periodo, o None si no se pudo obtener.
+        """
+        from ..graphql.queries import consulta_informix
+
+        sem, _, ano = codigo_periodo.partition('/')
+        try:
+            query, variables = consulta_informix('listarCarreras', registro=int(registro), sem=sem, ano=int(ano))
+        except ValueError:
+            return None
+        carreras = (ExternalApiService.query(query, variables) or {}).get('listarCarreras') or []
+        nro_serie = next((c.get('nroSerie') for c in carreras if str(c.get('carrera')) == codigo_carrera), None)
+        if nro_serie is None:
+            return None
+
+        query, variables = consulta_informix('matIns', nroSerie=nro_serie)
+        horario = (ExternalApiService.query(query, variables) or {}).get('matIns')
+        if not horario:
+            return None
+        return horario.get('diaIns') or '', horario.get('horaIns') or ''
+
+    @staticmethod
+    def _inicio(fecha_asignada: date, dia: str, hora: str) -> datetime:
+        """
+        Inicio del turno: el día de diaIns si es una fecha (si no, la fecha
+        asignada) a la hora de horaIns (si no se entiende, a medianoche).
+        """
+        for formato in _FORMATOS_DIA:
+            try:
+                fecha_asignada = datetime.strptime(dia.strip(), formato).date()
+                break
+            except ValueError:
+                continue
+        m = _HORA.search(hora)
+        hora_inicio = dtime(int(m.group(1)), int(m.group(2))) if m and int(m.group(1)) < 24 and int(m.group(2)) < 60 else dtime.min
+        return timezone.make_aware(datetime.combine(fecha_asignada, hora_inicio))
+
+    @staticmethod
+    def turno(registro: str, codigo_carrera: str) -> Tuple[str, Optional[datetime]]:
+        """
+        Turno del estudiante como (clave, inicio). El inicio es el día y la
+        hora asignados en Informix (matIns) y, si Informix no responde,
+        fecha_inscripcion_asignada del periodo activo a medianoche. Solo se
+        guarda en caché el turno obtenido de Informix (o la ausencia de
+        inscripción), para que la sala de espera no consulte en cada intento.
+        """
+        clave = f'{AdmisionService.PREFIJO_TURNO}{codigo_carrera}:{registro}'
+        inicio = cache.get(clave)
+        if inicio is None:
+            fila = Inscripcion.objects.filter(
+                estudiante_carrera__estudiante__registro=registro,
+                estudiante_carrera__carrera__codigo=codigo_carrera,
+                periodo_academico__activo=True,
+            ).values_list('fecha_inscripcion_asignada', 'periodo_academico__codigo').first()
+            horario = AdmisionService._horario_asignado(registro, codigo_carrera, fila[1]) if fila else None
+            # Cadena vacía y no None, para que la caché también guarde la ausencia
+            inicio = AdmisionService._inicio(fila[0], *(horario or ('', ''))).isoformat() if fila else ''
+            if horario or not fila:
+                cache.set(clave, inicio, settings.ADMISION_CACHE_TURNO)
+            else:
+                logger.warning(f"Sin horario de Informix para {registro} ({codigo_carrera}); turno desde la fecha asignada")
+
+        if not inicio:
+            return AdmisionService.TURNO_GENERAL, None
+        return inicio, datetime.fromisoformat(inicio)
+
+    @staticmethod
+    def _incrementar(clave: str, ttl: int) -> int:
+        cache.add(clave, 0, ttl)
+        try:
+            return cache.incr(clave)
+        except ValueError:
+            # La clave expiró entre add() e incr()
+            cache.add(clave, 1, ttl)
+            return 1
+
+    @staticmethod
+    def _posicion(turno: str, registro: str, codigo_carrera: str) -> int:
+        """
+        Fila ordenada por turno. Cada estudiante toma un número del contador
+        del turno al llegar y lo conserva en sus reintentos; la fila atiende
+        ADMISION_TASA números por segundo. Devuelve cuántos números faltan
+        atender antes del suyo (0 si ya le toca).
+        """
+        ttl = settings.ADMISION_FILA_TTL
+        tasa = settings.ADMISION_TASA
+        base = f'{AdmisionService.PREFIJO_FILA}{turno}'
+        clave_numero = f'{base}:{codigo_carrera}:{registro}'
+        clave_apertura = f'{base}:apertura'
+        ahora = time.time()
+
+        numero = cache.get(clave_numero)
+        nuevo = numero is None
+        if nuevo:
+            numero = AdmisionService._incrementar(f'{base}:contador', ttl)
+            if not cache.add(clave_numero, numero, ttl):
+                # Otro intento simultáneo del mismo estudiante ya tomó número
+                numero = cache.get(clave_numero, numero)
+        cache.add(clave_apertura, ahora, ttl)
+        apertura = cache.get(clave_apertura, ahora)
+
+        atendidos = tasa + int((ahora - apertura) * tasa)
+        if nuevo and atendidos > numero - 1 + tasa:
+            # Fila vacía: se reabre en este número para que el tiempo sin
+            # llegadas no se acumule como capacidad para la próxima ráfaga
+            cache.set(clave_apertura, ahora - (numero - 1) / tasa, ttl)
+            return 0
+        return max(0, numero - atendidos)
+
+    @staticmethod
+    def solicitar(registro: str, codigo_carrera: str) -> Dict[str, Any]:
+        """
+        Intenta admitir al estudiante. Devuelve la ficha firmada o la
+        posición en la fila y los segundos a esperar.
+        """
+        turno, inicio = AdmisionService.turno(registro, codigo_carrera)
+
+        ahora = timezone.now()
+        if inicio and ahora < inicio:
+            return {
+                'admitido': False,
+                'ficha': None,
+                'posicion': None,
+                'reintentar_en': math.ceil((inicio - ahora).total_seconds()),
+                'mensaje': f"Tu turno de inscripción comienza el {timezone.localtime(inicio):%d/%m/%Y %H:%M}.",
+            }
+
+        posicion = AdmisionService._posicion(turno, registro, codigo_carrera)
+        if posicion:
+            return {
+                'admitido': False,
+                'ficha': None,
+                'posicion': posicion,
+                'reintentar_en': max(1, math.ceil(posicion / settings.ADMISION_TASA)),
+                'mensaje': f"Hay mucha demanda. Estás en la posición {posicion} de la fila.",
+            }
+
+        ficha = signing.TimestampSigner(salt=AdmisionService.SALT).sign_object(
+            {'r': registro, 'c': codigo_carrera, 't': turno, 'n': uuid.uuid4().hex}
+        )
+        return {
+            'admitido': True,
+            'ficha': ficha,
+            'posicion': 0,
+            'reintentar_en': 0,
+            'mensaje': "Puedes inscribirte.",
+        }
+
+    @staticmethod
+    def _datos(ficha: Optional[str], registro: str, codigo_carrera: str, max_age: Optional[int]) -> Optional[dict]:
+        """
+        Contenido de una ficha firmada para ese estudiante y carrera.
+        """
+        if not ficha:
+            return None
+        try:
+            datos = signing.TimestampSigner(salt=AdmisionService.SALT).unsign_object(ficha, max_age=max_age)
+        except signing.BadSignature:
+            return None
+        if datos.get('r') != registro or datos.get('c') != codigo_carrera or not datos.get('n'):
+            return None
+        return datos
+
+    @staticmethod
+    def usar(ficha: Optional[str], registro: str, codigo_carrera: str, solicitud: str) -> bool:
+        """
+        Ficha firmada, vigente y emitida para ese estudiante y carrera, que
+        queda ligada a una sola solicitud (su clave de idempotencia): los
+        reintentos de esa solicitud la aceptan y cualquier otra la rechaza.
+        """
+        datos = AdmisionService._datos(ficha, registro, codigo_carrera, settings.ADMISION_VIGENCIA)
+        if datos is None:
+            return False
+        clave = f"{AdmisionService.PREFIJO_FICHA}{datos['n']}"
+        # Dura lo mismo que la solicitud, para que la tarea pueda comprobarla
+        ttl = max(settings.ADMISION_VIGENCIA, settings.INSCRIPCION_IDEMPOTENCIA_TTL)
+        return cache.add(clave, solicitud, ttl) or cache.get(clave) == solicitud
+
+    @staticmethod
+    def usada(ficha: Optional[str], registro: str, codigo_carrera: str) -> bool:
+        """
+        Ficha firmada para ese estudiante y carrera y ya ligada a una
+        solicitud con usar(). La comprueba la tarea; la vigencia ya se
+        validó al recibir la solicitud.
+        """
+        datos = AdmisionService._datos(ficha, registro, codigo_carrera, None)
+        return datos is not None and cache.get(f"{AdmisionService.PREFIJO_FICHA}{datos['n']}") is not None
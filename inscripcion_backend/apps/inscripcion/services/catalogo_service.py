@@ -0,0 +1,180 @@
+"""
+Generación del catálogo de ofertas por periodo para las claves de caché.
+"""
+import time
+from typing import Dict, List, Optional, Tuple
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from core.utils.cache import obtener_o_calcular
+from core.utils.serializacion import a_json
+
+
+class CatalogoService:
+    """
+    Contador por periodo que cambia con cada escritura de OfertaMateria.
+    Las claves de caché que lo incluyen quedan obsoletas sin borrarlas.
+    """
+
+    PREFIJO = 'ofertas_generacion:'
+    PREFIJO_INSTANTANEA = 'ofertas_catalogo_filas:'
+    PREFIJO_JSON = 'ofertas_catalogo_json:'
+    TIMEOUT = 3600
+
+    # Última instantánea de cada periodo en este proceso: (generación, ofertas)
+    _instantaneas: Dict[int, Tuple[int, dict]] = {}
+    # Catálogos ya serializados: (periodo, carrera, plan) -> (generación, bytes)
+    _serializados: Dict[Tuple[int, int, Optional[int]], Tuple[int, bytes]] = {}
+
+    @staticmethod
+    def generacion(periodo_id: int) -> int:
+        """
+        Generación actual del catálogo del periodo.
+        """
+        # Se inicia con el reloj: si Redis desaloja el contador no se
+        # reutiliza una generación anterior
+        return cache.get_or_set(f'{CatalogoService.PREFIJO}{periodo_id}', time.time_ns, None)
+
+    @staticmethod
+    def invalidar(periodo_id: int) -> None:
+        """
+        Avanza la generación del periodo.
+        """
+        clave = f'{CatalogoService.PREFIJO}{periodo_id}'
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.set(clave, time.time_ns(), None)
+
+    @staticmethod
+    def _modelos() -> tuple:
+        """
+        Modelos que forman la instantánea y el prefijo de sus campos en
+        cada fila, partiendo de OfertaMateria.
+        """
+        from ..models import Carrera, Materia, MateriaCarreraSemestre, OfertaMateria
+
+        return (
+            (OfertaMateria, ''),
+            (MateriaCarreraSemestre, 'materia_carrera__'),
+            (Materia, 'materia_carrera__materia__'),
+            (Carrera, 'materia_carrera__carrera__'),
+        )
+
+    @staticmethod
+    def _campos(modelo) -> List[str]:
+        return [campo.attname for campo in modelo._meta.concrete_fields]
+
+    @staticmethod
+    def _filas(periodo_id: int) -> List[dict]:
+        """
+        Ofertas del periodo con su materia y carrera como filas de valores,
+        que es lo que se guarda en la caché compartida (no instancias).
+        """
+        modelos = CatalogoService._modelos()
+        campos = [prefijo + campo for modelo, prefijo in modelos for campo in CatalogoService._campos(modelo)]
+        # Sin el orden por defecto (materia, grupo): la instantánea va por ID
+        return list(modelos[0][0].objects.filter(periodo_id=periodo_id).order_by().values(*campos))
+
+    @staticmethod
+    def _construir(filas: List[dict]) -> dict:
+        """
+        Instancias de solo lectura de OfertaMateria, con materia_carrera,
+        materia y carrera asignadas, a partir de las filas de la caché.
+        """
+        (oferta_modelo, _), (mc_modelo, mc_prefijo), (materia_modelo, materia_prefijo), \
+            (carrera_modelo, carrera_prefijo) = CatalogoService._modelos()
+
+        def instancia(modelo, prefijo, fila):
+            campos = CatalogoService._campos(modelo)
+            return modelo.from_db(DEFAULT_DB_ALIAS, campos, [fila[prefijo + campo] for campo in campos])
+
+        ofertas = {}
+        for fila in filas:
+            materia_carrera = instancia(mc_modelo, mc_prefijo, fila)
+            materia_carrera.materia = instancia(materia_modelo, materia_prefijo, fila)
+            materia_carrera.carrera = instancia(carrera_modelo, carrera_prefijo, fila)
+            oferta = instancia(oferta_modelo, '', fila)
+            oferta.materia_carrera = materia_carrera
+            ofertas[oferta.id] = oferta
+        return ofertas
+
+    @staticmethod
+    def instantanea(periodo_id: int, generacion: Optional[int] = None) -> dict:
+        """
+        Ofertas del periodo por ID, con materia y carrera cargadas. Es
+        inmutable dentro de una generación; los cupos que trae no están al
+        día y se toman de CupoService.disponibles. La caché compartida
+        guarda filas de valores y cada proceso arma sus propias instancias.
+        """
+        if generacion is None:
+            generacion = CatalogoService.generacion(periodo_id)
+        local = CatalogoService._instantaneas.get(periodo_id)
+        if local and local[0] == generacion:
+            return local[1]
+
+        filas = obtener_o_calcular(
+            f'{CatalogoService.PREFIJO_INSTANTANEA}{periodo_id}:{generacion}',
+            lambda: CatalogoService._filas(periodo_id),
+            CatalogoService.TIMEOUT
+        )
+        ofertas = CatalogoService._construir(filas)
+        CatalogoService._instantaneas[periodo_id] = (generacion, ofertas)
+        return ofertas
+
+    @staticmethod
+    def ofertas_carrera(periodo_id: int, carrera_id: int, plan_id: Optional[int] = None,
+                        generacion: Optional[int] = None) -> List:
+        """
+        Ofertas de la instantánea que pertenecen a la carrera (y al plan).
+        """
+        return [
+            oferta for oferta in CatalogoService.instantanea(periodo_id, generacion).values()
+            if oferta.materia_carrera.carrera_id == carrera_id
+            and (plan_id is None or oferta.materia_carrera.plan_estudios_id == plan_id)
+        ]
+
+    @staticmethod
+    def serializado(periodo_id: int, carrera_id: int, plan_id: Optional[int] = None,
+                    generacion: Optional[int] = None) -> bytes:
+        """
+        Catálogo de la carrera ya convertido a JSON, igual para todos los
+        estudiantes del plan. No incluye cupos: cambian a cada momento y
+        se consultan aparte.
+        """
+        if generacion is None:
+            generacion = CatalogoService.generacion(periodo_id)
+        llave = (periodo_id, carrera_id, plan_id)
+        local = CatalogoService._serializados.get(llave)
+        if local and local[0] == generacion:
+            return local[1]
+
+        def construir():
+            ofertas = sorted(
+                CatalogoService.ofertas_carrera(periodo_id, carrera_id, plan_id, generacion),
+                key=lambda o: (o.materia_carrera.semestre, o.materia_carrera.materia.codigo, o.grupo)
+            )
+            return a_json({
+                'periodo_id': periodo_id,
+                'generacion': generacion,
+                'ofertas': [
+                    {
+                        'id': oferta.id,
+                        'materia_codigo': oferta.materia_carrera.materia.codigo,
+                        'materia_nombre': oferta.materia_carrera.materia.nombre,
+                        'semestre': oferta.materia_carrera.semestre,
+                        'grupo': oferta.grupo,
+                        'docente': oferta.docente,
+                        'horario': oferta.horario,
+                        'turno': oferta.turno,
+                    }
+                    for oferta in ofertas
+                ],
+            })
+
+        datos = obtener_o_calcular(
+            f'{CatalogoService.PREFIJO_JSON}{periodo_id}:{carrera_id}:{plan_id or 0}:{generacion}',
+            construir,
+            CatalogoService.TIMEOUT
+        )
+        CatalogoService._serializados[llave] = (generacion, datos)
+        return datos
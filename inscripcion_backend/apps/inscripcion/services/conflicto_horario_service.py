@@ -0,0 +1,141 @@
+"""
+Matriz de choques de horario entre grupos ofertados.
+"""
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Tuple
+from core.utils.cache import obtener_o_calcular
+from ..models import EstudianteCarrera, HorarioOferta, OfertaMateria, PeriodoAcademico
+from .catalogo_service import CatalogoService
+
+
+class ConflictoHorarioService:
+    """
+    Choques precalculados por (periodo, carrera, plan). Cada grupo tiene una
+    máscara de bits (int) con los grupos cuyo horario se superpone al suyo.
+    """
+
+    PREFIJO = 'conflictos_horario:'
+    TIMEOUT = 3600
+
+    @staticmethod
+    def matriz(periodo_id: int, carrera_id: int, plan_id: int) -> Dict[str, Any]:
+        """
+        Matriz del plan: ids de oferta, etiqueta "SIGLA GRUPO", materia y
+        máscara de choques por posición. Se reconstruye al cambiar la
+        generación del catálogo del periodo.
+        """
+        clave = (
+            f'{ConflictoHorarioService.PREFIJO}{periodo_id}:{carrera_id}:{plan_id}:'
+            f'{CatalogoService.generacion(periodo_id)}'
+        )
+        return obtener_o_calcular(
+            clave,
+            lambda: ConflictoHorarioService._construir(periodo_id, carrera_id, plan_id),
+            ConflictoHorarioService.TIMEOUT
+        )
+
+    @staticmethod
+    def _construir(periodo_id: int, carrera_id: int, plan_id: int) -> Dict[str, Any]:
+        ofertas = list(
+            OfertaMateria.objects.filter(
+                periodo_id=periodo_id,
+                materia_carrera__carrera_id=carrera_id,
+                materia_carrera__plan_estudios_id=plan_id,
+            ).order_by('id').values_list('id', 'materia_carrera_id', 'materia_carrera__materia__codigo', 'grupo')
+        )
+        indice = {oferta_id: i for i, (oferta_id, *_) in enumerate(ofertas)}
+
+        por_dia = defaultdict(list)
+        for oferta_id, dia, inicio, fin in HorarioOferta.objects.filter(
+            oferta_id__in=list(indice)
+        ).values_list('oferta_id', 'dia', 'inicio_min', 'fin_min'):
+            por_dia[dia].append((inicio, fin, indice[oferta_id]))
+
+        conflictos = [0] * len(ofertas)
+        for bloques in por_dia.values():
+            bloques.sort()
+            # Barrido por hora de inicio: solo se comparan bloques que aún no terminaron
+            activos = []
+            for inicio, fin, i in bloques:
+                activos = [(f, j) for f, j in activos if f > inicio]
+                for _, j in activos:
+                    if j != i:
+                        conflictos[i] |= 1 << j
+                        conflictos[j] |= 1 << i
+                activos.append((fin, i))
+
+        return {
+            'ids': [o[0] for o in ofertas],
+            'materias': [o[1] for o in ofertas],
+            'etiquetas': [f'{o[2]} {o[3]}' for o in ofertas],
+            'conflictos': conflictos,
+        }
+
+    @staticmethod
+    def choques(matriz: Dict[str, Any], oferta_ids: Iterable[int]) -> List[Tuple[int, int]]:
+        """
+        Pares de ofertas de la selección que chocan entre sí.
+        """
+        indice = {oferta_id: i for i, oferta_id in enumerate(matriz['ids'])}
+        posiciones = sorted({indice[i] for i in oferta_ids if i in indice})
+        seleccion = 0
+        for i in posiciones:
+            seleccion |= 1 << i
+
+        pares = []
+        for i in posiciones:
+            choque = matriz['conflictos'][i] & seleccion
+            while choque:
+                j = (choque & -choque).bit_length() - 1
+                if j > i:
+                    pares.append((matriz['ids'][i], matriz['ids'][j]))
+                choque &= choque - 1
+        return pares
+
+    @staticmethod
+    def validar_seleccion(registro: str, codigo_carrera: str, oferta_ids: List[int]) -> Dict[str, Any]:
+        """
+        Revisa choques de horario y materias repetidas en una selección.
+        """
+        est_carrera = EstudianteCarrera.objects.filter(
+            estudiante__registro=registro, carrera__codigo=codigo_carrera, activa=True
+        ).values_list('carrera_id', 'plan_estudios_id').first()
+        periodo_id = PeriodoAcademico.objects.filter(activo=True).values_list('id', flat=True).first()
+        if not est_carrera or not periodo_id:
+            return {'valido': False, 'mensaje': "No hay un periodo activo o la carrera no es válida.", 'conflictos': []}
+
+        matriz = ConflictoHorarioService.matriz(periodo_id, *est_carrera)
+        indice = {oferta_id: i for i, oferta_id in enumerate(matriz['ids'])}
+
+        conflictos = [
+            {
+                'oferta_id': a,
+                'oferta_conflicto_id': b,
+                'descripcion': f"{matriz['etiquetas'][indice[a]]} choca con {matriz['etiquetas'][indice[b]]}",
+            }
+            for a, b in ConflictoHorarioService.choques(matriz, oferta_ids)
+        ]
+
+        vistas = {}
+        for oferta_id in sorted(set(oferta_ids)):
+            if oferta_id not in indice:
+                continue
+            materia = matriz['materias'][indice[oferta_id]]
+            if materia in vistas:
+                conflictos.append({
+                    'oferta_id': vistas[materia],
+                    'oferta_conflicto_id': oferta_id,
+                    'descripcion': f"{matriz['etiquetas'][indice[oferta_id]]} es la misma materia que "
+                                   f"{matriz['etiquetas'][indice[vistas[materia]]]}",
+                })
+            else:
+                vistas[materia] = oferta_id
+
+        fuera = sorted(set(oferta_ids) - set(indice))
+        if fuera:
+            mensaje = f"Ofertas fuera del plan del estudiante: {fuera}"
+        elif conflictos:
+            mensaje = f"La selección tiene {len(conflictos)} conflicto{'s' if len(conflictos) != 1 else ''}."
+        else:
+            mensaje = "La selección no tiene choques de horario."
+        return {'valido': not conflictos and not fuera, 'mensaje': mensaje, 'conflictos': conflictos}
@@ -0,0 +1,340 @@
+"""
+Contadores de cupos en Redis con escritura diferida a OfertaMateria.
+
+Cada reserva queda retenida ({cupos}:retenciones) hasta que la transacción
+que la pidió confirma; si se revierte, la retención vence y
+liberar_retenciones_vencidas devuelve los cupos que no quedaron inscritos.
+
+Todas las claves llevan la etiqueta {cupos} para caer en el mismo slot de
+Redis Cluster, y los scripts las reciben en KEYS.
+"""
+import logging
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from ..models import OfertaMateria
+
+logger = logging.getLogger(__name__)
+
+
+# Reserva todo o nada. Devuelve {1} si reservó, {-1, i...} con las claves
+# que aún no están cargadas en Redis o {0, i...} con las ofertas sin cupo.
+# KEYS: pendientes, retenciones, vencimientos, contadores...
+# ARGV: token, vence, retención, ids...
+RESERVAR_LUA = """
+local faltantes = {}
+for i = 4, #KEYS do
+    if redis.call('EXISTS', KEYS[i]) == 0 then
+        table.insert(faltantes, i - 3)
+    end
+end
+if #faltantes > 0 then
+    table.insert(faltantes, 1, -1)
+    return faltantes
+end
+local llenas = {}
+for i = 4, #KEYS do
+    local maximo = tonumber(redis.call('HGET', KEYS[i], 'max'))
+    local actual = tonumber(redis.call('HGET', KEYS[i], 'actual'))
+    if actual >= maximo then
+        table.insert(llenas, i - 3)
+    end
+end
+if #llenas > 0 then
+    table.insert(llenas, 1, 0)
+    return llenas
+end
+for i = 4, #KEYS do
+    redis.call('HINCRBY', KEYS[i], 'actual', 1)
+    redis.call('SADD', KEYS[1], ARGV[i])
+end
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[3])
+redis.call('ZADD', KEYS[3], ARGV[2], ARGV[1])
+return {1}
+"""
+
+# Libera un cupo por clave sin bajar de cero. Devuelve las posiciones de las
+# claves que no están en Redis para que se liberen directamente en la base.
+# KEYS: pendientes, contadores...  ARGV: ids...
+LIBERAR_LUA = """
+local ausentes = {}
+for i = 2, #KEYS do
+    if redis.call('EXISTS', KEYS[i]) == 0 then
+        table.insert(ausentes, i - 1)
+    elseif tonumber(redis.call('HGET', KEYS[i], 'actual')) > 0 then
+        redis.call('HINCRBY', KEYS[i], 'actual', -1)
+        redis.call('SADD', KEYS[1], ARGV[i - 1])
+    end
+end
+return ausentes
+"""
+
+# Cierra una retención vencida devolviendo los cupos indicados. No hace nada
+# si la retención ya no existe (su transacción confirmó mientras tanto).
+# KEYS: retenciones, vencimientos, pendientes, contadores a devolver...
+# ARGV: token, ids a devolver...
+LIBERAR_RETENCION_LUA = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+for i = 4, #KEYS do
+    if redis.call('EXISTS', KEYS[i]) == 1 and tonumber(redis.call('HGET', KEYS[i], 'actual')) > 0 then
+        redis.call('HINCRBY', KEYS[i], 'actual', -1)
+        redis.call('SADD', KEYS[3], ARGV[i - 2])
+    end
+end
+redis.call('HDEL', KEYS[1], ARGV[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+return 1
+"""
+
+ACTUALIZAR_MAXIMO_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('HSET', KEYS[1], 'max', ARGV[1])
+end
+"""
+
+
+class CupoRedisService:
+    """Capa opcional de contadores de cupos en Redis."""
+
+    PREFIJO = '{cupos}:oferta:'
+    PENDIENTES = '{cupos}:pendientes'
+    RETENCIONES = '{cupos}:retenciones'
+    VENCIMIENTOS = '{cupos}:retenciones:vence'
+
+    @staticmethod
+    def habilitado() -> bool:
+        """
+        Contadores en Redis activos.
+        """
+        return getattr(settings, 'CUPOS_EN_REDIS', False)
+
+    @staticmethod
+    def _conexion():
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+
+    @staticmethod
+    def _clave(oferta_id: int) -> str:
+        return f'{CupoRedisService.PREFIJO}{oferta_id}'
+
+    @staticmethod
+    def _cargar(oferta_ids: List[int]) -> None:
+        """
+        Carga en Redis los contadores que aún no existen, desde la base.
+        El máximo siempre se toma de la base; el actual solo si falta.
+        """
+        redis = CupoRedisService._conexion()
+        pipe = redis.pipeline()
+        for oferta_id, maximo, actual in OfertaMateria.objects.filter(id__in=oferta_ids).values_list(
+            'id', 'cupo_maximo', 'cupo_actual'
+        ):
+            clave = CupoRedisService._clave(oferta_id)
+            pipe.hset(clave, 'max', maximo)
+            pipe.hsetnx(clave, 'actual', actual)
+        pipe.execute()
+
+    @staticmethod
+    def actualizar_maximo(oferta_id: int, maximo: int) -> None:
+        """
+        Aplica un cambio de cupo_maximo al contador ya cargado en Redis.
+        """
+        redis = CupoRedisService._conexion()
+        redis.register_script(ACTUALIZAR_MAXIMO_LUA)(keys=[CupoRedisService._clave(oferta_id)], args=[maximo])
+
+    @staticmethod
+    def cupos(oferta_ids: List[int]) -> Dict[int, Tuple[int, int]]:
+        """
+        Cupo máximo y actual de las ofertas cargadas en Redis.
+        """
+        redis = CupoRedisService._conexion()
+        pipe = redis.pipeline()
+        for oferta_id in oferta_ids:
+            pipe.hmget(CupoRedisService._clave(oferta_id), 'max', 'actual')
+        return {
+            oferta_id: (int(maximo), int(actual))
+            for oferta_id, (maximo, actual) in zip(oferta_ids, pipe.execute())
+            if maximo is not None and actual is not None
+        }
+
+    @staticmethod
+    def reservar(oferta_ids: Iterable[int], inscripcion_id: Optional[int] = None) -> List[int]:
+        """
+        Reserva un cupo en cada oferta de forma atómica en Redis.
+        Devuelve los IDs sin cupo; una lista vacía indica éxito.
+        La reserva queda retenida hasta que la transacción en curso
+        confirma; si no confirma, los cupos vuelven al vencer la retención,
+        salvo los que `inscripcion_id` tenga inscritos en la base.
+        """
+        ids = sorted(set(oferta_ids))
+        if not ids:
+            return []
+
+        redis = CupoRedisService._conexion()
+        script = redis.register_script(RESERVAR_LUA)
+        claves = [
+            CupoRedisService.PENDIENTES, CupoRedisService.RETENCIONES, CupoRedisService.VENCIMIENTOS,
+            *(CupoRedisService._clave(i) for i in ids),
+        ]
+        token = uuid.uuid4().hex
+        vence = time.time() + settings.CUPOS_REDIS_RETENCION_SEGUNDOS
+        retencion = f"{inscripcion_id or ''}:{','.join(str(i) for i in ids)}"
+
+        for _ in range(2):
+            resultado = script(keys=claves, args=[token, vence, retencion, *ids])
+            estado, posiciones = resultado[0], resultado[1:]
+            if estado == 1:
+                transaction.on_commit(lambda: CupoRedisService.confirmar(token))
+                return []
+            if estado == 0:
+                return [ids[p - 1] for p in posiciones]
+            CupoRedisService._cargar([ids[p - 1] for p in posiciones])
+
+        # Las ofertas que siguen sin cargarse no existen en la base.
+        return [ids[p - 1] for p in posiciones]
+
+    @staticmethod
+    def confirmar(token: str) -> None:
+        """
+        Da por definitiva una reserva cuya transacción confirmó.
+        """
+        pipe = CupoRedisService._conexion().pipeline()
+        pipe.hdel(CupoRedisService.RETENCIONES, token)
+        pipe.zrem(CupoRedisService.VENCIMIENTOS, token)
+        pipe.execute()
+
+    @staticmethod
+    def _inscritas(retenciones: Dict[str, Tuple[Optional[int], List[int]]]) -> set:
+        """
+        Pares (inscripción, oferta) de las retenciones que ya están en la
+        base: su transacción confirmó aunque confirmar() no llegó a correr.
+        """
+        from ..models import InscripcionMateria
+
+        inscripciones = {i for i, _ in retenciones.values() if i}
+        if not inscripciones:
+            return set()
+        ofertas = {o for _, ids in retenciones.values() for o in ids}
+        return set(
+            InscripcionMateria.objects.filter(inscripcion_id__in=inscripciones, oferta_id__in=ofertas)
+            .order_by().values_list('inscripcion_id', 'oferta_id')
+        )
+
+    @staticmethod
+    def liberar_retenciones_vencidas(lote: int = None) -> int:
+        """
+        Devuelve los cupos de las reservas cuya transacción se revirtió o
+        nunca confirmó. Los cupos que su inscripción tiene guardados en la
+        base no se devuelven: la transacción confirmó y el proceso murió (o
+        falló) antes de llamar a confirmar(). Devuelve la cantidad de
+        retenciones cerradas.
+        """
+        lote = lote or settings.CUPOS_REDIS_LOTE
+        redis = CupoRedisService._conexion()
+        script = redis.register_script(LIBERAR_RETENCION_LUA)
+        total = 0
+        while True:
+            tokens = [
+                t.decode() for t in redis.zrangebyscore(CupoRedisService.VENCIMIENTOS, '-inf', time.time(), 0, lote)
+            ]
+            if not tokens:
+                return total
+
+            retenciones = {}
+            for token, valor in zip(tokens, redis.hmget(CupoRedisService.RETENCIONES, tokens)):
+                inscripcion, _, ids = (valor or b'').decode().partition(':')
+                retenciones[token] = (int(inscripcion) if inscripcion else None, [int(i) for i in ids.split(',') if i])
+            inscritas = CupoRedisService._inscritas(retenciones)
+
+            for token, (inscripcion, ids) in retenciones.items():
+                devolver = [i for i in ids if (inscripcion, i) not in inscritas]
+                cerrada = script(
+                    keys=[
+                        CupoRedisService.RETENCIONES, CupoRedisService.VENCIMIENTOS, CupoRedisService.PENDIENTES,
+                        *(CupoRedisService._clave(i) for i in devolver),
+                    ],
+                    args=[token, *devolver],
+                )
+                if not cerrada:
+                    # Confirmada mientras tanto; se quita el vencimiento si quedó
+                    redis.zrem(CupoRedisService.VENCIMIENTOS, token)
+            total += len(tokens)
+            if len(tokens) < lote:
+                return total
+
+    @staticmethod
+    def liberar(oferta_ids: Iterable[int]) -> int:
+        """
+        Libera un cupo por cada aparición de la oferta. Las ofertas que no
+        están en Redis se liberan directamente en la base.
+        """
+        from .cupo_service import CupoService
+
+        ids = sorted(oferta_ids)
+        if not ids:
+            return 0
+
+        redis = CupoRedisService._conexion()
+        script = redis.register_script(LIBERAR_LUA)
+        claves = [CupoRedisService.PENDIENTES, *(CupoRedisService._clave(i) for i in ids)]
+        ausentes = script(keys=claves, args=ids)
+        if ausentes:
+            CupoService.liberar_en_base([ids[p - 1] for p in ausentes])
+        return len(ids)
+
+    @staticmethod
+    def sincronizar(lote: int = None) -> int:
+        """
+        Persiste en OfertaMateria los contadores modificados en Redis.
+        """
+        lote = lote or getattr(settings, 'CUPOS_REDIS_LOTE', 500)
+        redis = CupoRedisService._conexion()
+        total = 0
+
+        while True:
+            ids = [int(i) for i in redis.spop(CupoRedisService.PENDIENTES, lote) or []]
+            if not ids:
+                return total
+
+            pipe = redis.pipeline()
+            for oferta_id in ids:
+                pipe.hget(CupoRedisService._clave(oferta_id), 'actual')
+            actuales = pipe.execute()
+
+            ofertas = [
+                OfertaMateria(id=oferta_id, cupo_actual=int(actual))
+                for oferta_id, actual in zip(ids, actuales)
+                if actual is not None
+            ]
+            try:
+                try:
+                    with transaction.atomic():
+                        OfertaMateria.objects.bulk_update(ofertas, ['cupo_actual'])
+                except IntegrityError:
+                    # Una fila inválida no debe frenar la escritura de las demás
+                    ofertas = CupoRedisService._sincronizar_por_fila(ofertas)
+            except Exception:
+                # Reencolar para el siguiente ciclo en lugar de perder cambios
+                redis.sadd(CupoRedisService.PENDIENTES, *ids)
+                raise
+            total += len(ofertas)
+
+    @staticmethod
+    def _sincronizar_por_fila(ofertas: List[OfertaMateria]) -> List[OfertaMateria]:
+        """
+        Persiste las ofertas una por una; las que violan una restricción se
+        registran y se omiten. Devuelve las persistidas.
+        """
+        persistidas = []
+        for oferta in ofertas:
+            try:
+                with transaction.atomic():
+                    OfertaMateria.objects.filter(id=oferta.id).update(cupo_actual=oferta.cupo_actual)
+            except IntegrityError as e:
+                logger.error(f"No se pudo sincronizar el cupo de la oferta {oferta.id} ({oferta.cupo_actual}): {e}")
+                continue
+            persistidas.append(oferta)
+        return persistidas
@@ -0,0 +1,139 @@
+"""
+Gestión de cupos de ofertas.
+"""
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from ..models import OfertaMateria
+from .cupo_redis_service import CupoRedisService
+from .cupo_token_service import CupoTokenService
+from .lista_espera_service import ListaEsperaService
+
+
+class CupoService:
+    """Reserva y liberación de cupos."""
+
+    @staticmethod
+    def disponibles(oferta_ids: Iterable[int]) -> Dict[int, Tuple[int, int]]:
+        """
+        Cupo máximo y actual de cada oferta al momento. Con contadores en
+        Redis se leen de sus hashes; las ofertas aún no cargadas allí se
+        leen de la base. Las ofertas inexistentes no aparecen.
+        """
+        ids = sorted(set(oferta_ids))
+        cupos = CupoRedisService.cupos(ids) if ids and CupoRedisService.habilitado() else {}
+        faltantes = [i for i in ids if i not in cupos]
+        if faltantes:
+            cupos.update(
+                (oferta_id, (maximo, actual))
+                for oferta_id, maximo, actual in OfertaMateria.objects.filter(id__in=faltantes).values_list(
+                    'id', 'cupo_maximo', 'cupo_actual'
+                )
+            )
+        return cupos
+
+    @staticmethod
+    def reservar(oferta_ids: Iterable[int], inscripcion_id: Optional[int] = None) -> List[int]:
+        """
+        Reserva un cupo en cada oferta con un único UPDATE condicional.
+
+        Las ofertas en modo tokens ocupan un token libre y el resto usa el
+        contador (en Redis si está habilitado). Si alguna oferta no tiene
+        cupo se deshacen todas las reservas y se devuelven los IDs sin cupo.
+        Una lista vacía indica éxito. `inscripcion_id` identifica la
+        inscripción que guarda las materias, para no devolver sus cupos si
+        la retención en Redis vence tras confirmar.
+        Debe llamarse dentro de un bloque transaction.atomic().
+        """
+        ids = sorted(set(oferta_ids))
+        if not ids:
+            return []
+
+        por_tokens = CupoTokenService.ofertas_por_tokens()
+        tokens = [i for i in ids if i in por_tokens]
+        contador = [i for i in ids if i not in por_tokens]
+
+        sid = transaction.savepoint()
+        faltantes = CupoTokenService.reservar(tokens)
+        if not faltantes:
+            # Redis es todo o nada, por eso va al final tras los pasos revertibles
+            if CupoRedisService.habilitado():
+                faltantes = CupoRedisService.reservar(contador, inscripcion_id)
+            else:
+                faltantes = CupoService._reservar_en_base(contador)
+
+        if faltantes:
+            transaction.savepoint_rollback(sid)
+            return faltantes
+
+        transaction.savepoint_commit(sid)
+        return []
+
+    @staticmethod
+    def _reservar_en_base(ids: List[int]) -> List[int]:
+        """
+        UPDATE ... RETURNING sobre cupo_actual. Devuelve los IDs sin cupo.
+        """
+        if not ids:
+            return []
+
+        tabla = connection.ops.quote_name(OfertaMateria._meta.db_table)
+        marcadores = ', '.join(['%s'] * len(ids))
+        sql = (
+            f"UPDATE {tabla} SET cupo_actual = cupo_actual + 1 "
+            f"WHERE id IN ({marcadores}) AND cupo_actual < cupo_maximo "
+            f"RETURNING id"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, ids)
+            reservadas = {row[0] for row in cursor.fetchall()}
+
+        return [i for i in ids if i not in reservadas]
+
+    @staticmethod
+    def liberar(oferta_ids: Iterable[int]) -> int:
+        """
+        Libera un cupo por cada aparición de la oferta, sin bajar de cero.
+
+        Los cupos de ofertas con lista de espera pasan directamente a los
+        siguientes estudiantes y no se liberan. Con contadores en Redis la
+        liberación se aplica al confirmar la transacción en curso, para no
+        devolver cupos de un cambio revertido.
+        """
+        conteos = Counter(oferta_ids)
+        if not conteos:
+            return 0
+
+        conteos = ListaEsperaService.promover(conteos)
+        if not conteos:
+            return 0
+
+        por_tokens = CupoTokenService.ofertas_por_tokens()
+        liberados = CupoTokenService.liberar(
+            {i: n for i, n in conteos.items() if i in por_tokens}
+        )
+        contador = Counter({i: n for i, n in conteos.items() if i not in por_tokens})
+
+        if CupoRedisService.habilitado():
+            transaction.on_commit(lambda: CupoRedisService.liberar(contador.elements()))
+            return liberados + sum(contador.values())
+        return liberados + CupoService.liberar_en_base(contador.elements())
+
+    @staticmethod
+    def liberar_en_base(oferta_ids: Iterable[int]) -> int:
+        """
+        Libera cupos directamente en OfertaMateria con un UPDATE por cada
+        cantidad distinta a liberar.
+        """
+        por_cantidad = defaultdict(list)
+        for oferta_id, n in Counter(oferta_ids).items():
+            por_cantidad[n].append(oferta_id)
+
+        actualizadas = 0
+        for n, ids in por_cantidad.items():
+            actualizadas += OfertaMateria.objects.filter(id__in=ids, cupo_actual__gt=0).update(
+                cupo_actual=Greatest(F('cupo_actual') - n, Value(0))
+            )
+        return actualizadas
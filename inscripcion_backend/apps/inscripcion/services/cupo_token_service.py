@@ -0,0 +1,118 @@
+"""
+Cupos materializados como tokens para ofertas con alta demanda.
+"""
+from typing import Dict, Iterable, List, Optional, Set
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Least
+from ..models import OfertaMateria, CupoToken
+
+
+class CupoTokenService:
+    """Reserva de cupos con SELECT ... FOR UPDATE SKIP LOCKED."""
+
+    CACHE_OFERTAS = 'cupos_ofertas_por_tokens'
+
+    @staticmethod
+    def ofertas_por_tokens() -> Set[int]:
+        """
+        IDs de ofertas en modo tokens.
+        """
+        return cache.get_or_set(
+            CupoTokenService.CACHE_OFERTAS,
+            lambda: set(OfertaMateria.objects.filter(cupo_por_tokens=True).order_by().values_list('id', flat=True)),
+            timeout=300
+        )
+
+    @staticmethod
+    def materializar(oferta: OfertaMateria) -> int:
+        """
+        Crea un token por cada cupo de la oferta y activa el modo tokens.
+        Devuelve la cantidad de tokens de la oferta.
+        """
+        with transaction.atomic():
+            oferta = OfertaMateria.objects.select_for_update().get(id=oferta.id)
+            existentes = set(oferta.tokens.values_list('numero', flat=True))
+            ocupados = oferta.tokens.filter(ocupado=True).count() if existentes else oferta.cupo_actual
+
+            CupoToken.objects.bulk_create([
+                CupoToken(oferta=oferta, numero=n, ocupado=n <= ocupados)
+                for n in range(1, oferta.cupo_maximo + 1)
+                if n not in existentes
+            ])
+            # Tokens libres sobrantes si se redujo el cupo máximo
+            oferta.tokens.filter(numero__gt=oferta.cupo_maximo, ocupado=False).delete()
+
+            oferta.cupo_por_tokens = True
+            oferta.save(update_fields=['cupo_por_tokens'])
+            transaction.on_commit(lambda: cache.delete(CupoTokenService.CACHE_OFERTAS))
+            return oferta.tokens.count()
+
+    @staticmethod
+    def desmaterializar(oferta: OfertaMateria) -> None:
+        """
+        Vuelve la oferta al contador cupo_actual y elimina sus tokens.
+        """
+        with transaction.atomic():
+            CupoTokenService.recalcular([oferta.id])
+            OfertaMateria.objects.filter(id=oferta.id).update(cupo_por_tokens=False)
+            CupoToken.objects.filter(oferta_id=oferta.id).delete()
+            transaction.on_commit(lambda: cache.delete(CupoTokenService.CACHE_OFERTAS))
+
+    @staticmethod
+    def reservar(oferta_ids: Iterable[int]) -> List[int]:
+        """
+        Ocupa un token libre por oferta sin esperar a otros reclamantes.
+        Devuelve los IDs sin token libre. Debe llamarse dentro de una
+        transacción; quien llama decide si revierte.
+        """
+        faltantes = []
+        for oferta_id in sorted(set(oferta_ids)):
+            token_id = CupoToken.objects.select_for_update(skip_locked=True).filter(
+                oferta_id=oferta_id, ocupado=False
+            ).values_list('id', flat=True).first()
+            if token_id is None:
+                faltantes.append(oferta_id)
+                continue
+            CupoToken.objects.filter(id=token_id).update(ocupado=True)
+        return faltantes
+
+    @staticmethod
+    def liberar(conteos: Dict[int, int]) -> int:
+        """
+        Libera la cantidad indicada de tokens ocupados por oferta.
+
+        Espera a los tokens bloqueados en lugar de saltarlos: con SKIP LOCKED
+        podían quedar cupos sin devolver. Si otra transacción libera los
+        mismos tokens mientras se espera, la consulta trae menos filas y se
+        repite por el resto hasta que no queden tokens ocupados.
+        """
+        liberados = 0
+        for oferta_id, n in sorted(conteos.items()):
+            while n > 0:
+                token_ids = list(CupoToken.objects.select_for_update().filter(
+                    oferta_id=oferta_id, ocupado=True
+                ).order_by('id').values_list('id', flat=True)[:n])
+                if not token_ids:
+                    break
+                actualizados = CupoToken.objects.filter(id__in=token_ids).update(ocupado=False)
+                liberados += actualizados
+                n -= actualizados
+        return liberados
+
+    @staticmethod
+    def recalcular(oferta_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Actualiza cupo_actual como el total de tokens ocupados.
+        """
+        ocupados = CupoToken.objects.filter(
+            oferta=OuterRef('pk'), ocupado=True
+        ).values('oferta').annotate(total=Count('id')).values('total')
+
+        queryset = OfertaMateria.objects.filter(cupo_por_tokens=True)
+        if oferta_ids is not None:
+            queryset = queryset.filter(id__in=list(oferta_ids))
+        return queryset.update(
+            cupo_actual=Least(Coalesce(Subquery(ocupados), Value(0)), F('cupo_maximo'))
+        )
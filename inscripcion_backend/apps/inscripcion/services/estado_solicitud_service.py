@@ -0,0 +1,115 @@
+"""
+Estado compacto de las solicitudes de inscripción encoladas.
+"""
+import json
+import time
+from typing import Any, Dict, Optional
+from django.conf import settings
+from django.core.cache import cache
+
+
+class EstadoSolicitudService:
+    """Registro de estado por task_id y aviso del resultado final."""
+
+    PREFIJO = 'inscripcion:estado:'
+    ENCOLADA = 'ENCOLADA'
+    PROCESANDO = 'PROCESANDO'
+    COMPLETADA = 'COMPLETADA'
+
+    @staticmethod
+    def _clave(task_id: str) -> str:
+        return f'{EstadoSolicitudService.PREFIJO}{task_id}'
+
+    @staticmethod
+    def _redis():
+        """
+        Conexión Redis si la caché es django_redis; None con caché local.
+        """
+        if 'django_redis' not in settings.CACHES['default']['BACKEND']:
+            return None
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+
+    @staticmethod
+    def _guardar(task_id: str, registro: Dict[str, Any]) -> None:
+        cache.set(EstadoSolicitudService._clave(task_id), registro, settings.INSCRIPCION_IDEMPOTENCIA_TTL)
+
+    @staticmethod
+    def encolada(task_id: str) -> None:
+        """
+        Marca la solicitud como recibida.
+        """
+        EstadoSolicitudService._guardar(task_id, {'estado': EstadoSolicitudService.ENCOLADA})
+
+    @staticmethod
+    def procesando(task_id: Optional[str]) -> None:
+        """
+        Marca la solicitud como tomada por un worker.
+        """
+        if task_id:
+            EstadoSolicitudService._guardar(task_id, {'estado': EstadoSolicitudService.PROCESANDO})
+
+    @staticmethod
+    def completar(task_id: Optional[str], resultado: Dict[str, Any]) -> None:
+        """
+        Guarda el resultado final y lo publica a quien esté esperando.
+        """
+        if not task_id:
+            return
+        registro = {
+            'estado': EstadoSolicitudService.COMPLETADA,
+            'ok': resultado.get('ok'),
+            'mensaje': resultado.get('mensaje'),
+            'inscripcion_id': resultado.get('inscripcion_id'),
+        }
+        EstadoSolicitudService._guardar(task_id, registro)
+
+        redis = EstadoSolicitudService._redis()
+        if redis is not None:
+            try:
+                redis.publish(EstadoSolicitudService._clave(task_id), json.dumps(registro))
+            except Exception:
+                # El registro ya quedó guardado; los clientes lo leen al reconectar
+                pass
+
+    @staticmethod
+    def obtener(task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Estado actual de la solicitud, o None si no existe o expiró.
+        """
+        return cache.get(EstadoSolicitudService._clave(task_id))
+
+    @staticmethod
+    def esperar(task_id: str, segundos: float) -> Optional[Dict[str, Any]]:
+        """
+        Espera hasta `segundos` el resultado final. Con Redis escucha el
+        canal de la solicitud; sin Redis consulta la caché periódicamente.
+        """
+        limite = time.monotonic() + segundos
+        redis = EstadoSolicitudService._redis()
+
+        if redis is None:
+            while True:
+                estado = EstadoSolicitudService.obtener(task_id)
+                if estado and estado['estado'] == EstadoSolicitudService.COMPLETADA:
+                    return estado
+                if time.monotonic() >= limite:
+                    return None
+                time.sleep(0.5)
+
+        pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(EstadoSolicitudService._clave(task_id))
+        try:
+            # Pudo completarse antes de suscribirse
+            estado = EstadoSolicitudService.obtener(task_id)
+            if estado and estado['estado'] == EstadoSolicitudService.COMPLETADA:
+                return estado
+            while True:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return None
+                mensaje = pubsub.get_message(timeout=restante)
+                if mensaje and mensaje['type'] == 'message':
+                    return json.loads(mensaje['data'])
+        finally:
+            pubsub.close()
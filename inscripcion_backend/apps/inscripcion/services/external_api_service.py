@@ -1,31 +1,356 @@
-import requests
+import json
 import logging
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import Future
+from contextvars import ContextVar
+
+import requests
+from django.conf import settings
+from graphql import GraphQLError
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
+metricas = logging.getLogger('inscripcion.metricas')
+
+# Primer campo del documento: "query($r: Int!) { bloqueo(...) ..." -> "bloqueo"
+_OPERACION = re.compile(r'\{\s*(\w+)')
+_TIPO = re.compile(r'^\s*(query|mutation|subscription)\b')
+
+# Respuestas del servidor que vale la pena reintentar
+ESTADOS_REINTENTABLES = {502, 503, 504}
+
+# Lote de la petición entrante en curso (ver ExternalApiService.lote)
+_LOTE: ContextVar = ContextVar('lote_informix', default=None)
+
 
 class ExternalApiService:
-    URL = "https://dev-serviciosinformix.uagrm.edu.bo/informix-services/"
+    URL = settings.EXTERNAL_API_URL
+
+    # Sesión del proceso; se recrea tras un fork (workers de Celery, gunicorn)
+    _sesion = None
+    _pid = None
+    _candado = threading.Lock()
+    _contadores = {}
+    _pid_contadores = None
+    _ultimo_registro = 0.0
+
+    @staticmethod
+    def sesion() -> requests.Session:
+        """
+        Sesión HTTP con conexiones keep-alive reutilizadas entre llamadas.
+        """
+        if ExternalApiService._sesion is None or ExternalApiService._pid != os.getpid():
+            with ExternalApiService._candado:
+                if ExternalApiService._sesion is None or ExternalApiService._pid != os.getpid():
+                    sesion = requests.Session()
+                    adaptador = HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=settings.EXTERNAL_API_POOL,
+                        pool_block=False,
+                        max_retries=0,
+                    )
+                    sesion.mount('https://', adaptador)
+                    sesion.mount('http://', adaptador)
+                    ExternalApiService._sesion = sesion
+                    ExternalApiService._pid = os.getpid()
+        return ExternalApiService._sesion
+
+    @staticmethod
+    def _contar(clave: str) -> None:
+        """
+        Suma al contador y, cada EXTERNAL_API_ESTADISTICAS_SEGUNDOS, registra
+        las estadísticas del proceso en el logger inscripcion.metricas.
+        """
+        intervalo = settings.EXTERNAL_API_ESTADISTICAS_SEGUNDOS
+        ahora = time.monotonic()
+        with ExternalApiService._candado:
+            if ExternalApiService._pid_contadores != os.getpid():
+                ExternalApiService._contadores = {'solicitudes': 0, 'reintentos': 0, 'errores': 0}
+                ExternalApiService._pid_contadores = os.getpid()
+                ExternalApiService._ultimo_registro = ahora
+            ExternalApiService._contadores[clave] += 1
+            registrar = intervalo > 0 and ahora - ExternalApiService._ultimo_registro >= intervalo
+            if registrar:
+                ExternalApiService._ultimo_registro = ahora
+        if registrar:
+            metricas.info(f"API externo: {json.dumps(ExternalApiService.estadisticas())}")
+
+    @staticmethod
+    def operacion(query_string: str) -> str:
+        """
+        Nombre del primer campo consultado, para timeouts y registros.
+        """
+        m = _OPERACION.search(query_string)
+        return m.group(1) if m else ''
+
+    @staticmethod
+    def es_consulta(query_string: str) -> bool:
+        """
+        True si el documento es una consulta (sin efectos, reintentable).
+        """
+        tipo = _TIPO.match(query_string)
+        return not tipo or tipo.group(1) == 'query'
+
+    @staticmethod
+    def timeout(operacion: str):
+        """
+        (conexión, lectura) en segundos para la operación.
+        """
+        return (
+            settings.EXTERNAL_API_TIMEOUT_CONEXION,
+            settings.EXTERNAL_API_TIMEOUTS.get(operacion, settings.EXTERNAL_API_TIMEOUT_LECTURA),
+        )
+
+    @staticmethod
+    def espera(intento: int) -> float:
+        """
+        Espera antes del reintento: exponencial con jitter completo.
+        """
+        tope = min(settings.EXTERNAL_API_ESPERA_MAXIMA, settings.EXTERNAL_API_ESPERA_BASE * 2 ** intento)
+        return random.uniform(0, tope)
+
+    @staticmethod
+    def estadisticas() -> dict:
+        """
+        Contadores y estado del pool de conexiones de este proceso.
+        """
+        sesion = ExternalApiService.sesion()
+        pools = []
+        for adaptador in {id(a): a for a in sesion.adapters.values()}.values():
+            manager = adaptador.poolmanager
+            for clave in manager.pools.keys():
+                pool = manager.pools[clave]
+                pools.append({
+                    'host': f'{clave.key_scheme}://{clave.key_host}:{clave.key_port}',
+                    'conexiones_creadas': pool.num_connections,
+                    'solicitudes': pool.num_requests,
+                    'libres': pool.pool.qsize() if pool.pool else 0,
+                    'maximo': pool.pool.maxsize if pool.pool else 0,
+                })
+        with ExternalApiService._candado:
+            contadores = {'solicitudes': 0, 'reintentos': 0, 'errores': 0}
+            if ExternalApiService._pid_contadores == os.getpid():
+                contadores.update(ExternalApiService._contadores)
+        return {'pid': os.getpid(), **contadores, 'pools': pools}
 
     @staticmethod
-    def query(query_string, variables=None):
+    def query(query_string, variables=None, timeout=None, idempotente=None):
         """
         Ejecuta una consulta GraphQL en el servidor externo.
+
+        Las consultas se reintentan ante fallas de red y respuestas 502-504;
+        las mutaciones no, salvo idempotente=True. Dentro de lote() las
+        consultas se envían junto con las anticipadas en un solo documento.
+        """
+        lote = _LOTE.get()
+        if lote is not None and timeout is None and ExternalApiService.es_consulta(query_string):
+            return lote.obtener(query_string, variables)
+        return ExternalApiService._datos(
+            ExternalApiService._solicitar(query_string, variables, timeout, idempotente),
+            ExternalApiService.operacion(query_string),
+        )
+
+    @staticmethod
+    def _datos(result, operacion):
+        if result is None:
+            return None
+        if "errors" in result:
+            logger.error(f"Errores en respuesta GraphQL externa ({operacion}): {result['errors']}")
+            return None
+        return result.get("data")
+
+    @staticmethod
+    def _solicitar(query_string, variables=None, timeout=None, idempotente=None):
+        """
+        Envía el documento con reintentos; devuelve la respuesta completa
+        (data y errors) o None si no se obtuvo.
         """
         payload = {
             "query": query_string,
             "variables": variables or {}
         }
-        
-        try:
-            response = requests.post(ExternalApiService.URL, json=payload, timeout=10)
-            response.raise_for_status()
-            result = response.json()
-            
-            if "errors" in result:
-                logger.error(f"Errores en respuesta GraphQL externa: {result['errors']}")
+        operacion = ExternalApiService.operacion(query_string)
+        if idempotente is None:
+            idempotente = ExternalApiService.es_consulta(query_string)
+        intentos = 1 + (settings.EXTERNAL_API_REINTENTOS if idempotente else 0)
+        timeout = timeout or ExternalApiService.timeout(operacion)
+        sesion = ExternalApiService.sesion()
+
+        for intento in range(intentos):
+            ExternalApiService._contar('solicitudes')
+            try:
+                response = sesion.post(ExternalApiService.URL, json=payload, timeout=timeout)
+                if response.status_code == 400:
+                    # Documento inválido: el cuerpo trae los errores de validación
+                    cuerpo = response.json()
+                    if isinstance(cuerpo, dict) and "errors" in cuerpo:
+                        return cuerpo
+                if response.status_code in ESTADOS_REINTENTABLES and intento + 1 < intentos:
+                    raise requests.exceptions.HTTPError(f"{response.status_code} del API externo", response=response)
+                response.raise_for_status()
+                return response.json()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.HTTPError) as e:
+                reintentable = not isinstance(e, requests.exceptions.HTTPError) or (
+                    e.response is not None and e.response.status_code in ESTADOS_REINTENTABLES
+                )
+                if reintentable and intento + 1 < intentos:
+                    ExternalApiService._contar('reintentos')
+                    logger.warning(f"Reintentando {operacion} en el API externo ({intento + 1}/{intentos - 1}): {e}")
+                    time.sleep(ExternalApiService.espera(intento))
+                    continue
+                ExternalApiService._contar('errores')
+                logger.error(f"Error conectando con el API externo ({operacion}): {e}")
                 return None
-            
-            return result.get("data")
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error conectando con el API externo: {e}")
+            except (requests.exceptions.RequestException, ValueError) as e:
+                ExternalApiService._contar('errores')
+                logger.error(f"Error conectando con el API externo ({operacion}): {e}")
+                return None
+
+    @staticmethod
+    @contextmanager
+    def lote():
+        """
+        Alcance de una petición entrante: las consultas anticipadas y las que
+        lleguen mientras haya pendientes se envían juntas, y cada resultado
+        se reutiliza si la misma consulta se repite.
+        """
+        if _LOTE.get() is not None:
+            yield _LOTE.get()
+            return
+        token = _LOTE.set(LoteConsultas())
+        try:
+            yield _LOTE.get()
+        finally:
+            _LOTE.reset(token)
+
+    @staticmethod
+    def anticipar(query_string, variables=None) -> bool:
+        """
+        Registra una consulta para el próximo envío del lote sin esperarla.
+        False si no hay lote activo o el documento no es una consulta.
+        """
+        lote = _LOTE.get()
+        if lote is None or not ExternalApiService.es_consulta(query_string):
+            return False
+        lote.agregar(query_string, variables)
+        return True
+
+
+class LoteConsultas:
+    """
+    Consultas al servicio externo de una petición entrante. La primera que
+    se necesita envía todas las pendientes como un documento con alias
+    (core.utils.graphql_lote) y deja los demás resultados listos.
+
+    Cada consulta enviada tiene un Future: quien la pide mientras otro la
+    está enviando espera ese resultado.
+    """
+
+    def __init__(self):
+        self.pendientes = {}
+        self.futuros = {}
+        self.candado = threading.Lock()
+
+    @staticmethod
+    def _clave(query_string, variables):
+        return query_string, json.dumps(variables or {}, sort_keys=True, default=str)
+
+    def agregar(self, query_string, variables=None) -> None:
+        clave = self._clave(query_string, variables)
+        with self.candado:
+            if clave not in self.futuros:
+                self.pendientes.setdefault(clave, (query_string, variables))
+
+    def _tomar(self, query_string, variables):
+        """
+        Future de la consulta y, si le toca a quien llama hacer el envío,
+        las pendientes {clave: (query, variables)} que debe enviar.
+        """
+        clave = self._clave(query_string, variables)
+        with self.candado:
+            if clave in self.futuros:
+                return self.futuros[clave], {}
+            self.pendientes.setdefault(clave, (query_string, variables))
+            envio, self.pendientes = self.pendientes, {}
+            for c in envio:
+                self.futuros[c] = Future()
+            return self.futuros[clave], envio
+
+    def _resolver(self, envio, datos) -> None:
+        for clave, dato in zip(envio, datos):
+            self.futuros[clave].set_result(dato)
+
+    def obtener(self, query_string, variables=None):
+        futuro, envio = self._tomar(query_string, variables)
+        if envio:
+            datos = [None] * len(envio)
+            try:
+                datos = LoteConsultas.enviar(list(envio.values()))
+            finally:
+                self._resolver(envio, datos)
+        return futuro.result()
+
+    @staticmethod
+    def enviar(consultas):
+        """
+        Datos de cada consulta (query, variables), en un solo envío si se
+        pueden combinar.
+        """
+        if len(consultas) > 1:
+            combinado = LoteConsultas.combinar(consultas)
+            if combinado is not None:
+                documento, variables, mapas, timeout = combinado
+                result = ExternalApiService._solicitar(documento, variables, timeout=timeout, idempotente=True)
+                datos = LoteConsultas.repartir(consultas, mapas, result)
+                if datos is not None:
+                    return datos
+        return [
+            ExternalApiService._datos(ExternalApiService._solicitar(q, v), ExternalApiService.operacion(q))
+            for q, v in consultas
+        ]
+
+    @staticmethod
+    def combinar(consultas):
+        """
+        (documento, variables, mapas, timeout) del envío combinado, o None
+        si alguna consulta no se puede combinar.
+        """
+        from core.utils.graphql_lote import combinar
+
+        try:
+            combinado = combinar(consultas)
+        except GraphQLError as e:
+            logger.warning(f"No se pudo combinar el lote para el API externo: {e}")
+            return None
+        if combinado is None:
+            return None
+
+        timeouts = [ExternalApiService.timeout(ExternalApiService.operacion(q)) for q, _ in consultas]
+        return (*combinado, (max(t[0] for t in timeouts), max(t[1] for t in timeouts)))
+
+    @staticmethod
+    def repartir(consultas, mapas, result):
+        """
+        Datos de cada consulta desde la respuesta combinada, o None para
+        enviarlas una por una (errores de validación sin ruta). Si el envío
+        falló por red o timeout todas quedan sin datos: repetirlas una por
+        una solo multiplicaría la espera.
+        """
+        from core.utils.graphql_lote import separar
+
+        if result is None:
+            return [None] * len(consultas)
+        datos = separar(result, mapas)
+        if datos is None:
             return None
+        for (query_string, _), mapa, dato in zip(consultas, mapas, datos):
+            if dato is None:
+                errores = [e for e in result['errors'] if e['path'][0] in mapa]
+                logger.error(f"Errores en respuesta GraphQL externa ({ExternalApiService.operacion(query_string)}): {errores}")
+        return datos
@@ -0,0 +1,143 @@
+"""
+Generación de combinaciones de grupos sin choques de horario.
+"""
+import heapq
+from typing import Any, Dict, List, Optional
+from core.utils.horario import normalizar_turno
+from ..models import EstudianteCarrera, PeriodoAcademico
+from .catalogo_service import CatalogoService
+from .conflicto_horario_service import ConflictoHorarioService
+from .cupo_service import CupoService
+from .inscripcion_service import InscripcionService
+
+
+class GeneradorHorarioService:
+    """Backtracking con poda sobre la matriz de choques del plan."""
+
+    # Cada materia incluida pesa más que cualquier suma de puntajes de grupo
+    PESO_MATERIA = 1000
+    # Cupos a partir de los cuales un grupo ya no suma más puntaje
+    CUPOS_REFERENCIA = 20
+    MAX_NODOS = 50000
+
+    @staticmethod
+    def _puntaje(cupos: int, turno: Optional[str], preferido: Optional[str]) -> float:
+        puntaje = min(max(cupos, 0), GeneradorHorarioService.CUPOS_REFERENCIA) / GeneradorHorarioService.CUPOS_REFERENCIA
+        if preferido and turno == preferido:
+            puntaje += 1
+        return puntaje
+
+    @staticmethod
+    def generar(
+        registro: str,
+        codigo_carrera: str,
+        turno: Optional[str] = None,
+        codigos_materia: Optional[List[str]] = None,
+        limite: int = 5,
+        solo_con_cupo: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Mejores combinaciones de grupos para las materias habilitadas del
+        estudiante: primero las que incluyen más materias y luego por cupos
+        disponibles y turno preferido.
+        """
+        est_carrera = EstudianteCarrera.objects.filter(
+            estudiante__registro=registro, carrera__codigo=codigo_carrera, activa=True
+        ).values_list('carrera_id', 'plan_estudios_id').first()
+        periodo_id = PeriodoAcademico.objects.filter(activo=True).values_list('id', flat=True).first()
+        if not est_carrera or not periodo_id:
+            return []
+
+        habilitadas = InscripcionService.get_materias_habilitadas(registro, codigo_carrera)
+        if codigos_materia:
+            habilitadas = [m for m in habilitadas if m.materia.codigo in codigos_materia]
+        if not habilitadas:
+            return []
+
+        matriz = ConflictoHorarioService.matriz(periodo_id, *est_carrera)
+        preferido = normalizar_turno(turno)
+
+        posiciones = {mc.id: [] for mc in habilitadas}
+        for i, materia_carrera_id in enumerate(matriz['materias']):
+            if materia_carrera_id in posiciones:
+                posiciones[materia_carrera_id].append(i)
+
+        # Cupos al momento de la consulta; la matriz solo depende de horarios
+        catalogo = CatalogoService.instantanea(periodo_id)
+        cupos = CupoService.disponibles(matriz['ids'][i] for lista in posiciones.values() for i in lista)
+        datos = {
+            oferta_id: (maximo - actual, catalogo[oferta_id].turno if oferta_id in catalogo else None)
+            for oferta_id, (maximo, actual) in cupos.items()
+        }
+
+        puntajes = {}
+        candidatos = []
+        sin_grupo = []
+        for mc in habilitadas:
+            lista = []
+            for i in posiciones[mc.id]:
+                cupos, oferta_turno = datos.get(matriz['ids'][i], (0, None))
+                if solo_con_cupo and cupos <= 0:
+                    continue
+                puntajes[i] = GeneradorHorarioService._puntaje(cupos, oferta_turno, preferido)
+                lista.append(i)
+            if lista:
+                lista.sort(key=lambda i: -puntajes[i])
+                candidatos.append(lista)
+            else:
+                sin_grupo.append(mc.materia.codigo)
+
+        # Menos opciones primero: las ramas imposibles se cortan antes
+        candidatos.sort(key=len)
+        n = len(candidatos)
+        cota = [0.0] * (n + 1)
+        for k in range(n - 1, -1, -1):
+            cota[k] = cota[k + 1] + GeneradorHorarioService.PESO_MATERIA + puntajes[candidatos[k][0]]
+
+        conflictos = matriz['conflictos']
+        mejores = []
+        nodos = [0]
+
+        def explorar(k, mascara, valor, seleccion):
+            nodos[0] += 1
+            if nodos[0] > GeneradorHorarioService.MAX_NODOS:
+                return
+            if len(mejores) == limite and valor + cota[k] <= mejores[0][0]:
+                return
+            if k == n:
+                entrada = (valor, nodos[0], seleccion)
+                if len(mejores) < limite:
+                    heapq.heappush(mejores, entrada)
+                else:
+                    heapq.heapreplace(mejores, entrada)
+                return
+
+            compatible = False
+            for i in candidatos[k]:
+                if conflictos[i] & mascara:
+                    continue
+                compatible = True
+                explorar(
+                    k + 1, mascara | (1 << i),
+                    valor + GeneradorHorarioService.PESO_MATERIA + puntajes[i], seleccion + (i,)
+                )
+            # La materia se omite solo si ningún grupo encaja: combinaciones maximales
+            if not compatible:
+                explorar(k + 1, mascara, valor, seleccion)
+
+        explorar(0, 0, 0.0, ())
+
+        resultados = []
+        for valor, _, seleccion in sorted(mejores, reverse=True):
+            incluidas = {matriz['materias'][i] for i in seleccion}
+            resultados.append({
+                'puntaje': round(valor % GeneradorHorarioService.PESO_MATERIA, 3),
+                'total_materias': len(seleccion),
+                'oferta_ids': [matriz['ids'][i] for i in seleccion],
+                'grupos': [matriz['etiquetas'][i] for i in seleccion],
+                'materias_sin_grupo': sin_grupo + [
+                    mc.materia.codigo for mc in habilitadas
+                    if mc.id not in incluidas and mc.materia.codigo not in sin_grupo
+                ],
+            })
+        return resultados
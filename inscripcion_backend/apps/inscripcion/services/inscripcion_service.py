@@ -3,12 +3,17 @@ Gestión de inscripciones.
 """
 from typing import Optional, List
 from django.db import models
-from django.core.cache import cache
+import copy
 import hashlib
 import json
-from ..models import Inscripcion, PeriodoAcademico, MateriaCarreraSemestre, EstudianteCarrera
+from core.database.busqueda import filtro_subcadena, ordenar_por_similitud
+from core.utils.cache import obtener_o_calcular
+from core.utils.horario import codigo_dia, rango_turno
+from ..models import Inscripcion, PeriodoAcademico, Materia, MateriaCarreraSemestre, EstudianteCarrera
 from .periodo_service import PeriodoAcademicoService
 from .estudiante_service import EstudianteService
+from .catalogo_service import CatalogoService
+from .cupo_service import CupoService
 
 
 class InscripcionService:
@@ -24,10 +29,10 @@ class InscripcionService:
             return None
             
         try:
+            # El periodo ya está cargado; se asigna en lugar de unirlo en la consulta
             query = Inscripcion.objects.select_related(
                 'estudiante_carrera__estudiante', 
-                'estudiante_carrera__carrera',
-                'periodo_academico'
+                'estudiante_carrera__carrera'
             ).prefetch_related(
                 'materias_inscritas__materia'
             ).filter(
@@ -38,7 +43,10 @@ class InscripcionService:
             if codigo_carrera:
                 query = query.filter(estudiante_carrera__carrera__codigo=codigo_carrera)
             
-            return query.first()
+            inscripcion = query.first()
+            if inscripcion:
+                inscripcion.periodo_academico = periodo
+            return inscripcion
         except Inscripcion.DoesNotExist:
             return None
     
@@ -71,6 +79,31 @@ class InscripcionService:
         except Exception:
             return []
     
+    @staticmethod
+    def buscar_materias(texto: str, limite: int = 20) -> List[Materia]:
+        """
+        Buscar materias por código o nombre.
+        """
+        queryset = Materia.objects.filter(filtro_subcadena(['codigo', 'nombre'], texto))
+        return list(ordenar_por_similitud(queryset, ['nombre'], texto)[:limite])
+
+    @staticmethod
+    def buscar_ofertas(texto: str, codigo_periodo: Optional[str] = None, limite: int = 50) -> List:
+        """
+        Buscar ofertas del periodo por docente o nombre de materia.
+        """
+        from ..models import OfertaMateria
+
+        periodo = PeriodoAcademicoService.get_periodo(codigo_periodo)
+        if not periodo:
+            return []
+
+        campos = ['docente', 'materia_carrera__materia__nombre']
+        queryset = OfertaMateria.objects.filter(periodo=periodo).filter(
+            filtro_subcadena(campos, texto)
+        ).select_related('materia_carrera__materia', 'materia_carrera__carrera')
+        return list(ordenar_por_similitud(queryset, campos, texto)[:limite])
+
     @staticmethod
     def get_boleta_estudiante(estudiante_registro: str, codigo_periodo: Optional[str] = None, codigo_carrera: Optional[str] = None):
         """
@@ -83,6 +116,101 @@ class InscripcionService:
         
         return None
 
+    @staticmethod
+    def _catalogo_filtrado(periodo, codigo_materia, codigo_carrera, turno, docente, grupo, dia) -> models.QuerySet:
+        """
+        Ofertas del periodo que cumplen los filtros del catálogo, sin evaluar.
+        """
+        from ..models import OfertaMateria, HorarioOferta
+
+        catalogo = OfertaMateria.objects.filter(periodo=periodo)
+
+        if codigo_materia:
+            catalogo = catalogo.filter(materia_carrera__materia__codigo=codigo_materia)
+
+        if codigo_carrera:
+            catalogo = catalogo.filter(materia_carrera__carrera__codigo=codigo_carrera)
+
+        if grupo:
+            catalogo = catalogo.filter(grupo=grupo)
+
+        if docente:
+            if docente.upper() == "POR DESIGNAR":
+                catalogo = catalogo.filter(models.Q(docente__isnull=True) | models.Q(docente="") | models.Q(docente__iexact="Por designar"))
+            else:
+                # Por palabras, con el índice de trigramas de docente
+                catalogo = catalogo.filter(filtro_subcadena(['docente'], docente))
+
+        if turno:
+            # Alguno de sus bloques cae en el turno: 11:30-13:45 es de mañana y de tarde
+            rango = rango_turno(turno)
+            if rango is None:
+                return catalogo.none()
+            desde, hasta = rango
+            catalogo = catalogo.filter(
+                id__in=HorarioOferta.objects.filter(inicio_min__lt=hasta, fin_min__gt=desde).values('oferta_id')
+            )
+
+        if dia:
+            catalogo = catalogo.filter(
+                id__in=HorarioOferta.objects.filter(dia=codigo_dia(dia)).values('oferta_id')
+            )
+
+        return catalogo
+
+    @staticmethod
+    def get_ofertas_queryset(
+        codigo_materia: Optional[str] = None,
+        codigo_carrera: Optional[str] = None,
+        codigo_periodo: Optional[str] = None,
+        turno: Optional[str] = None,
+        tiene_cupo: Optional[bool] = None,
+        docente: Optional[str] = None,
+        grupo: Optional[str] = None,
+        registro: Optional[str] = None,
+        proceso: Optional[str] = 'Inscripción',
+        dia: Optional[str] = None
+    ) -> models.QuerySet:
+        """
+        Mismos filtros que get_ofertas_filtered como QuerySet sin evaluar,
+        para paginar en la base. tiene_cupo compara los contadores de la
+        base, que van unos segundos atrasados si los cupos viven en Redis;
+        los cupos de cada página se superponen con con_cupos_en_vivo.
+        """
+        from ..models import OfertaMateria, InscripcionMateria
+
+        periodo = PeriodoAcademicoService.get_periodo(codigo_periodo)
+        if not periodo:
+            return OfertaMateria.objects.none()
+
+        queryset = InscripcionService._catalogo_filtrado(
+            periodo, codigo_materia, codigo_carrera, turno, docente, grupo, dia
+        ).select_related('materia_carrera__materia', 'materia_carrera__carrera')
+
+        # Si es retiro, solo mostramos lo que ya tiene inscrito
+        if proceso == 'Retiro' and registro:
+            queryset = queryset.filter(id__in=InscripcionMateria.objects.filter(
+                inscripcion__estudiante_carrera__estudiante__registro=registro,
+                inscripcion__periodo_academico=periodo
+            ).values('oferta_id'))
+
+        if tiene_cupo is not None:
+            con_cupo = models.Q(cupo_actual__lt=models.F('cupo_maximo'))
+            queryset = queryset.filter(con_cupo if tiene_cupo else ~con_cupo)
+        return queryset
+
+    @staticmethod
+    def con_cupos_en_vivo(ofertas: List) -> List:
+        """
+        Reemplaza en las ofertas los cupos de la base por los del momento.
+        """
+        cupos = CupoService.disponibles(oferta.id for oferta in ofertas)
+        for oferta in ofertas:
+            if oferta.id in cupos:
+                oferta.cupo_maximo, oferta.cupo_actual = cupos[oferta.id]
+                oferta.cupos_en_vivo = True
+        return ofertas
+
     @staticmethod
     def get_ofertas_filtered(
         codigo_materia: Optional[str] = None,
@@ -93,84 +221,65 @@ class InscripcionService:
         docente: Optional[str] = None,
         grupo: Optional[str] = None,
         registro: Optional[str] = None,
-        proceso: Optional[str] = 'Inscripción'
+        proceso: Optional[str] = 'Inscripción',
+        dia: Optional[str] = None
     ) -> List:
         """
         Ofertas filtradas.
+
+        La caché guarda solo los IDs que cumplen los filtros del catálogo,
+        bajo la generación del periodo. Los datos de cada oferta salen de la
+        instantánea del periodo y los cupos se superponen al momento.
         """
-        cache_key_data = {
-            'm': codigo_materia, 'c': codigo_carrera, 'p': codigo_periodo,
-            't': turno, 'cupo': tiene_cupo, 'doc': docente, 'g': grupo,
-            'reg': registro, 'proc': proceso
-        }
-        hash_str = hashlib.md5(json.dumps(cache_key_data, sort_keys=True).encode('utf-8')).hexdigest()
-        cache_key = f'ofertas_materias_filter_{hash_str}'
-        
-        result = cache.get(cache_key)
-        if result is not None:
-             return result
-             
-        from ..models import OfertaMateria, InscripcionMateria
-        
+        from ..models import InscripcionMateria
+
         if not codigo_periodo:
             periodo = PeriodoAcademico.objects.filter(activo=True).first()
         else:
             periodo = PeriodoAcademico.objects.filter(codigo=codigo_periodo).first()
-            
+
         if not periodo:
             return []
-            
-        queryset = OfertaMateria.objects.filter(periodo=periodo).select_related(
-            'materia_carrera__materia',
-            'materia_carrera__carrera'
-        )
+
+        cache_key_data = {
+            'm': codigo_materia, 'c': codigo_carrera, 't': turno,
+            'doc': docente, 'g': grupo, 'd': dia
+        }
+        hash_str = hashlib.md5(json.dumps(cache_key_data, sort_keys=True).encode('utf-8')).hexdigest()
+        generacion = CatalogoService.generacion(periodo.id)
+        cache_key = f'ofertas_ids_{periodo.id}_{generacion}_{hash_str}'
+
+        def filtrar_catalogo():
+            return list(InscripcionService._catalogo_filtrado(
+                periodo, codigo_materia, codigo_carrera, turno, docente, grupo, dia
+            ).values_list('id', flat=True))
+
+        ids = obtener_o_calcular(cache_key, filtrar_catalogo, 3600)
+
+        catalogo = CatalogoService.instantanea(periodo.id, generacion)
+        ids = [i for i in ids if i in catalogo]
 
         # Si es retiro, solo mostramos lo que ya tiene inscrito
         if proceso == 'Retiro' and registro:
-            queryset = queryset.filter(
-                id__in=InscripcionMateria.objects.filter(
+            inscritas = set(
+                InscripcionMateria.objects.filter(
                     inscripcion__estudiante_carrera__estudiante__registro=registro,
                     inscripcion__periodo_academico=periodo
                 ).values_list('oferta_id', flat=True)
             )
-        
-        if codigo_materia:
-            queryset = queryset.filter(materia_carrera__materia__codigo=codigo_materia)
-            
-        if codigo_carrera:
-            queryset = queryset.filter(materia_carrera__carrera__codigo=codigo_carrera)
-            
-        if grupo:
-            queryset = queryset.filter(grupo=grupo)
-            
-        if docente:
-            if docente.upper() == "POR DESIGNAR":
-                queryset = queryset.filter(models.Q(docente__isnull=True) | models.Q(docente="") | models.Q(docente__iexact="Por designar"))
-            else:
-                queryset = queryset.filter(docente__icontains=docente)
-                
-        if tiene_cupo is not None:
-            if tiene_cupo:
-                queryset = queryset.filter(cupo_actual__lt=models.F('cupo_maximo'))
-            else:
-                queryset = queryset.filter(cupo_actual__gte=models.F('cupo_maximo'))
-                
-        if turno:
-            turno = turno.upper()
-            if turno == "MAÑANA":
-                queryset = queryset.filter(horario__icontains="07:") | queryset.filter(horario__icontains="08:") | \
-                           queryset.filter(horario__icontains="09:") | queryset.filter(horario__icontains="10:") | \
-                           queryset.filter(horario__icontains="11:")
-            elif turno == "TARDE":
-                queryset = queryset.filter(horario__icontains="12:") | queryset.filter(horario__icontains="13:") | \
-                           queryset.filter(horario__icontains="14:") | queryset.filter(horario__icontains="15:") | \
-                           queryset.filter(horario__icontains="16:") | queryset.filter(horario__icontains="17:")
-            elif turno == "NOCHE":
-                queryset = queryset.filter(horario__icontains="18:") | queryset.filter(horario__icontains="19:") | \
-                           queryset.filter(horario__icontains="20:") | queryset.filter(horario__icontains="21:") | \
-                           queryset.filter(horario__icontains="22:")
-
-        ofertas = list(queryset)
-        cache.set(cache_key, ofertas, 300)
-        
+            ids = [i for i in ids if i in inscritas]
+
+        cupos = CupoService.disponibles(ids)
+        ofertas = []
+        for oferta_id in ids:
+            if oferta_id not in cupos:
+                continue
+            maximo, actual = cupos[oferta_id]
+            if tiene_cupo is not None and (actual < maximo) != tiene_cupo:
+                continue
+            # Copia: la instantánea se comparte entre peticiones del proceso
+            oferta = copy.copy(catalogo[oferta_id])
+            oferta.cupo_maximo, oferta.cupo_actual = maximo, actual
+            oferta.cupos_en_vivo = True
+            ofertas.append(oferta)
         return ofertas
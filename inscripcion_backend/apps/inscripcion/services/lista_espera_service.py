@@ -0,0 +1,160 @@
+"""
+Lista de espera de ofertas llenas con promoción automática.
+"""
+from collections import Counter
+from datetime import timedelta
+from typing import Iterable, List, Tuple
+from django.conf import settings
+from django.utils import timezone
+from core.database.candados import adquirir_candado, INSCRIPCION_ESTUDIANTE
+from ..models import (
+    Bloqueo, EstudianteCarrera, Inscripcion, InscripcionMateria, ListaEspera, OfertaMateria
+)
+
+
+class ListaEsperaService:
+    """Registro en lista de espera y traspaso de cupos liberados."""
+
+    @staticmethod
+    def posicion(entrada: ListaEspera) -> int:
+        """
+        Posición (desde 1) de una entrada que sigue esperando.
+        """
+        return ListaEspera.objects.filter(
+            oferta_id=entrada.oferta_id, estado='ESPERANDO', id__lte=entrada.id
+        ).count()
+
+    @staticmethod
+    def registrar(registro: str, codigo_carrera: str, oferta_ids: Iterable[int]) -> List[Tuple[str, int]]:
+        """
+        Anota al estudiante en la lista de espera de cada oferta.
+        Devuelve (código de materia, posición) por oferta.
+        """
+        est_carrera = EstudianteCarrera.objects.get(
+            estudiante__registro=registro,
+            carrera__codigo=codigo_carrera,
+            activa=True
+        )
+        ofertas = OfertaMateria.objects.filter(id__in=list(oferta_ids)).select_related('materia_carrera__materia')
+
+        posiciones = []
+        for oferta in ofertas:
+            entrada, _ = ListaEspera.objects.get_or_create(
+                oferta=oferta, estudiante_carrera=est_carrera, estado='ESPERANDO'
+            )
+            posiciones.append((oferta.materia_carrera.materia.codigo, ListaEsperaService.posicion(entrada)))
+        return posiciones
+
+    @staticmethod
+    def cancelar(estudiante_carrera: EstudianteCarrera, oferta_ids: Iterable[int]) -> int:
+        """
+        Saca al estudiante de la lista de espera de esas ofertas.
+        """
+        return ListaEspera.objects.filter(
+            estudiante_carrera=estudiante_carrera, oferta_id__in=list(oferta_ids), estado='ESPERANDO'
+        ).update(estado='CANCELADA')
+
+    @staticmethod
+    def cancelar_materias(estudiante_carrera: EstudianteCarrera, oferta_ids: Iterable[int]) -> int:
+        """
+        Saca al estudiante de la lista de espera de todos los grupos de las
+        materias de esas ofertas, porque ya tiene uno.
+        """
+        return ListaEspera.objects.filter(
+            estudiante_carrera=estudiante_carrera,
+            oferta__materia_carrera__in=OfertaMateria.objects.filter(
+                id__in=list(oferta_ids)
+            ).values('materia_carrera'),
+            estado='ESPERANDO'
+        ).update(estado='CANCELADA')
+
+    @staticmethod
+    def promover(conteos: Counter) -> Counter:
+        """
+        Traspasa los cupos liberados a los primeros de cada lista de espera,
+        en la transacción de quien libera. Devuelve los cupos que no se
+        traspasaron y deben liberarse.
+        """
+        con_espera = set(
+            # Sin el orden por defecto del modelo, que agrega joins y rompe el DISTINCT
+            ListaEspera.objects.filter(oferta_id__in=list(conteos), estado='ESPERANDO')
+            .order_by().values_list('oferta_id', flat=True).distinct()
+        )
+        if not con_espera:
+            return conteos
+
+        restantes = Counter(conteos)
+        for oferta_id in sorted(con_espera):
+            vistas = set()
+            while restantes[oferta_id] > 0:
+                entradas = list(
+                    ListaEspera.objects.select_for_update(skip_locked=True)
+                    .filter(oferta_id=oferta_id, estado='ESPERANDO')
+                    .exclude(id__in=vistas)
+                    .select_related('oferta__materia_carrera__materia', 'estudiante_carrera__estudiante')
+                    .order_by('id')[:restantes[oferta_id]]
+                )
+                if not entradas:
+                    break
+                for entrada in entradas:
+                    vistas.add(entrada.id)
+                    if ListaEsperaService._promover_entrada(entrada):
+                        restantes[oferta_id] -= 1
+        return +restantes
+
+    @staticmethod
+    def _promover_entrada(entrada: ListaEspera) -> bool:
+        """
+        Inscribe al estudiante en la oferta con reserva pendiente de pago.
+        Si la inscripción ya está pagada solo la materia promovida queda
+        pendiente, con su propio vencimiento.
+        """
+        est_carrera = entrada.estudiante_carrera
+        oferta = entrada.oferta
+
+        # Si el estudiante tiene otra solicitud en curso queda en espera
+        if not adquirir_candado(INSCRIPCION_ESTUDIANTE, est_carrera.estudiante.registro):
+            return False
+
+        if Bloqueo.objects.filter(estudiante_carrera=est_carrera, activo=True).exists():
+            entrada.estado = 'CANCELADA'
+            entrada.save(update_fields=['estado'])
+            return False
+
+        inscripcion, _ = Inscripcion.objects.select_for_update().get_or_create(
+            estudiante_carrera=est_carrera,
+            periodo_academico_id=oferta.periodo_id,
+            defaults={
+                'fecha_inscripcion_asignada': timezone.now().date(),
+                'estado': 'PENDIENTE_PAGO',
+            }
+        )
+        if inscripcion.estado == 'CANCELADA':
+            # Los cupos de una inscripción cancelada ya fueron liberados
+            inscripcion.materias_inscritas.all().delete()
+        elif inscripcion.materias_inscritas.filter(oferta__materia_carrera_id=oferta.materia_carrera_id).exists():
+            # Ya tiene esta oferta u otro grupo de la misma materia
+            entrada.estado = 'CANCELADA'
+            entrada.save(update_fields=['estado'])
+            return False
+
+        ahora = timezone.now()
+        vence = ahora + timedelta(minutes=settings.INSCRIPCION_MINUTOS_PAGO)
+        confirmada = inscripcion.estado == 'CONFIRMADA'
+        InscripcionMateria.objects.create(
+            inscripcion=inscripcion,
+            oferta=oferta,
+            materia=oferta.materia_carrera.materia,
+            grupo=oferta.grupo,
+            reserva_expira_en=vence if confirmada else None,
+        )
+        if not confirmada:
+            inscripcion.estado = 'PENDIENTE_PAGO'
+            inscripcion.fecha_inscripcion_realizada = ahora
+            inscripcion.reserva_expira_en = vence
+            inscripcion.save(update_fields=['estado', 'fecha_inscripcion_realizada', 'reserva_expira_en'])
+
+        entrada.estado = 'PROMOVIDA'
+        entrada.promovida_en = ahora
+        entrada.save(update_fields=['estado', 'promovida_en'])
+        return True
@@ -0,0 +1,96 @@
+"""
+Cola de solicitudes de inscripción para procesamiento por lotes.
+"""
+import json
+import time
+from typing import Any, Dict, List, Optional
+from django.conf import settings
+
+
+class LoteInscripcionService:
+    """Encolado en Redis de solicitudes por partición."""
+
+    PREFIJO_COLA = 'inscripcion:lote:'
+
+    @staticmethod
+    def habilitado() -> bool:
+        """
+        Procesamiento por lotes activo.
+        """
+        return getattr(settings, 'INSCRIPCION_LOTES', False)
+
+    @staticmethod
+    def _conexion():
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+
+    @staticmethod
+    def _cola(particion: int) -> str:
+        return f'{LoteInscripcionService.PREFIJO_COLA}{particion}'
+
+    @staticmethod
+    def encolar(
+        task_id: str, registro: str, codigo_carrera: str, oferta_ids: List[int], proceso: str,
+        ficha: Optional[str] = None
+    ) -> int:
+        """
+        Agrega la solicitud a la cola de su partición y lanza un consumidor.
+        Devuelve la partición usada.
+        """
+        from ..routers import particion_carrera
+        from ..tasks import procesar_lote_inscripciones
+
+        particion = particion_carrera(codigo_carrera)
+        LoteInscripcionService._conexion().rpush(
+            LoteInscripcionService._cola(particion),
+            json.dumps({
+                'task_id': task_id,
+                'registro': registro,
+                'codigo_carrera': codigo_carrera,
+                'oferta_ids': oferta_ids,
+                'proceso': proceso,
+                'ficha': ficha,
+            })
+        )
+        procesar_lote_inscripciones.apply_async((particion,))
+        return particion
+
+    @staticmethod
+    def devolver(particion: int, solicitudes: List[Dict[str, Any]]) -> None:
+        """
+        Vuelve a poner al frente de la cola solicitudes cuyo estudiante
+        estaba ocupado por otra transacción, y lanza un consumidor que las
+        toma tras INSCRIPCION_LOTE_ESPERA_MS.
+        """
+        from ..tasks import procesar_lote_inscripciones
+
+        LoteInscripcionService._conexion().lpush(
+            LoteInscripcionService._cola(particion),
+            *(json.dumps(s) for s in reversed(solicitudes))
+        )
+        procesar_lote_inscripciones.apply_async(
+            (particion,), countdown=settings.INSCRIPCION_LOTE_ESPERA_MS / 1000
+        )
+
+    @staticmethod
+    def extraer(particion: int, maximo: Optional[int] = None, espera_ms: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Toma hasta `maximo` solicitudes en orden de llegada, esperando como
+        mucho `espera_ms` a que se complete el lote.
+        """
+        maximo = maximo or settings.INSCRIPCION_LOTE_MAXIMO
+        espera_ms = settings.INSCRIPCION_LOTE_ESPERA_MS if espera_ms is None else espera_ms
+        redis = LoteInscripcionService._conexion()
+        cola = LoteInscripcionService._cola(particion)
+        limite = time.monotonic() + espera_ms / 1000
+
+        solicitudes = []
+        while len(solicitudes) < maximo:
+            crudas = redis.lpop(cola, maximo - len(solicitudes)) or []
+            solicitudes.extend(json.loads(c) for c in crudas)
+            # Cola vacía al inicio: otro consumidor ya tomó estas solicitudes
+            if not solicitudes or time.monotonic() >= limite:
+                break
+            if len(crudas) == 0:
+                time.sleep(0.002)
+        return solicitudes
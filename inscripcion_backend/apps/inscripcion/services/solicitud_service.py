@@ -0,0 +1,184 @@
+"""
+Envío de solicitudes de inscripción a la cola de tareas.
+"""
+import hashlib
+import uuid
+from typing import Any, Dict, Iterable, Optional
+from django.conf import settings
+from django.core.cache import cache
+from .estado_solicitud_service import EstadoSolicitudService
+from .lote_inscripcion_service import LoteInscripcionService
+
+# Borra la clave de idempotencia solo si todavía guarda la tarea dada
+SOLTAR_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class SolicitudInscripcionService:
+    """Encolado idempotente de inscripciones."""
+
+    PREFIJO = 'inscripcion:solicitud:'
+
+    @staticmethod
+    def clave_idempotencia(registro: str, codigo_carrera: str, oferta_ids: Iterable[int], proceso: str) -> str:
+        """
+        Hash estable de la solicitud.
+        """
+        ofertas = ','.join(str(i) for i in sorted(set(oferta_ids)))
+        base = f"{registro}|{codigo_carrera}|{ofertas}|{proceso}"
+        return hashlib.sha256(base.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _redis():
+        """
+        Conexión Redis si la caché es django_redis; None con caché local.
+        """
+        if 'django_redis' not in settings.CACHES['default']['BACKEND']:
+            return None
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+
+    @staticmethod
+    def _reclamar(cache_key: str, task_id: str) -> Optional[str]:
+        """
+        Registra `task_id` bajo la clave si está libre. Devuelve la tarea que
+        ya la tenía, o None si quedó registrada.
+        """
+        ttl = settings.INSCRIPCION_IDEMPOTENCIA_TTL
+        redis = SolicitudInscripcionService._redis()
+        while True:
+            if redis is not None:
+                if redis.set(cache_key, task_id, nx=True, ex=ttl):
+                    return None
+                existente = redis.get(cache_key)
+                existente = existente.decode('utf-8') if existente else None
+            else:
+                if cache.add(cache_key, task_id, ttl):
+                    return None
+                existente = cache.get(cache_key)
+            if existente:
+                return existente
+            # La clave expiró entre el registro y la lectura: se reintenta
+
+    @staticmethod
+    def _soltar(cache_key: str, task_id: str) -> None:
+        """
+        Borra la clave solo si sigue en manos de `task_id`.
+        """
+        redis = SolicitudInscripcionService._redis()
+        if redis is not None:
+            redis.register_script(SOLTAR_LUA)(keys=[cache_key], args=[task_id])
+        elif cache.get(cache_key) == task_id:
+            cache.delete(cache_key)
+
+    @staticmethod
+    def enviar(
+        registro: str,
+        codigo_carrera: str,
+        oferta_ids: Iterable[int],
+        proceso: str = 'Inscripción',
+        clave: Optional[str] = None,
+        ficha: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Encola la inscripción una sola vez por clave de idempotencia, como
+        tarea propia o dentro de un lote si INSCRIPCION_LOTES está activo.
+        Los reintentos devuelven la tarea existente y, si ya terminó, su
+        resultado; la clave se libera antes del TTL solo si la solicitud
+        falla o si otra solicitud del estudiante se aplica después (ver
+        terminar). La ficha de admisión viaja con la solicitud para que la
+        tarea la vuelva a comprobar.
+        """
+        from ..tasks import procesar_inscripcion_asincrona
+
+        oferta_ids = list(oferta_ids)
+        clave = clave or SolicitudInscripcionService.clave_idempotencia(
+            registro, codigo_carrera, oferta_ids, proceso
+        )
+        cache_key = f'{SolicitudInscripcionService.PREFIJO}{clave}'
+        task_id = str(uuid.uuid4())
+
+        existente = SolicitudInscripcionService._reclamar(cache_key, task_id)
+        if existente:
+            return {
+                'task_id': existente,
+                'duplicada': True,
+                'resultado': SolicitudInscripcionService.resultado(existente),
+            }
+        cache.set(
+            SolicitudInscripcionService._clave_tarea(task_id),
+            (cache_key, registro, codigo_carrera),
+            settings.INSCRIPCION_IDEMPOTENCIA_TTL
+        )
+
+        EstadoSolicitudService.encolada(task_id)
+        if LoteInscripcionService.habilitado():
+            LoteInscripcionService.encolar(task_id, registro, codigo_carrera, oferta_ids, proceso, ficha)
+        else:
+            procesar_inscripcion_asincrona.apply_async(
+                (registro, codigo_carrera, oferta_ids, proceso),
+                {'ficha': ficha},
+                task_id=task_id
+            )
+        return {'task_id': task_id, 'duplicada': False, 'resultado': None}
+
+    @staticmethod
+    def _clave_tarea(task_id: str) -> str:
+        return f'{SolicitudInscripcionService.PREFIJO}tarea:{task_id}'
+
+    @staticmethod
+    def _clave_aplicada(registro: str, codigo_carrera: str) -> str:
+        return f'{SolicitudInscripcionService.PREFIJO}aplicada:{registro}:{codigo_carrera}'
+
+    @staticmethod
+    def terminar(task_id: Optional[str], ok: bool) -> None:
+        """
+        Cierra la clave de idempotencia de una solicitud terminada.
+
+        Si falló, la libera para que la misma selección pueda reintentarse.
+        Si se aplicó, la clave queda hasta su TTL (los reintentos reciben el
+        resultado) y se libera la de la solicitud aplicada anterior del
+        estudiante: tras un Retiro, volver a enviar la misma selección es
+        una solicitud nueva.
+        """
+        if not task_id:
+            return
+        clave_tarea = SolicitudInscripcionService._clave_tarea(task_id)
+        datos = cache.get(clave_tarea)
+        cache.delete(clave_tarea)
+        if not datos:
+            return
+        cache_key, registro, codigo_carrera = datos
+
+        if not ok:
+            SolicitudInscripcionService._soltar(cache_key, task_id)
+            return
+
+        clave_aplicada = SolicitudInscripcionService._clave_aplicada(registro, codigo_carrera)
+        anterior = cache.get(clave_aplicada)
+        cache.set(clave_aplicada, (cache_key, task_id), settings.INSCRIPCION_IDEMPOTENCIA_TTL)
+        if anterior and anterior[0] != cache_key:
+            SolicitudInscripcionService._soltar(*anterior)
+
+    @staticmethod
+    def resultado(task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Resultado final de una solicitud, o None si sigue en proceso.
+        """
+        estado = EstadoSolicitudService.obtener(task_id)
+        if estado is not None:
+            if estado['estado'] != EstadoSolicitudService.COMPLETADA:
+                return None
+            return {k: v for k, v in estado.items() if k != 'estado'}
+
+        # Tareas encoladas antes de existir el registro de estado
+        from celery.result import AsyncResult
+        try:
+            resultado = AsyncResult(task_id)
+            return resultado.result if resultado.ready() else None
+        except Exception:
+            return None
@@ -1,157 +1,304 @@
 import time
+from datetime import timedelta
 from celery import shared_task
+from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 
-@shared_task
-def procesar_inscripcion_asincrona(registro, codigo_carrera, oferta_ids, proceso='Inscripción'):
+from core.database.candados import adquirir_candado, INSCRIPCION_ESTUDIANTE
+
+
+def _vencimiento_reserva():
+    """
+    Momento en que vence una reserva sin pagar. La barre barrer_reservas_expiradas.
+    """
+    return timezone.now() + timedelta(minutes=settings.INSCRIPCION_MINUTOS_PAGO)
+
+
+def _rechazar_sin_cupo(ofertas, sin_cupo):
+    """
+    Revierte la transacción en curso y arma el mensaje de cupos llenos.
+    Las ofertas sin cupo se devuelven para anotar la lista de espera.
+    """
+    transaction.set_rollback(True)
+    codigos = [o.materia_carrera.materia.codigo for o in ofertas if o.id in sin_cupo]
+    return {
+        "ok": False,
+        "mensaje": f"Lo sentimos, los cupos se acaban de llenar en: {', '.join(codigos)}",
+        "sin_cupo": sorted(sin_cupo),
+    }
+
+
+def _materias_inscritas(inscripcion, ofertas):
+    """
+    Filas de InscripcionMateria para crear en bloque.
+    """
+    from .models import InscripcionMateria
+
+    return [
+        InscripcionMateria(
+            inscripcion=inscripcion,
+            oferta=oferta,
+            materia=oferta.materia_carrera.materia,
+            grupo=oferta.grupo,
+        )
+        for oferta in ofertas
+    ]
+
+
+def _procesar_inscripcion(registro, codigo_carrera, oferta_ids, proceso='Inscripción', espera=None, ficha=None):
+    """
+    Procesa una solicitud en su propio bloque atómico. Dentro de un lote es
+    un savepoint: si la solicitud se rechaza solo se revierte la suya.
+    Si faltó cupo el estudiante queda en la lista de espera de esas ofertas.
+    Si otra transacción tiene el candado del estudiante, el resultado trae
+    "ocupado" (ver _aplicar_inscripcion). Con la sala de espera activa la
+    ficha debe ser la que la mutación ligó a esta solicitud.
+    """
+    from .services.admision_service import AdmisionService
+    from .services.lista_espera_service import ListaEsperaService
+
+    if AdmisionService.habilitada() and not AdmisionService.usada(ficha, registro, codigo_carrera):
+        return {"ok": False, "mensaje": "Tu ficha de admisión no es válida. Vuelve a ingresar por la sala de espera."}
+
+    resultado = _aplicar_inscripcion(registro, codigo_carrera, oferta_ids, proceso, espera)
+    sin_cupo = resultado.pop("sin_cupo", None)
+    if sin_cupo:
+        with transaction.atomic():
+            posiciones = ListaEsperaService.registrar(registro, codigo_carrera, sin_cupo)
+        detalle = ', '.join(f"{codigo} (posición {posicion})" for codigo, posicion in posiciones)
+        resultado["mensaje"] += (
+            f". Quedaste en lista de espera: {detalle}. "
+            "Si se libera un cupo se te reservará automáticamente."
+        )
+    return resultado
+
+
+def _aplicar_inscripcion(registro, codigo_carrera, oferta_ids, proceso, espera=None):
+    """
+    Aplica la solicitud. Espera el candado del estudiante hasta `espera`
+    segundos (INSCRIPCION_ESPERA_CANDADO por defecto); los lotes pasan 0
+    para no frenar la transacción compartida.
+    """
     from .models import (
         Estudiante, EstudianteCarrera, PeriodoAcademico,
         Inscripcion, InscripcionMateria, OfertaMateria, Bloqueo
     )
-    try:
-        with transaction.atomic():
-            estudiante = Estudiante.objects.get(registro=registro)
+    from .services.cupo_service import CupoService
+    from .services.lista_espera_service import ListaEsperaService
+
+    with transaction.atomic():
+        # Una sola tarea por estudiante a la vez; las demás esperan brevemente
+        espera = settings.INSCRIPCION_ESPERA_CANDADO if espera is None else espera
+        if not adquirir_candado(INSCRIPCION_ESTUDIANTE, registro, espera):
+            return {
+                "ok": False,
+                "mensaje": "Ya se está procesando otra solicitud tuya. Intenta nuevamente en unos segundos.",
+                "ocupado": True,
+            }
+
+        estudiante = Estudiante.objects.get(registro=registro)
+        
+        est_carrera = EstudianteCarrera.objects.get(
+            estudiante=estudiante,
+            carrera__codigo=codigo_carrera,
+            activa=True
+        )
+
+        bloqueo = Bloqueo.objects.filter(estudiante_carrera=est_carrera, activo=True).first()
+        if bloqueo:
+            return {"ok": False, "mensaje": f"Inscripción rechazada: {bloqueo.motivo}"}
+
+        periodo = PeriodoAcademico.objects.filter(activo=True).first()
+        if not periodo:
+            return {"ok": False, "mensaje": "No hay un periodo académico activo."}
+
+        inscripcion, created = Inscripcion.objects.get_or_create(
+            estudiante_carrera=est_carrera,
+            periodo_academico=periodo,
+            defaults={
+                'fecha_inscripcion_asignada': timezone.now().date(),
+                'estado': 'PENDIENTE_PAGO',
+            }
+        )
+
+        if inscripcion.estado == 'CANCELADA':
+            # Los cupos de una inscripción cancelada ya fueron liberados
+            inscripcion.materias_inscritas.all().delete()
+
+        ofertas = list(
+            OfertaMateria.objects.filter(id__in=oferta_ids)
+            .select_related('materia_carrera__materia')
+        )
+        if len(ofertas) != len(set(oferta_ids)):
+            encontrados = [o.id for o in ofertas]
+            faltantes = [i for i in oferta_ids if i not in encontrados]
+            return {"ok": False, "mensaje": f"Algunas ofertas no fueron encontradas: {faltantes}"}
+
+        if proceso == 'Retiro':
+            # Retirar materias seleccionadas
+            inscritas = inscripcion.materias_inscritas.filter(oferta_id__in=oferta_ids)
+            ids_retirados = list(inscritas.values_list('oferta_id', flat=True))
+            n_retiradas = len(ids_retirados)
+
+            CupoService.liberar(ids_retirados)
+            inscritas.delete()
+            ListaEsperaService.cancelar(est_carrera, oferta_ids)
+            
+            # Actualizar estado de la inscripción si es necesario
+            inscripcion.fecha_inscripcion_realizada = timezone.now()
+            inscripcion.save(update_fields=['fecha_inscripcion_realizada'])
+
+            return {
+                "ok": True,
+                "mensaje": f"Retiro exitoso de {n_retiradas} materia{'s' if n_retiradas != 1 else ''}.",
+                "inscripcion_id": inscripcion.id
+            }
+
+        elif proceso == 'Adición':
+            # Adicionar materias sin borrar las anteriores
+            inscritas_ids = set(inscripcion.materias_inscritas.values_list('oferta_id', flat=True))
+            nuevas_ofertas = [o for o in ofertas if o.id not in inscritas_ids]
             
-            est_carrera = EstudianteCarrera.objects.get(
-                estudiante=estudiante,
-                carrera__codigo=codigo_carrera,
-                activa=True
+            if not nuevas_ofertas:
+                return {"ok": False, "mensaje": "Las materias seleccionadas ya están inscritas."}
+
+            InscripcionMateria.objects.bulk_create(
+                _materias_inscritas(inscripcion, nuevas_ofertas)
             )
+            
+            inscripcion.estado = 'PENDIENTE_PAGO'
+            inscripcion.fecha_inscripcion_realizada = timezone.now()
+            inscripcion.reserva_expira_en = _vencimiento_reserva()
+            inscripcion.save(update_fields=['estado', 'fecha_inscripcion_realizada', 'reserva_expira_en'])
 
-            bloqueo = Bloqueo.objects.filter(estudiante_carrera=est_carrera, activo=True).first()
-            if bloqueo:
-                return {"ok": False, "mensaje": f"Inscripción rechazada: {bloqueo.motivo}"}
-
-            periodo = PeriodoAcademico.objects.filter(activo=True).first()
-            if not periodo:
-                return {"ok": False, "mensaje": "No hay un periodo académico activo."}
-
-            inscripcion, created = Inscripcion.objects.get_or_create(
-                estudiante_carrera=est_carrera,
-                periodo_academico=periodo,
-                defaults={
-                    'fecha_inscripcion_asignada': timezone.now().date(),
-                    'estado': 'PENDIENTE_PAGO',
-                }
+            # La reserva va al final para retener los cupos el menor tiempo posible
+            sin_cupo = CupoService.reservar([o.id for o in nuevas_ofertas], inscripcion.id)
+            if sin_cupo:
+                return _rechazar_sin_cupo(ofertas, sin_cupo)
+            ListaEsperaService.cancelar_materias(est_carrera, [o.id for o in nuevas_ofertas])
+
+            n = len(nuevas_ofertas)
+            return {
+                "ok": True, 
+                "mensaje": f"Adición realizada. Tienes {settings.INSCRIPCION_MINUTOS_PAGO} minutos para completar el pago de {n} nueva{'s' if n != 1 else ''} materia{'s' if n != 1 else ''}.",
+                "inscripcion_id": inscripcion.id
+            }
+
+        else:  # Inscripción (Proceso regular)
+            # Solo se liberan y reservan las diferencias con la inscripción previa
+            anteriores_ids = set(
+                inscripcion.materias_inscritas.exclude(oferta=None).values_list('oferta_id', flat=True)
             )
+            solicitados_ids = {o.id for o in ofertas}
+            nuevas_ids = solicitados_ids - anteriores_ids
 
-            ofertas = OfertaMateria.objects.filter(id__in=oferta_ids)
-            if len(ofertas) != len(oferta_ids):
-                encontrados = list(ofertas.values_list('id', flat=True))
-                faltantes = [i for i in oferta_ids if i not in encontrados]
-                return {"ok": False, "mensaje": f"Algunas ofertas no fueron encontradas: {faltantes}"}
-
-            ofertas = OfertaMateria.objects.select_for_update().filter(id__in=oferta_ids)
-            sin_cupo = []
-            for oferta in ofertas:
-                if oferta.cupo_actual >= oferta.cupo_maximo:
-                    sin_cupo.append(oferta.materia_carrera.materia.codigo)
+            CupoService.liberar(anteriores_ids - solicitados_ids)
+            inscripcion.materias_inscritas.exclude(oferta_id__in=solicitados_ids).delete()
+
+            InscripcionMateria.objects.bulk_create(
+                _materias_inscritas(inscripcion, [o for o in ofertas if o.id in nuevas_ids])
+            )
+
+            inscripcion.estado = 'PENDIENTE_PAGO'
+            inscripcion.fecha_inscripcion_realizada = timezone.now()
+            inscripcion.reserva_expira_en = _vencimiento_reserva()
+            inscripcion.save(update_fields=['estado', 'fecha_inscripcion_realizada', 'reserva_expira_en'])
+
+            sin_cupo = CupoService.reservar(nuevas_ids, inscripcion.id)
             if sin_cupo:
-                return {"ok": False, "mensaje": f"Lo sentimos, los cupos se acaban de llenar en: {', '.join(sin_cupo)}"}
+                return _rechazar_sin_cupo(ofertas, sin_cupo)
+            ListaEsperaService.cancelar_materias(est_carrera, nuevas_ids)
 
-            if proceso == 'Retiro':
-                # Retirar materias seleccionadas
-                inscritas = inscripcion.materias_inscritas.filter(oferta_id__in=oferta_ids).select_related('oferta')
-                n_retiradas = inscritas.count()
-                
-                for mi in inscritas:
-                    if mi.oferta:
-                        oferta_update = OfertaMateria.objects.select_for_update().get(id=mi.oferta.id)
-                        if oferta_update.cupo_actual > 0:
-                            oferta_update.cupo_actual -= 1
-                            oferta_update.save(update_fields=['cupo_actual'])
-                
-                inscritas.delete()
-                
-                # Actualizar estado de la inscripción si es necesario
-                inscripcion.fecha_inscripcion_realizada = timezone.now()
-                inscripcion.save(update_fields=['fecha_inscripcion_realizada'])
-
-                return {
-                    "ok": True,
-                    "mensaje": f"Retiro exitoso de {n_retiradas} materia{'s' if n_retiradas != 1 else ''}.",
-                    "inscripcion_id": inscripcion.id
-                }
-
-            elif proceso == 'Adición':
-                # Adicionar materias sin borrar las anteriores
-                inscritas_ids = list(inscripcion.materias_inscritas.values_list('oferta_id', flat=True))
-                nuevas_ofertas = [o for o in ofertas if o.id not in inscritas_ids]
-                
-                if not nuevas_ofertas:
-                    return {"ok": False, "mensaje": "Las materias seleccionadas ya están inscritas."}
-
-                for oferta in nuevas_ofertas:
-                    InscripcionMateria.objects.create(
-                        inscripcion=inscripcion,
-                        oferta=oferta,
-                        materia=oferta.materia_carrera.materia,
-                        grupo=oferta.grupo,
-                    )
-                    oferta.cupo_actual += 1
-                    oferta.save(update_fields=['cupo_actual'])
-                
-                inscripcion.estado = 'PENDIENTE_PAGO'
-                inscripcion.fecha_inscripcion_realizada = timezone.now()
-                inscripcion.save(update_fields=['estado', 'fecha_inscripcion_realizada'])
-                
-                # Programar la liberación de cupos si no paga
-                liberar_cupos_por_impago.apply_async((inscripcion.id,), countdown=600)
-
-                n = len(nuevas_ofertas)
-                return {
-                    "ok": True, 
-                    "mensaje": f"Adición realizada. Tienes 10 minutos para completar el pago de {n} nueva{'s' if n != 1 else ''} materia{'s' if n != 1 else ''}.",
-                    "inscripcion_id": inscripcion.id
-                }
-
-            else:  # Inscripción (Proceso regular)
-                # Liberar cupos de las materias anteriores si ya existía una inscripción previa
-                inscripciones_anteriores = inscripcion.materias_inscritas.select_related('oferta').all()
-                for ia in inscripciones_anteriores:
-                    if ia.oferta:
-                        oferta_vieja = OfertaMateria.objects.select_for_update().get(id=ia.oferta.id)
-                        if oferta_vieja.cupo_actual > 0:
-                            oferta_vieja.cupo_actual -= 1
-                            oferta_vieja.save(update_fields=['cupo_actual'])
-                
-                inscripciones_anteriores.delete()
-
-                for oferta in ofertas:
-                    InscripcionMateria.objects.create(
-                        inscripcion=inscripcion,
-                        oferta=oferta,
-                        materia=oferta.materia_carrera.materia,
-                        grupo=oferta.grupo,
-                    )
-                    oferta.cupo_actual += 1
-                    oferta.save(update_fields=['cupo_actual'])
+            n = len(oferta_ids)
+            return {
+                "ok": True, 
+                "mensaje": f"Reserva realizada. Tienes {settings.INSCRIPCION_MINUTOS_PAGO} minutos para completar el pago de {n} materia{'s' if n != 1 else ''}.",
+                "inscripcion_id": inscripcion.id
+            }
 
-                inscripcion.estado = 'PENDIENTE_PAGO'
-                inscripcion.fecha_inscripcion_realizada = timezone.now()
-                inscripcion.save(update_fields=['estado', 'fecha_inscripcion_realizada'])
-                
-                # Programar la liberación de cupos
-                liberar_cupos_por_impago.apply_async((inscripcion.id,), countdown=600)
 
-                n = len(oferta_ids)
-                return {
-                    "ok": True, 
-                    "mensaje": f"Reserva realizada. Tienes 10 minutos para completar el pago de {n} materia{'s' if n != 1 else ''}.",
-                    "inscripcion_id": inscripcion.id
-                }
+def _completar(task_id, resultado):
+    """
+    Publica el resultado y cierra la clave de idempotencia de la solicitud.
+    """
+    from .services.estado_solicitud_service import EstadoSolicitudService
+    from .services.solicitud_service import SolicitudInscripcionService
+
+    EstadoSolicitudService.completar(task_id, resultado)
+    SolicitudInscripcionService.terminar(task_id, bool(resultado.get('ok')))
+
 
+@shared_task(bind=True)
+def procesar_inscripcion_asincrona(self, registro, codigo_carrera, oferta_ids, proceso='Inscripción', ficha=None):
+    from .services.estado_solicitud_service import EstadoSolicitudService
+
+    EstadoSolicitudService.procesando(self.request.id)
+    try:
+        resultado = _procesar_inscripcion(registro, codigo_carrera, oferta_ids, proceso, ficha=ficha)
+        resultado.pop("ocupado", None)
     except Exception as e:
-        return {"ok": False, "mensaje": f"Error asíncrono: {str(e)}"}
+        resultado = {"ok": False, "mensaje": f"Error asíncrono: {str(e)}"}
+    _completar(self.request.id, resultado)
+    return resultado
+
+
+@shared_task
+def procesar_lote_inscripciones(particion):
+    """
+    Procesa en una sola transacción las solicitudes pendientes de una
+    partición, en orden de llegada, y publica el resultado de cada una.
+    El candado de cada estudiante se intenta sin esperar: si lo tiene otra
+    transacción la solicitud vuelve a la cola, hasta agotar
+    INSCRIPCION_ESPERA_CANDADO desde el primer intento.
+    """
+    from .services.lote_inscripcion_service import LoteInscripcionService
+
+    solicitudes = LoteInscripcionService.extraer(particion)
+    if not solicitudes:
+        return "Sin solicitudes pendientes."
+
+    resultados, devueltas = [], []
+    try:
+        with transaction.atomic():
+            for s in solicitudes:
+                try:
+                    resultado = _procesar_inscripcion(
+                        s['registro'], s['codigo_carrera'], s['oferta_ids'], s['proceso'], espera=0,
+                        ficha=s.get('ficha')
+                    )
+                except Exception as e:
+                    resultado = {"ok": False, "mensaje": f"Error asíncrono: {str(e)}"}
+                if resultado.pop("ocupado", False):
+                    s.setdefault('hasta', time.time() + settings.INSCRIPCION_ESPERA_CANDADO)
+                    if time.time() < s['hasta']:
+                        devueltas.append(s)
+                        continue
+                resultados.append((s['task_id'], resultado))
+    except Exception as e:
+        # Falló el commit del lote: ninguna solicitud quedó aplicada
+        resultados = [
+            (s['task_id'], {"ok": False, "mensaje": f"Error asíncrono: {str(e)}"})
+            for s in solicitudes
+        ]
+        devueltas = []
+
+    if devueltas:
+        LoteInscripcionService.devolver(particion, devueltas)
+    for task_id, resultado in resultados:
+        _completar(task_id, resultado)
+    return f"{len(resultados)} solicitudes procesadas en lote; {len(devueltas)} devueltas a la cola."
 
 
 @shared_task
 def liberar_cupos_por_impago(inscripcion_id):
     """
     Libera los cupos de una inscripción si no ha sido confirmada (pagada) en el tiempo límite.
+    Se mantiene para los mensajes ya encolados; las reservas nuevas las
+    cancela barrer_reservas_expiradas.
     """
-    from .models import Inscripcion, OfertaMateria
+    from .models import Inscripcion
+    from .services.cupo_service import CupoService
     
     try:
         with transaction.atomic():
@@ -160,17 +307,16 @@ def liberar_cupos_por_impago(inscripcion_id):
             # Solo liberamos si sigue pendiente de pago
             if inscripcion.estado == 'PENDIENTE_PAGO':
                 print(f"Liberando cupos por impago para inscripción {inscripcion_id}")
-                
-                materias_inscritas = inscripcion.materias_inscritas.select_related('oferta').all()
-                for mi in materias_inscritas:
-                    if mi.oferta:
-                        oferta = OfertaMateria.objects.select_for_update().get(id=mi.oferta.id)
-                        if oferta.cupo_actual > 0:
-                            oferta.cupo_actual -= 1
-                            oferta.save(update_fields=['cupo_actual'])
+                oferta_ids = list(
+                    inscripcion.materias_inscritas.exclude(oferta=None).values_list('oferta_id', flat=True)
+                )
                 
                 inscripcion.estado = 'CANCELADA'
-                inscripcion.save(update_fields=['estado'])
+                inscripcion.reserva_expira_en = None
+                inscripcion.save(update_fields=['estado', 'reserva_expira_en'])
+
+                # Después de cancelar, para que la lista de espera vea el estado final
+                CupoService.liberar(oferta_ids)
                 return f"Inscripción {inscripcion_id} cancelada por falta de pago. Cupos liberados."
             
             return f"Inscripción {inscripcion_id} ya se encuentra en estado {inscripcion.estado}. No se requiere limpieza."
@@ -179,3 +325,85 @@ def liberar_cupos_por_impago(inscripcion_id):
         return f"Error: Inscripción {inscripcion_id} no encontrada."
     except Exception as e:
         return f"Error en liberar_cupos_por_impago: {str(e)}"
+
+
+@shared_task
+def barrer_reservas_expiradas(lote=None):
+    """
+    Cancela en bloque las inscripciones PENDIENTE_PAGO cuya reserva venció
+    y libera sus cupos con actualizaciones agrupadas. También retira las
+    materias promovidas sin pagar de inscripciones ya confirmadas.
+    """
+    from .models import Inscripcion, InscripcionMateria
+    from .services.cupo_service import CupoService
+
+    lote = lote or settings.RESERVAS_EXPIRADAS_LOTE
+    total = 0
+
+    while True:
+        with transaction.atomic():
+            ids = list(
+                Inscripcion.objects.select_for_update(skip_locked=True)
+                .filter(estado='PENDIENTE_PAGO', reserva_expira_en__lte=timezone.now())
+                .values_list('id', flat=True)[:lote]
+            )
+            if not ids:
+                break
+
+            oferta_ids = list(
+                InscripcionMateria.objects.filter(inscripcion_id__in=ids)
+                .exclude(oferta=None).values_list('oferta_id', flat=True)
+            )
+            Inscripcion.objects.filter(id__in=ids).update(estado='CANCELADA', reserva_expira_en=None)
+            CupoService.liberar(oferta_ids)
+        total += len(ids)
+
+        if len(ids) < lote:
+            break
+
+    materias = 0
+    while True:
+        with transaction.atomic():
+            # En inscripciones no confirmadas manda el vencimiento de la inscripción
+            vencidas = list(
+                InscripcionMateria.objects.select_for_update(skip_locked=True)
+                .filter(reserva_expira_en__lte=timezone.now(), inscripcion__estado='CONFIRMADA')
+                .values_list('id', 'oferta_id')[:lote]
+            )
+            if not vencidas:
+                break
+
+            InscripcionMateria.objects.filter(id__in=[i for i, _ in vencidas]).delete()
+            CupoService.liberar([oferta_id for _, oferta_id in vencidas if oferta_id])
+        materias += len(vencidas)
+
+        if len(vencidas) < lote:
+            break
+
+    return f"{total} inscripciones canceladas y {materias} materias retiradas por falta de pago."
+
+
+@shared_task
+def sincronizar_cupos_redis():
+    """
+    Persiste en OfertaMateria los contadores de cupos mantenidos en Redis.
+    """
+    from .services.cupo_redis_service import CupoRedisService
+
+    if not CupoRedisService.habilitado():
+        return "Contadores de cupos en Redis deshabilitados."
+
+    retenciones = CupoRedisService.liberar_retenciones_vencidas()
+    total = CupoRedisService.sincronizar()
+    return f"{total} ofertas sincronizadas desde Redis; {retenciones} reservas no confirmadas devueltas."
+
+
+@shared_task
+def recalcular_cupos_tokens():
+    """
+    Recalcula cupo_actual de las ofertas en modo tokens.
+    """
+    from .services.cupo_token_service import CupoTokenService
+
+    total = CupoTokenService.recalcular()
+    return f"{total} ofertas en modo tokens recalculadas."
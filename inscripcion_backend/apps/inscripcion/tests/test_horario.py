@@ -0,0 +1,58 @@
+"""
+Turno de las ofertas: el filtro del catálogo incluye una oferta si alguno
+de sus bloques cae en el turno.
+"""
+import datetime
+
+from django.test import TestCase
+
+from apps.inscripcion.models import (
+    Carrera, Materia, MateriaCarreraSemestre, OfertaMateria, PeriodoAcademico, PlanEstudios
+)
+from apps.inscripcion.services import InscripcionService
+from core.utils.horario import parsear_horario, rango_turno, turno_de
+
+
+class TurnoOfertaTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.periodo = PeriodoAcademico.objects.create(
+            codigo='1/2026', nombre='1-2026', tipo='1/2026', fecha_inicio=datetime.date(2026, 2, 1),
+            fecha_fin=datetime.date(2026, 6, 30), activo=True,
+        )
+        carrera = Carrera.objects.create(codigo='187', nombre='Sistemas', facultad='F', duracion_semestres=10)
+        plan = PlanEstudios.objects.create(carrera=carrera, codigo='P1', nombre='Plan', anio_vigencia=2020)
+        materia = Materia.objects.create(codigo='INF110', nombre='Introducción', creditos=4)
+        mcs = MateriaCarreraSemestre.objects.create(carrera=carrera, plan_estudios=plan, materia=materia, semestre=1)
+        horarios = {
+            'A': 'LU-MI 07:00-09:15',
+            'B': 'MA-JU 11:30-13:45',
+            'C': 'LU 08:00-10:00, VI 19:00-21:00',
+            'D': 'HORARIO A CONFIRMAR',
+        }
+        for grupo, horario in horarios.items():
+            OfertaMateria.objects.create(materia_carrera=mcs, periodo=cls.periodo, grupo=grupo, horario=horario)
+
+    def grupos(self, turno):
+        catalogo = InscripcionService._catalogo_filtrado(self.periodo, None, None, turno, None, None, None)
+        return sorted(catalogo.values_list('grupo', flat=True))
+
+    def test_filtro_incluye_cualquier_bloque_del_turno(self):
+        self.assertEqual(self.grupos('Mañana'), ['A', 'B', 'C'])
+        self.assertEqual(self.grupos('TARDE'), ['B'])
+        self.assertEqual(self.grupos('noche'), ['C'])
+        self.assertEqual(self.grupos('madrugada'), [])
+
+    def test_turno_principal_es_el_del_inicio_mas_temprano(self):
+        self.assertEqual(
+            dict(OfertaMateria.objects.values_list('grupo', 'turno')),
+            {'A': 'MANANA', 'B': 'MANANA', 'C': 'MANANA', 'D': None},
+        )
+        self.assertEqual(turno_de(parsear_horario('Sabado 18:30-21:00')), 'NOCHE')
+
+    def test_rango_turno(self):
+        self.assertEqual(rango_turno('MANANA'), (0, 12 * 60))
+        self.assertEqual(rango_turno('Tarde'), (12 * 60, 18 * 60))
+        self.assertEqual(rango_turno('NOCHE'), (18 * 60, 24 * 60))
+        self.assertIsNone(rango_turno(None))
@@ -0,0 +1,127 @@
+"""
+Las consultas que emiten los servicios y tareas usan los índices previstos
+(ver verificar_indices), sobre una base con datos.
+"""
+import datetime
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.inscripcion.management.commands.verificar_indices import (
+    _datos, _escenarios, _preparar_planificador, revisar
+)
+from apps.inscripcion.models import (
+    Bloqueo, Carrera, Estudiante, EstudianteCarrera, Inscripcion, InscripcionMateria, ListaEspera,
+    Materia, MateriaCarreraSemestre, OfertaMateria, PeriodoAcademico, PlanEstudios
+)
+
+CARRERAS = 4
+MATERIAS_POR_SEMESTRE = 6
+SEMESTRES = 5
+ESTUDIANTES = 400
+
+
+class IndicesConsultasTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        hoy = datetime.date(2026, 2, 1)
+        anterior = PeriodoAcademico.objects.create(
+            codigo='2/2025', nombre='2-2025', tipo='2/2025',
+            fecha_inicio=datetime.date(2025, 8, 1), fecha_fin=datetime.date(2025, 12, 1),
+        )
+        periodo = PeriodoAcademico.objects.create(
+            codigo='1/2026', nombre='1-2026', tipo='1/2026', fecha_inicio=hoy,
+            fecha_fin=datetime.date(2026, 6, 30), activo=True, inscripciones_habilitadas=True,
+        )
+
+        carreras, planes, mcs = [], [], []
+        for c in range(CARRERAS):
+            carrera = Carrera.objects.create(codigo=f'C{c}', nombre=f'Carrera {c}', facultad='F', duracion_semestres=10)
+            carreras.append(carrera)
+            planes.append(PlanEstudios.objects.create(carrera=carrera, codigo=f'P{c}', nombre='Plan', anio_vigencia=2020))
+        materias = Materia.objects.bulk_create([
+            Materia(codigo=f'M{c}-{i}', nombre=f'Materia {c} {i}', creditos=4)
+            for c in range(CARRERAS) for i in range(SEMESTRES * MATERIAS_POR_SEMESTRE)
+        ])
+        for c, (carrera, plan) in enumerate(zip(carreras, planes)):
+            propias = materias[c * SEMESTRES * MATERIAS_POR_SEMESTRE:(c + 1) * SEMESTRES * MATERIAS_POR_SEMESTRE]
+            mcs += [
+                MateriaCarreraSemestre(
+                    carrera=carrera, plan_estudios=plan, materia=materia,
+                    semestre=i // MATERIAS_POR_SEMESTRE + 1, habilitada=i % 7 != 0,
+                )
+                for i, materia in enumerate(propias)
+            ]
+        mcs = MateriaCarreraSemestre.objects.bulk_create(mcs)
+        ofertas = OfertaMateria.objects.bulk_create([
+            OfertaMateria(materia_carrera=m, periodo=p, grupo=g, horario='LU-MI 07:00-09:15', turno='MANANA', cupo_maximo=40)
+            for p in (anterior, periodo) for m in mcs for g in ('A', 'B')
+        ])
+        actuales = [o for o in ofertas if o.periodo_id == periodo.id]
+
+        estudiantes = Estudiante.objects.bulk_create([
+            Estudiante(
+                registro=f'{218000000 + i}', documento_identidad=f'{5000000 + i}', nombre=f'N{i}',
+                apellido_paterno='A', lugar_origen='SC', fecha_ingreso=datetime.date(2020, 1, 1),
+            )
+            for i in range(ESTUDIANTES)
+        ])
+        inscritos = EstudianteCarrera.objects.bulk_create([
+            EstudianteCarrera(
+                estudiante=e, carrera=carreras[i % CARRERAS], plan_estudios=planes[i % CARRERAS],
+                semestre_actual=i % SEMESTRES + 1, activa=i % 10 != 0,
+            )
+            for i, e in enumerate(estudiantes)
+        ])
+        Bloqueo.objects.bulk_create([
+            Bloqueo(estudiante_carrera=ec, tipo='FINANCIERO', motivo='Deuda', activo=i % 6 == 0, resuelto=i % 6 != 0)
+            for i, ec in enumerate(inscritos) if i % 3 == 0
+        ])
+
+        vencida = timezone.now() - datetime.timedelta(minutes=5)
+        inscripciones = Inscripcion.objects.bulk_create([
+            Inscripcion(estudiante_carrera=ec, periodo_academico=anterior, fecha_inscripcion_asignada=hoy, estado='CONFIRMADA')
+            for ec in inscritos
+        ] + [
+            Inscripcion(
+                estudiante_carrera=ec, periodo_academico=periodo, fecha_inscripcion_asignada=hoy,
+                estado='PENDIENTE_PAGO' if i % 5 == 0 else 'CONFIRMADA',
+                reserva_expira_en=vencida if i % 5 == 0 else None,
+            )
+            for i, ec in enumerate(inscritos) if i % 2 == 1
+        ])
+        InscripcionMateria.objects.bulk_create([
+            InscripcionMateria(
+                inscripcion=ins, oferta=actuales[(i * 2 + j * 7) % len(actuales)], grupo='A',
+                reserva_expira_en=vencida if ins.estado == 'CONFIRMADA' and i % 11 == 0 and j == 0 else None,
+            )
+            for i, ins in enumerate(i for i in inscripciones if i.periodo_academico_id == periodo.id)
+            for j in range(3)
+        ])
+        ListaEspera.objects.bulk_create([
+            ListaEspera(oferta=actuales[i % 8], estudiante_carrera=ec, estado='ESPERANDO' if i % 4 else 'CANCELADA')
+            for i, ec in enumerate(inscritos[::2])
+        ])
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def test_datos_sembrados_cubren_todos_los_escenarios(self):
+        datos = _datos()
+        for nombre, requeridos, _, _ in _escenarios(datos, escrituras=True):
+            with self.subTest(escenario=nombre):
+                self.assertEqual([r for r in requeridos if r not in datos], [])
+
+    def test_escenarios_usan_indices(self):
+        # TestCase ya corre dentro de una transacción
+        _preparar_planificador()
+        datos = _datos()
+        for nombre, _, funcion, indices in _escenarios(datos, escrituras=True):
+            with self.subTest(escenario=nombre):
+                planes, recorridas, sin_usar = revisar(funcion, indices)
+                detalle = '\n\n'.join(f"{sql}\n{plan}" for sql, plan in planes)
+                self.assertTrue(planes, f"{nombre}: no emitió consultas")
+                self.assertEqual(recorridas, [], f"{nombre}:\n{detalle}")
+                self.assertEqual(sin_usar, [], f"{nombre}:\n{detalle}")
@@ -5,7 +5,12 @@ from .views import (
     MateriasHabilitadasView,
     PeriodoHabilitadoView,
     BoletaView,
-    PaymentWebhookView
+    PaymentWebhookView,
+    EstadoInscripcionView,
+    EstadoInscripcionEventosView,
+    AdmisionView,
+    CatalogoOfertasView,
+    CuposOfertasView
 )
 
 urlpatterns = [
@@ -15,4 +20,9 @@ urlpatterns = [
     path('estudiante/<str:registro>/materias-habilitadas', MateriasHabilitadasView.as_view(), name='materias-habilitadas'),
     path('estudiante/<str:registro>/periodo-habilitado', PeriodoHabilitadoView.as_view(), name='periodo-habilitado'),
     path('estudiante/<str:registro>/boleta', BoletaView.as_view(), name='boleta'),
+    path('estudiante/<str:registro>/admision', AdmisionView.as_view(), name='admision'),
+    path('inscripcion/<str:task_id>/estado', EstadoInscripcionView.as_view(), name='estado-inscripcion'),
+    path('carrera/<str:codigo_carrera>/catalogo', CatalogoOfertasView.as_view(), name='catalogo-ofertas'),
+    path('carrera/<str:codigo_carrera>/cupos', CuposOfertasView.as_view(), name='cupos-ofertas'),
+    path('inscripcion/<str:task_id>/eventos', EstadoInscripcionEventosView.as_view(), name='eventos-inscripcion'),
 ]
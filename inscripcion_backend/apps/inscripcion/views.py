@@ -1,7 +1,8 @@
 """
 Vistas web para inscripciones.
 """
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views import View
 from django.shortcuts import get_object_or_404
 
@@ -10,13 +11,18 @@ from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from django.db import transaction
 
-from .models import Estudiante, Boleta, Inscripcion
+from core.utils.serializacion import a_json
+from .models import Estudiante, Boleta, Inscripcion, Carrera, PlanEstudios
 from .services import (
     BloqueoService,
     InscripcionService,
     PeriodoAcademicoService,
     EstudianteService,
+    EstadoSolicitudService,
+    AdmisionService,
+    CupoService,
 )
+from .services.catalogo_service import CatalogoService
 
 
 class StandardResponseMixin:
@@ -161,6 +167,130 @@ class BoletaView(View, StandardResponseMixin):
             "estado_pago": estado,
         })
 
+class EstadoInscripcionView(View):
+    """Estado de una solicitud de inscripción encolada."""
+
+    def get(self, request, task_id):
+        estado = EstadoSolicitudService.obtener(task_id)
+        if not estado:
+            return JsonResponse({"error": "Solicitud no encontrada"}, status=404)
+        return JsonResponse({"task_id": task_id, **estado})
+
+
+class EstadoInscripcionEventosView(View):
+    """
+    Server-Sent Events: envía el estado actual y, cuando termina, el
+    resultado final de la solicitud, en lugar de que el cliente consulte.
+
+    El servidor es WSGI: cada conexión ocupa un worker, así que se espera el
+    resultado a lo sumo INSCRIPCION_SSE_TIMEOUT segundos con una sola
+    suscripción y se cierra; EventSource reconecta tras `retry:` milisegundos.
+    """
+
+    def get(self, request, task_id):
+        response = StreamingHttpResponse(self._eventos(task_id), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @staticmethod
+    def _evento(nombre, datos):
+        return f"event: {nombre}\ndata: {json.dumps(datos)}\n\n"
+
+    def _eventos(self, task_id):
+        estado = EstadoSolicitudService.obtener(task_id)
+        if not estado:
+            yield self._evento('error', {"error": "Solicitud no encontrada"})
+            return
+
+        yield f"retry: {settings.INSCRIPCION_SSE_REINTENTO_MS}\n\n"
+        yield self._evento('estado', {"task_id": task_id, **estado})
+        if estado['estado'] == EstadoSolicitudService.COMPLETADA:
+            return
+
+        final = EstadoSolicitudService.esperar(task_id, settings.INSCRIPCION_SSE_TIMEOUT)
+        if final:
+            yield self._evento('resultado', {"task_id": task_id, **final})
+        # Sin resultado se cierra: EventSource reconecta y recibe el estado actual
+
+
+class CatalogoOfertasMixin:
+    """Resuelve periodo, carrera y plan de los parámetros de la URL."""
+
+    def resolver_catalogo(self, request, codigo_carrera):
+        periodo = PeriodoAcademicoService.get_periodo(request.GET.get('periodo'))
+        carrera_id = Carrera.objects.filter(codigo=codigo_carrera).values_list('id', flat=True).first()
+        if not periodo or not carrera_id:
+            return None, JsonResponse({"error": "Periodo o carrera no encontrados"}, status=404)
+
+        plan_id = None
+        if request.GET.get('plan'):
+            plan_id = PlanEstudios.objects.filter(
+                codigo=request.GET['plan'], carrera_id=carrera_id
+            ).values_list('id', flat=True).first()
+            if not plan_id:
+                return None, JsonResponse({"error": "Plan no encontrado"}, status=404)
+        return (periodo.id, carrera_id, plan_id), None
+
+
+class CatalogoOfertasView(View, CatalogoOfertasMixin):
+    """
+    Catálogo de ofertas de la carrera ya serializado; se responde sin
+    pasar por el ORM ni por GraphQL. Admite ?plan= y ?periodo=.
+    """
+
+    def get(self, request, codigo_carrera):
+        catalogo, error = self.resolver_catalogo(request, codigo_carrera)
+        if error:
+            return error
+
+        generacion = CatalogoService.generacion(catalogo[0])
+        etag = '"{}-{}-{}-{}"'.format(*catalogo, generacion)
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponse(status=304)
+        else:
+            response = HttpResponse(
+                CatalogoService.serializado(*catalogo, generacion=generacion),
+                content_type='application/json'
+            )
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+
+class CuposOfertasView(View, CatalogoOfertasMixin):
+    """Cupos disponibles al momento por ID de oferta, para el catálogo."""
+
+    def get(self, request, codigo_carrera):
+        catalogo, error = self.resolver_catalogo(request, codigo_carrera)
+        if error:
+            return error
+
+        cupos = CupoService.disponibles(o.id for o in CatalogoService.ofertas_carrera(*catalogo))
+        return HttpResponse(
+            a_json({str(oferta_id): maximo - actual for oferta_id, (maximo, actual) in cupos.items()}),
+            content_type='application/json'
+        )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AdmisionView(View):
+    """Sala de espera: ficha de admisión o 429 con Retry-After."""
+
+    def post(self, request, registro):
+        codigo_carrera = request.GET.get('carrera')
+        if not codigo_carrera:
+            return JsonResponse({"error": "Falta el parámetro carrera"}, status=400)
+
+        admision = AdmisionService.solicitar(registro, codigo_carrera)
+        if admision['admitido']:
+            return JsonResponse(admision)
+
+        response = JsonResponse(admision, status=429)
+        response['Retry-After'] = str(admision['reintentar_en'])
+        return response
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class PaymentWebhookView(View):
     """
@@ -199,6 +329,10 @@ class PaymentWebhookView(View):
                     # Confirmar la inscripción
                     inscripcion.estado = 'CONFIRMADA'
                     inscripcion.save()
+                    # El pago cubre también las materias promovidas de la lista de espera
+                    inscripcion.materias_inscritas.filter(
+                        reserva_expira_en__isnull=False
+                    ).update(reserva_expira_en=None)
                     
                     return JsonResponse({"mensaje": "Pago procesado y registro verificado exitosamente"})
                 else:
@@ -1,4 +1,4 @@
-# celery_app is available when celery is installed
-# from .celery import app as celery_app
-# __all__ = ('celery_app',)
+# La app de Celery se carga con Django para que las tareas usen el broker configurado
+from .celery import app as celery_app
 
+__all__ = ('celery_app',)
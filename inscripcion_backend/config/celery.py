@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import celeryd_after_setup
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.base')
 
@@ -7,6 +8,18 @@ app = Celery('inscripcion_backend')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
+
+@celeryd_after_setup.connect
+def verificar_colas(sender, instance, **kwargs):
+    from django.core.exceptions import ImproperlyConfigured
+    from apps.inscripcion.routers import verificar_colas_worker
+    try:
+        verificar_colas_worker(instance.app.amqp.queues.consume_from)
+    except ImproperlyConfigured as e:
+        # Celery registra y descarta las excepciones de los receptores de señales
+        raise SystemExit(str(e))
+
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
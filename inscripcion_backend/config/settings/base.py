@@ -44,6 +44,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.inscripcion.middleware.LoteInformixMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -143,6 +144,7 @@ GRAPHENE = {
     'SCHEMA': 'apps.inscripcion.schema.schema',
     'MIDDLEWARE': [
         'graphene_django.debug.DjangoDebugMiddleware',
+        'apps.inscripcion.middleware.AnticipoInformixMiddleware',
     ],
 }
 
@@ -170,3 +172,91 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_TASK_ROUTES = ('apps.inscripcion.routers.enrutar_tareas',)
+
+# Colas de inscripción particionadas por carrera: inscripcion.0 ... inscripcion.N-1
+INSCRIPCION_PARTICIONES = int(os.environ.get('INSCRIPCION_PARTICIONES', '4'))
+CELERY_BEAT_SCHEDULE = {
+    'barrer-reservas-expiradas': {
+        'task': 'apps.inscripcion.tasks.barrer_reservas_expiradas',
+        'schedule': 30.0,
+    },
+    'sincronizar-cupos-redis': {
+        'task': 'apps.inscripcion.tasks.sincronizar_cupos_redis',
+        'schedule': 5.0,
+    },
+    'recalcular-cupos-tokens': {
+        'task': 'apps.inscripcion.tasks.recalcular_cupos_tokens',
+        'schedule': 5.0,
+    },
+}
+
+# Contadores de cupos en Redis con escritura diferida a OfertaMateria (requiere REDIS_URL)
+CUPOS_EN_REDIS = os.environ.get('CUPOS_EN_REDIS', 'False') == 'True' and bool(os.environ.get('REDIS_URL'))
+CUPOS_REDIS_LOTE = int(os.environ.get('CUPOS_REDIS_LOTE', '500'))
+# Segundos que una reserva en Redis espera la confirmación de su transacción
+CUPOS_REDIS_RETENCION_SEGUNDOS = int(os.environ.get('CUPOS_REDIS_RETENCION_SEGUNDOS', '120'))
+
+# Reservas pendientes de pago
+INSCRIPCION_MINUTOS_PAGO = int(os.environ.get('INSCRIPCION_MINUTOS_PAGO', '10'))
+RESERVAS_EXPIRADAS_LOTE = int(os.environ.get('RESERVAS_EXPIRADAS_LOTE', '500'))
+
+# Envío de inscripciones
+INSCRIPCION_MODO_LECTURA = os.environ.get('INSCRIPCION_MODO_LECTURA', 'True') == 'True'
+INSCRIPCION_IDEMPOTENCIA_TTL = int(os.environ.get('INSCRIPCION_IDEMPOTENCIA_TTL', '600'))
+# Segundos que una tarea espera el candado del estudiante antes de desistir
+INSCRIPCION_ESPERA_CANDADO = float(os.environ.get('INSCRIPCION_ESPERA_CANDADO', '3'))
+# Server-Sent Events del estado de una solicitud: segundos que una conexión
+# ocupa un worker esperando el resultado y pausa antes de reconectar (ms)
+INSCRIPCION_SSE_TIMEOUT = int(os.environ.get('INSCRIPCION_SSE_TIMEOUT', '5'))
+INSCRIPCION_SSE_REINTENTO_MS = int(os.environ.get('INSCRIPCION_SSE_REINTENTO_MS', '1000'))
+
+# Sala de espera: fichas de admisión por turno asignado
+ADMISION_HABILITADA = os.environ.get('ADMISION_HABILITADA', 'False') == 'True'
+# Admisiones por segundo en cada turno
+ADMISION_TASA = int(os.environ.get('ADMISION_TASA', '50'))
+# Segundos de validez de una ficha emitida
+ADMISION_VIGENCIA = int(os.environ.get('ADMISION_VIGENCIA', '300'))
+ADMISION_CACHE_TURNO = int(os.environ.get('ADMISION_CACHE_TURNO', '300'))
+# Segundos que se conservan la fila de un turno y el número de cada estudiante
+ADMISION_FILA_TTL = int(os.environ.get('ADMISION_FILA_TTL', '86400'))
+
+# Procesamiento por lotes (group commit) de inscripciones; requiere REDIS_URL
+INSCRIPCION_LOTES = os.environ.get('INSCRIPCION_LOTES', 'False') == 'True' and bool(os.environ.get('REDIS_URL'))
+INSCRIPCION_LOTE_MAXIMO = int(os.environ.get('INSCRIPCION_LOTE_MAXIMO', '50'))
+INSCRIPCION_LOTE_ESPERA_MS = int(os.environ.get('INSCRIPCION_LOTE_ESPERA_MS', '20'))
+
+# Servicio externo Informix (GraphQL)
+EXTERNAL_API_URL = os.environ.get('EXTERNAL_API_URL', 'https://dev-serviciosinformix.uagrm.edu.bo/informix-services/')
+# Conexiones keep-alive por proceso; al menos los hilos que atienden peticiones
+EXTERNAL_API_POOL = int(os.environ.get('EXTERNAL_API_POOL', '10'))
+# Segundos de conexión y de lectura; EXTERNAL_API_TIMEOUTS ajusta la lectura
+# por operación, p. ej. "allMoferta=20,bloqueo=5"
+EXTERNAL_API_TIMEOUT_CONEXION = float(os.environ.get('EXTERNAL_API_TIMEOUT_CONEXION', '3'))
+EXTERNAL_API_TIMEOUT_LECTURA = float(os.environ.get('EXTERNAL_API_TIMEOUT_LECTURA', '10'))
+EXTERNAL_API_TIMEOUTS = {
+    operacion.strip(): float(segundos)
+    for operacion, segundos in (
+        par.split('=', 1) for par in os.environ.get('EXTERNAL_API_TIMEOUTS', '').split(',') if '=' in par
+    )
+}
+# Reintentos de consultas (no mutaciones) con espera exponencial aleatoria
+EXTERNAL_API_REINTENTOS = int(os.environ.get('EXTERNAL_API_REINTENTOS', '2'))
+EXTERNAL_API_ESPERA_BASE = float(os.environ.get('EXTERNAL_API_ESPERA_BASE', '0.2'))
+EXTERNAL_API_ESPERA_MAXIMA = float(os.environ.get('EXTERNAL_API_ESPERA_MAXIMA', '2'))
+# Consultas de una misma petición GraphQL enviadas en un solo documento con alias
+EXTERNAL_API_LOTE = os.environ.get('EXTERNAL_API_LOTE', 'True') == 'True'
+# Cada cuántos segundos cada proceso registra sus contadores y su pool (0 desactiva)
+EXTERNAL_API_ESTADISTICAS_SEGUNDOS = float(os.environ.get('EXTERNAL_API_ESTADISTICAS_SEGUNDOS', '60'))
+
+# Métricas periódicas de los procesos en la salida estándar (logger inscripcion.metricas)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'consola': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'inscripcion.metricas': {'handlers': ['consola'], 'level': 'INFO', 'propagate': False},
+    },
+}
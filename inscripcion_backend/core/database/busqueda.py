@@ -0,0 +1,38 @@
+"""
+Búsqueda por subcadena sobre columnas de texto.
+
+En PostgreSQL los filtros icontains generan UPPER(columna::text) LIKE ...,
+que usan los índices GIN de pg_trgm sobre esa misma expresión (ver la
+migración 0012_indices_trigramas). En SQLite es un LIKE sin índice.
+"""
+from functools import reduce
+from operator import or_
+from typing import List
+
+from django.db import connection
+from django.db.models import Q, QuerySet
+
+
+def filtro_subcadena(campos: List[str], texto: str) -> Q:
+    """
+    Cada palabra del texto debe aparecer en alguno de los campos.
+    """
+    filtro = Q()
+    for palabra in texto.split():
+        filtro &= reduce(or_, (Q(**{f'{campo}__icontains': palabra}) for campo in campos))
+    return filtro
+
+
+def ordenar_por_similitud(queryset: QuerySet, campos: List[str], texto: str) -> QuerySet:
+    """
+    Ordena por similitud de trigramas con el texto (solo PostgreSQL).
+    """
+    if connection.vendor != 'postgresql':
+        return queryset
+
+    from django.contrib.postgres.search import TrigramSimilarity
+    from django.db.models.functions import Greatest
+
+    similitudes = [TrigramSimilarity(campo, texto) for campo in campos]
+    similitud = Greatest(*similitudes) if len(similitudes) > 1 else similitudes[0]
+    return queryset.annotate(similitud=similitud).order_by('-similitud')
@@ -0,0 +1,28 @@
+"""
+Candados consultivos (advisory locks) de PostgreSQL.
+"""
+import time
+from django.db import connection
+
+# Espacios de nombres para pg_advisory_xact_lock(int, int)
+INSCRIPCION_ESTUDIANTE = 1
+
+
+def adquirir_candado(espacio: int, clave: str, espera: float = 0) -> bool:
+    """
+    Toma un candado ligado a la transacción en curso; se libera solo al
+    confirmar o revertir. Reintenta hasta `espera` segundos y devuelve
+    False si no lo obtuvo. En motores sin advisory locks siempre devuelve True.
+    """
+    if connection.vendor != 'postgresql':
+        return True
+
+    limite = time.monotonic() + espera
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute("SELECT pg_try_advisory_xact_lock(%s, hashtext(%s))", [espacio, clave])
+            if cursor.fetchone()[0]:
+                return True
+            if time.monotonic() >= limite:
+                return False
+            time.sleep(0.05)
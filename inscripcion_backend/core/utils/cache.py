@@ -0,0 +1,79 @@
+"""
+Caché con protección contra estampidas para valores costosos de calcular.
+
+- Un solo proceso recalcula cada clave (candado corto con cache.add, que en
+  Redis es SET NX).
+- Refresco anticipado probabilístico: antes de vencer, la probabilidad de
+  recalcular crece según lo que tardó el último cálculo.
+- Mientras alguien recalcula, los demás siguen sirviendo el valor vencido
+  durante un margen de gracia.
+"""
+import math
+import random
+import time
+from typing import Any, Callable, Optional
+
+from django.core.cache import cache
+
+# Segundos extra que la entrada sigue en caché después de vencer
+GRACIA = 300
+# Vigencia del candado de recálculo
+BLOQUEO = 10
+# Espera máxima por el cálculo de otro proceso cuando no hay valor vencido
+ESPERA = 2.0
+INTERVALO = 0.05
+
+
+def _calcular_y_guardar(clave: str, calcular: Callable[[], Any], timeout: int, gracia: int) -> Any:
+    inicio = time.monotonic()
+    valor = calcular()
+    delta = time.monotonic() - inicio
+    cache.set(clave, (valor, delta, time.time() + timeout), timeout + gracia)
+    return valor
+
+
+def obtener_o_calcular(
+    clave: str,
+    calcular: Callable[[], Any],
+    timeout: int,
+    beta: float = 1.0,
+    gracia: int = GRACIA,
+    bloqueo: int = BLOQUEO,
+    espera: Optional[float] = ESPERA
+) -> Any:
+    """
+    Equivalente a cache.get_or_set con recálculo de un solo vuelo, refresco
+    anticipado y servicio del valor vencido mientras se recalcula.
+    """
+    entrada = cache.get(clave)
+    ahora = time.time()
+
+    # Valores guardados antes con cache.set no tienen el sobre (valor, delta, expira)
+    if isinstance(entrada, tuple) and len(entrada) == 3:
+        valor, delta, expira = entrada
+        # XFetch: -log(U) es exponencial, así que a veces adelanta el refresco
+        if ahora - delta * beta * math.log(1.0 - random.random()) < expira:
+            return valor
+        candado = f'{clave}:recalculo'
+        if not cache.add(candado, 1, bloqueo):
+            return valor
+        try:
+            return _calcular_y_guardar(clave, calcular, timeout, gracia)
+        finally:
+            cache.delete(candado)
+
+    candado = f'{clave}:recalculo'
+    if cache.add(candado, 1, bloqueo):
+        try:
+            return _calcular_y_guardar(clave, calcular, timeout, gracia)
+        finally:
+            cache.delete(candado)
+
+    # Otro proceso está calculando: esperar su resultado antes de repetir la consulta
+    limite = time.monotonic() + (espera or 0)
+    while time.monotonic() < limite:
+        time.sleep(INTERVALO)
+        entrada = cache.get(clave)
+        if isinstance(entrada, tuple) and len(entrada) == 3:
+            return entrada[0]
+    return _calcular_y_guardar(clave, calcular, timeout, gracia)
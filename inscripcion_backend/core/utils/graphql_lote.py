@@ -0,0 +1,91 @@
+"""
+Combina varias consultas GraphQL en un solo documento con alias y separa
+la respuesta.
+
+Cada consulta i recibe el prefijo "o{i}_" en sus variables y en el alias
+de sus campos raíz, así dos consultas con la misma variable ($registro) o
+el mismo campo (bloqueo) no chocan.
+"""
+import copy
+from typing import Any, Dict, List, Optional, Tuple
+
+from graphql import parse, print_ast, visit, Visitor
+from graphql.language import (
+    DocumentNode, FieldNode, NameNode, OperationDefinitionNode, OperationType,
+    SelectionSetNode, VariableNode
+)
+
+
+class _RenombrarVariables(Visitor):
+    def __init__(self, prefijo: str):
+        super().__init__()
+        self.prefijo = prefijo
+
+    def enter_variable(self, node, *_):
+        return VariableNode(name=NameNode(value=self.prefijo + node.name.value))
+
+
+def combinar(consultas: List[Tuple[str, Optional[dict]]]) -> Optional[Tuple[str, dict, List[Dict[str, str]]]]:
+    """
+    Documento combinado, sus variables y, por consulta, alias -> clave
+    original de la respuesta. None si alguna consulta no se puede combinar
+    (mutaciones, fragmentos o varias operaciones).
+    """
+    definiciones, selecciones, variables, mapas = [], [], {}, []
+    for i, (texto, valores) in enumerate(consultas):
+        documento = parse(texto)
+        if len(documento.definitions) != 1:
+            return None
+        operacion = documento.definitions[0]
+        if not isinstance(operacion, OperationDefinitionNode) or operacion.operation != OperationType.QUERY:
+            return None
+
+        prefijo = f'o{i}_'
+        operacion = visit(operacion, _RenombrarVariables(prefijo))
+        declaradas = set()
+        for definicion in operacion.variable_definitions or ():
+            definiciones.append(definicion)
+            declaradas.add(definicion.variable.name.value)
+        variables.update(
+            (prefijo + nombre, valor) for nombre, valor in (valores or {}).items()
+            if prefijo + nombre in declaradas
+        )
+
+        mapa = {}
+        for seleccion in operacion.selection_set.selections:
+            if not isinstance(seleccion, FieldNode):
+                return None
+            alias = prefijo + (seleccion.alias or seleccion.name).value
+            mapa[alias] = (seleccion.alias or seleccion.name).value
+            seleccion = copy.copy(seleccion)
+            seleccion.alias = NameNode(value=alias)
+            selecciones.append(seleccion)
+        mapas.append(mapa)
+
+    documento = DocumentNode(definitions=(
+        OperationDefinitionNode(
+            operation=OperationType.QUERY,
+            variable_definitions=tuple(definiciones),
+            directives=(),
+            selection_set=SelectionSetNode(selections=tuple(selecciones)),
+        ),
+    ))
+    return print_ast(documento), variables, mapas
+
+
+def separar(resultado: Dict[str, Any], mapas: List[Dict[str, str]]) -> Optional[List[Optional[dict]]]:
+    """
+    Datos de cada consulta a partir de la respuesta combinada; None en la
+    posición de las consultas con errores. Devuelve None si hay errores que
+    no se pueden atribuir a una consulta (p. ej. de validación).
+    """
+    datos = resultado.get('data')
+    errores = resultado.get('errors') or []
+    if datos is None or any(not e.get('path') for e in errores):
+        return None
+
+    con_error = {e['path'][0] for e in errores}
+    return [
+        None if con_error & mapa.keys() else {original: datos.get(alias) for alias, original in mapa.items()}
+        for mapa in mapas
+    ]
@@ -0,0 +1,83 @@
+"""
+Interpretación de los textos de horario de las ofertas.
+
+Formatos aceptados: "LU-MI 07:00-09:15", "Lun-Mie-Vie 07:00-09:00",
+"Sabado 08:00-12:00" y varios bloques separados por coma, punto y coma o /.
+"""
+import re
+import unicodedata
+from typing import List, Optional, Tuple
+
+DIAS = {'LU': 1, 'MA': 2, 'MI': 3, 'JU': 4, 'VI': 5, 'SA': 6, 'DO': 7}
+
+# Inicio de cada turno en minutos desde medianoche
+TURNOS = [(18 * 60, 'NOCHE'), (12 * 60, 'TARDE'), (0, 'MANANA')]
+
+_BLOQUE = re.compile(
+    r'(?P<dias>[A-Za-z]+(?:\s*-\s*[A-Za-z]+)*)\s+'
+    r'(?P<hi>\d{1,2}):(?P<mi>\d{2})\s*-\s*(?P<hf>\d{1,2}):(?P<mf>\d{2})'
+)
+
+
+def _sin_acentos(texto: str) -> str:
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+
+
+def codigo_dia(texto: str) -> Optional[int]:
+    """
+    Número de día (1 = lunes) a partir de "LU", "Lun", "Lunes", "Sábado"...
+    """
+    return DIAS.get(_sin_acentos(texto).strip().upper()[:2])
+
+
+def parsear_horario(texto: Optional[str]) -> List[Tuple[int, int, int]]:
+    """
+    Bloques (día, minuto inicio, minuto fin) del horario, ordenados.
+    Devuelve una lista vacía si el texto no tiene un horario reconocible.
+    """
+    if not texto:
+        return []
+
+    bloques = set()
+    for m in _BLOQUE.finditer(_sin_acentos(texto)):
+        inicio = int(m['hi']) * 60 + int(m['mi'])
+        fin = int(m['hf']) * 60 + int(m['mf'])
+        if fin <= inicio:
+            continue
+        for dia in re.split(r'\s*-\s*', m['dias']):
+            numero = codigo_dia(dia)
+            if numero:
+                bloques.add((numero, inicio, fin))
+    return sorted(bloques)
+
+
+def turno_de(bloques: List[Tuple[int, int, int]]) -> Optional[str]:
+    """
+    Turno principal según la hora de inicio más temprana del horario. Es
+    el que se muestra; el filtro por turno usa rango_turno sobre todos los
+    bloques.
+    """
+    if not bloques:
+        return None
+    inicio = min(b[1] for b in bloques)
+    return next(turno for desde, turno in TURNOS if inicio >= desde)
+
+
+def rango_turno(turno: Optional[str]) -> Optional[Tuple[int, int]]:
+    """
+    Minutos [desde, hasta) del turno, o None si no es un turno conocido.
+    """
+    turno = normalizar_turno(turno)
+    hasta = 24 * 60
+    for desde, nombre in TURNOS:
+        if nombre == turno:
+            return desde, hasta
+        hasta = desde
+    return None
+
+
+def normalizar_turno(texto: Optional[str]) -> Optional[str]:
+    """
+    "Mañana", "MAÑANA" o "manana" -> "MANANA".
+    """
+    return _sin_acentos(texto).strip().upper() if texto else None
@@ -0,0 +1,95 @@
+"""
+Paginación por cursor (keyset) con la forma de las conexiones Relay.
+
+El cursor guarda los valores de las columnas de orden del último elemento
+de la página, así cada página es un WHERE (col) > (valor) ... LIMIT n sobre
+un índice, sin OFFSET, y cuesta lo mismo en cualquier punto de la tabla.
+"""
+import base64
+import json
+from functools import reduce
+from operator import or_
+from typing import Any, Dict, List, Optional, Sequence
+
+from django.db.models import Q, QuerySet
+
+MAXIMO_PAGINA = 100
+# Tope de los campos de lista sin paginar, que se mantienen por compatibilidad
+MAXIMO_LISTA = 500
+
+
+def _valores(objeto: Any, campos: Sequence[str]) -> List[Any]:
+    return [getattr(objeto, campo) for campo in campos]
+
+
+def codificar_cursor(valores: List[Any]) -> str:
+    """
+    Cursor opaco a partir de los valores de orden.
+    """
+    return base64.urlsafe_b64encode(json.dumps(valores, default=str).encode('utf-8')).decode('ascii')
+
+
+def decodificar_cursor(cursor: str, campos: Sequence[str]) -> List[Any]:
+    """
+    Valores de orden de un cursor; ValueError si no corresponde a los campos.
+    """
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, UnicodeError):
+        raise ValueError("Cursor inválido")
+    if not isinstance(valores, list) or len(valores) != len(campos):
+        raise ValueError("Cursor inválido")
+    return valores
+
+
+def _filtro(campos: Sequence[str], valores: List[Any], operador: str) -> Q:
+    # (a, b) > (x, y)  ->  a > x OR (a = x AND b > y)
+    return reduce(or_, (
+        Q(**{campo: valor for campo, valor in zip(campos[:i], valores[:i])},
+          **{f'{campos[i]}__{operador}': valores[i]})
+        for i in range(len(campos))
+    ))
+
+
+def paginar(
+    queryset: QuerySet,
+    campos: Sequence[str] = ('id',),
+    first: Optional[int] = None,
+    after: Optional[str] = None,
+    last: Optional[int] = None,
+    before: Optional[str] = None,
+    maximo: int = MAXIMO_PAGINA
+) -> Dict[str, Any]:
+    """
+    Página de un QuerySet ordenado por `campos`, que deben identificar cada
+    fila (terminar en una columna única). El cursor y el límite se aplican
+    en la consulta: el QuerySet no debe estar evaluado. Sin first ni last
+    devuelve las primeras `maximo` filas.
+    """
+    hacia_atras = last is not None and first is None
+    n = max(0, min(last if hacia_atras else (first if first is not None else maximo), maximo))
+    desde = decodificar_cursor(after, campos) if after else None
+    hasta = decodificar_cursor(before, campos) if before else None
+
+    if desde is not None:
+        queryset = queryset.filter(_filtro(campos, desde, 'gt'))
+    if hasta is not None:
+        queryset = queryset.filter(_filtro(campos, hasta, 'lt'))
+    orden = [f'-{c}' for c in campos] if hacia_atras else list(campos)
+    filas = list(queryset.order_by(*orden)[:n + 1])
+
+    hay_mas = len(filas) > n
+    filas = filas[:n]
+    if hacia_atras:
+        filas.reverse()
+
+    edges = [{'node': f, 'cursor': codificar_cursor(_valores(f, campos))} for f in filas]
+    return {
+        'edges': edges,
+        'page_info': {
+            'has_next_page': hay_mas if not hacia_atras else hasta is not None,
+            'has_previous_page': hay_mas if hacia_atras else desde is not None,
+            'start_cursor': edges[0]['cursor'] if edges else None,
+            'end_cursor': edges[-1]['cursor'] if edges else None,
+        },
+    }
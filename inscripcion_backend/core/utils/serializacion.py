@@ -0,0 +1,21 @@
+"""
+Serialización JSON a bytes para respuestas precalculadas.
+
+Usa orjson si está instalado y, si no, el módulo json estándar.
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def a_json(datos: Any) -> bytes:
+    """
+    JSON compacto en UTF-8. Las claves de los diccionarios deben ser texto.
+    """
+    if orjson is not None:
+        return orjson.dumps(datos)
+    return json.dumps(datos, ensure_ascii=False, separators=(',', ':')).encode('utf-8')